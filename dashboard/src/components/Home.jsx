@@ -106,26 +106,27 @@ const Home = () => {
       console.log("Fetching real dashboard stats for year:", selectedYear);
       setDataSource("mysql"); // Default to MySQL as we're now using MySQL data
 
-      // Fetch actual data from server
-      try {
-        const [employeeStats, salaryStats, structureStats] = await Promise.all([
-          dashboardAPI.getEmployeeStatsMysql(selectedYear),
-          dashboardAPI.getSalaryStatsMysql(selectedYear),
-          dashboardAPI.getOrganizationStatsMysql(),
-        ]);
-
-        console.log("MySQL stats loaded:", {
-          employeeStats,
-          salaryStats,
-          structureStats,
-        });
+      // Fetch all sections in one request; the server loads them in parallel
+      const loadBundle = async (source) => {
+        const bundle = await dashboardAPI.getBootstrap(selectedYear, source);
+        const { employees, salary, organization } = bundle.Data;
+        if (!employees || !organization) {
+          throw new Error(
+            `Dashboard sections unavailable: ${bundle.Unavailable.join(", ")}`
+          );
+        }
+        console.log(`${source} dashboard loaded, timings (ms):`, bundle.Timings);
 
         // Combine stats into single structure
         setStats({
-          employees: employeeStats,
-          salary: salaryStats,
-          structure: structureStats,
+          employees,
+          salary,
+          structure: organization,
         });
+      };
+
+      try {
+        await loadBundle("mysql");
       } catch (error) {
         console.error("Error loading MySQL stats:", error);
 
@@ -134,21 +135,8 @@ const Home = () => {
         setDataSource("sqlserver");
 
         try {
-          const [employeeStats, salaryStats, structureStats] =
-            await Promise.all([
-              dashboardAPI.getEmployeeStats(selectedYear),
-              dashboardAPI.getSalaryStats(selectedYear),
-              dashboardAPI.getOrganizationStats(),
-            ]);
-
+          await loadBundle("sqlserver");
           console.log("SQL Server stats loaded as fallback");
-
-          // Combine stats into single structure
-          setStats({
-            employees: employeeStats,
-            salary: salaryStats,
-            structure: structureStats,
-          });
         } catch (sqlError) {
           console.error("SQL Server data also failed:", sqlError);
           throw new Error("Failed to load data from both MySQL and SQL Server");
@@ -315,63 +303,65 @@ const Home = () => {
             </div>
           </section>
 
-          {/* Salary Statistics */}
-          <section className="mb-4 fade-in">
-            <h5 className="text-success mb-3">
-              <FaMoneyBillWave className="me-2" />
-              Payroll Statistics
-            </h5>
-            <div className="row">
-              <div className="col-md-3">
-                <DashboardCard
-                  icon={<FaCoins />}
-                  title="Total Payroll"
-                  value={new Intl.NumberFormat("en-US", {
-                    notation: "compact",
-                    compactDisplay: "short",
-                  }).format(stats.salary.totalPayroll)}
-                  subtitle="VND / month"
-                  colorScheme="green"
-                />
-              </div>
-              <div className="col-md-3">
-                <DashboardCard
-                  icon={<FaMoneyBillWave />}
-                  title="Average Salary"
-                  value={new Intl.NumberFormat("en-US", {
-                    notation: "compact",
-                    compactDisplay: "short",
-                  }).format(stats.salary.averageSalary)}
-                  subtitle="VND / month"
-                  colorScheme="teal"
-                />
-              </div>
-              <div className="col-md-3">
-                <DashboardCard
-                  icon={<FaDollarSign />}
-                  title="Highest Salary"
-                  value={new Intl.NumberFormat("en-US", {
-                    notation: "compact",
-                    compactDisplay: "short",
-                  }).format(stats.salary.highestSalary)}
-                  subtitle="VND / month"
-                  colorScheme="indigo"
-                />
-              </div>
-              <div className="col-md-3">
-                <DashboardCard
-                  icon={<FaAward />}
-                  title="Total Bonuses"
-                  value={new Intl.NumberFormat("en-US", {
-                    notation: "compact",
-                    compactDisplay: "short",
-                  }).format(stats.salary.totalBonuses)}
-                  subtitle="VND / year"
-                  colorScheme="pink"
-                />
+          {/* Salary Statistics (only for roles that can read payroll) */}
+          {stats.salary && (
+            <section className="mb-4 fade-in">
+              <h5 className="text-success mb-3">
+                <FaMoneyBillWave className="me-2" />
+                Payroll Statistics
+              </h5>
+              <div className="row">
+                <div className="col-md-3">
+                  <DashboardCard
+                    icon={<FaCoins />}
+                    title="Total Payroll"
+                    value={new Intl.NumberFormat("en-US", {
+                      notation: "compact",
+                      compactDisplay: "short",
+                    }).format(stats.salary.totalPayroll)}
+                    subtitle="VND / month"
+                    colorScheme="green"
+                  />
+                </div>
+                <div className="col-md-3">
+                  <DashboardCard
+                    icon={<FaMoneyBillWave />}
+                    title="Average Salary"
+                    value={new Intl.NumberFormat("en-US", {
+                      notation: "compact",
+                      compactDisplay: "short",
+                    }).format(stats.salary.averageSalary)}
+                    subtitle="VND / month"
+                    colorScheme="teal"
+                  />
+                </div>
+                <div className="col-md-3">
+                  <DashboardCard
+                    icon={<FaDollarSign />}
+                    title="Highest Salary"
+                    value={new Intl.NumberFormat("en-US", {
+                      notation: "compact",
+                      compactDisplay: "short",
+                    }).format(stats.salary.highestSalary)}
+                    subtitle="VND / month"
+                    colorScheme="indigo"
+                  />
+                </div>
+                <div className="col-md-3">
+                  <DashboardCard
+                    icon={<FaAward />}
+                    title="Total Bonuses"
+                    value={new Intl.NumberFormat("en-US", {
+                      notation: "compact",
+                      compactDisplay: "short",
+                    }).format(stats.salary.totalBonuses)}
+                    subtitle="VND / year"
+                    colorScheme="pink"
+                  />
+                </div>
               </div>
-            </div>
-          </section>
+            </section>
+          )}
 
           {/* Organization Structure */}
           <section className="mb-4 fade-in">
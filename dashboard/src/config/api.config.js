@@ -128,6 +128,32 @@ export async function checkServerConnection() {
 
 // Dashboard API methods
 export const dashboardAPI = {
+  // Everything the dashboard shows on load, in one request
+  getBootstrap: async (year, source = "sqlserver") => {
+    try {
+      const token = TokenManager.getToken();
+      const response = await axios.get(
+        `${API_URL}/dashboard/bootstrap?year=${year}&source=${source}`,
+        {
+          headers: {
+            Authorization: `Bearer ${token}`,
+          },
+        }
+      );
+
+      if (response.data.Status) {
+        return response.data;
+      } else {
+        throw new Error(
+          response.data.Message || "Failed to load dashboard data"
+        );
+      }
+    } catch (error) {
+      console.error("Error getting dashboard bootstrap:", error);
+      throw error;
+    }
+  },
+
   // SQL Server endpoints
   getEmployeeStats: async (year) => {
     try {
@@ -0,0 +1,81 @@
+"""
+Benchmark: streaming export of a large result.
+
+Exports ROWS payroll-shaped rows through utils.export.export_response, fed
+in EXPORT_BATCH_SIZE batches as stream_sqlserver_query would, and discards
+the output as a client would receive it. Meanwhile a probe task measures
+how late the event loop runs it, which shows whether encoding blocks other
+requests.
+
+Run from the python_server directory:
+
+    python -m benchmarks.bench_export
+    python -m benchmarks.bench_export --format csv --gzip
+"""
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import time
+from datetime import date
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db import RowSet  # noqa: E402
+from utils.export import EXPORT_BATCH_SIZE, export_response  # noqa: E402
+
+ROWS = 150_000
+PROBE_INTERVAL_SECONDS = 0.01
+COLUMNS = ["EmployeeID", "FullName", "DepartmentName", "PayrollMonth", "BaseSalary",
+           "Bonus", "Deductions", "NetSalary"]
+
+
+async def payroll_batches():
+    for start in range(0, ROWS, EXPORT_BATCH_SIZE):
+        rows = [(f"NV{i:06d}", f"Nguyễn Văn {i}", "Phòng Kế toán", date(2025, 3, 1),
+                 Decimal("15000000.00"), Decimal("500000.00"), Decimal("250000.00"),
+                 Decimal("15250000.00"))
+                for i in range(start, min(ROWS, start + EXPORT_BATCH_SIZE))]
+        await asyncio.sleep(0)  # a database round trip would yield here
+        yield RowSet(COLUMNS, rows)
+
+
+async def run(export_format: str, gzip: bool):
+    done = asyncio.Event()
+    lags = []
+
+    async def probe():
+        while not done.is_set():
+            due = time.perf_counter() + PROBE_INTERVAL_SECONDS
+            await asyncio.sleep(PROBE_INTERVAL_SECONDS)
+            lags.append(time.perf_counter() - due)
+
+    async def export():
+        response = await export_response(payroll_batches(), export_format, "bench", gzip=gzip)
+        size = chunks = 0
+        async for chunk in response.body_iterator:
+            size += len(chunk)
+            chunks += 1
+        done.set()
+        return size, chunks
+
+    start = time.perf_counter()
+    (size, chunks), _ = await asyncio.gather(export(), probe())
+    elapsed = time.perf_counter() - start
+
+    print(f"format:           {export_format}{' + gzip' if gzip else ''}")
+    print(f"rows:             {ROWS} in batches of {EXPORT_BATCH_SIZE}")
+    print(f"wall time:        {elapsed:.2f}s ({ROWS / elapsed:,.0f} rows/s)")
+    print(f"output:           {size / 1e6:.1f} MB in {chunks} chunks")
+    print(f"peak RSS:         {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+    print(f"event loop lag:   max {max(lags) * 1000:.1f} ms over {len(lags)} probes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--format", choices=("csv", "xlsx"), default="xlsx")
+    parser.add_argument("--gzip", action="store_true", help="gzip the csv output")
+    args = parser.parse_args()
+    asyncio.run(run(args.format, args.gzip))
@@ -0,0 +1,141 @@
+"""
+Benchmark: /health latency while heavy report queries are in flight.
+
+Fires CONCURRENT_REPORTS requests at /reports/employee-stats, each backed by a
+SQL Server query that blocks its worker thread for HEAVY_QUERY_SECONDS, and
+samples /health latency the whole time. The database driver is replaced by a
+connection whose cursor simply sleeps, so the benchmark measures how the API
+schedules blocking driver calls rather than how fast SQL Server is.
+
+Run from the python_server directory:
+
+    python -m benchmarks.bench_health_latency
+    python -m benchmarks.bench_health_latency --inline   # legacy behaviour
+
+`--inline` runs the driver calls directly on the event loop, which is how
+execute_sqlserver_query behaved before it used the SQL Server executor.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import Executor, Future
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+import utils.db as db  # noqa: E402
+from main import app  # noqa: E402
+from routes.auth_route import generate_token  # noqa: E402
+
+CONCURRENT_REPORTS = 50
+HEAVY_QUERY_SECONDS = 0.5
+HEALTH_INTERVAL_SECONDS = 0.01
+
+
+class SlowCursor:
+    """Cursor that holds its thread like a heavy aggregate query would"""
+
+    description = [("TotalEmployees",), ("NewHires",), ("TurnoverRate",), ("AvgSalary",)]
+    rowcount = 1
+
+    def execute(self, query, *args):
+        time.sleep(HEAVY_QUERY_SECONDS)
+
+    def fetchall(self):
+        return [(100, 10, 5.0, 1000.0)]
+
+    def cancel(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SlowConnection:
+    def cursor(self):
+        return SlowCursor()
+
+    def execute(self, query, *args):
+        return SlowCursor()
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class InlineExecutor(Executor):
+    """Executor that runs work on the calling thread (the event loop)"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:
+            future.set_exception(exc)
+        return future
+
+
+def install_fake_backend(inline: bool):
+    db.sqlserver_executor = InlineExecutor() if inline else type(db.sqlserver_executor)(
+        max_workers=CONCURRENT_REPORTS, thread_name_prefix="sqlserver")
+    db.sql_server_pool = db.ConnectionPool(
+        "sqlserver", connect=SlowConnection, max_size=CONCURRENT_REPORTS,
+        executor=db.sqlserver_executor)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(inline: bool):
+    install_fake_backend(inline)
+    token = generate_token({"UserID": 1, "Username": "bench", "Role": "Admin"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        reports_done = asyncio.Event()
+        latencies = []
+
+        async def sample_health():
+            while not reports_done.is_set():
+                start = time.perf_counter()
+                response = await client.get("/health")
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200
+                await asyncio.sleep(HEALTH_INTERVAL_SECONDS)
+
+        async def fire_reports():
+            await asyncio.gather(*(
+                client.get("/reports/employee-stats", params={"year": 2025}, headers=headers)
+                for _ in range(CONCURRENT_REPORTS)
+            ))
+            reports_done.set()
+
+        start = time.perf_counter()
+        await asyncio.gather(sample_health(), fire_reports())
+        elapsed = time.perf_counter() - start
+
+    mode = "inline (legacy)" if inline else "executor"
+    print(f"mode:                {mode}")
+    print(f"reports in flight:   {CONCURRENT_REPORTS} x {HEAVY_QUERY_SECONDS}s queries")
+    print(f"wall time:           {elapsed:.2f}s")
+    print(f"/health samples:     {len(latencies)}")
+    print(f"/health p50:         {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"/health p99:         {percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"/health max:         {max(latencies) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--inline", action="store_true",
+                        help="run driver calls on the event loop (pre-executor behaviour)")
+    args = parser.parse_args()
+    asyncio.run(run(args.inline))
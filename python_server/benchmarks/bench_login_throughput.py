@@ -0,0 +1,107 @@
+"""
+Benchmark: login throughput and /health latency during a login burst.
+
+Fires CONCURRENT_LOGINS requests at /auth/login-json for a user whose stored
+password is a real bcrypt hash at BCRYPT_ROUNDS, and samples /health latency
+the whole time, counting from when each probe was due. The user lookup is
+replaced by an in-memory row, so the benchmark measures where the bcrypt work
+runs rather than how fast MySQL is.
+
+Run from the python_server directory:
+
+    python -m benchmarks.bench_login_throughput
+    python -m benchmarks.bench_login_throughput --inline   # legacy behaviour
+
+`--inline` runs bcrypt directly on the event loop, which is how the login
+route behaved before it used the password pool. Logins beyond
+PASSWORD_HASH_MAX_PENDING are shed with 429 and counted separately.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+import routes.auth_route as auth_route  # noqa: E402
+from benchmarks.bench_health_latency import InlineExecutor, percentile  # noqa: E402
+from main import app  # noqa: E402
+from utils.passwords import _hash, password_hasher  # noqa: E402
+
+CONCURRENT_LOGINS = 24
+HEALTH_INTERVAL_SECONDS = 0.01
+PASSWORD = "bench-password"
+
+
+def install_fake_backend(inline: bool):
+    if inline:
+        password_hasher._executor = InlineExecutor()
+
+    user = {"UserID": 1, "Username": "bench", "Role": "Admin", "Status": 1,
+            "Password": _hash(PASSWORD, password_hasher.rounds)}
+
+    async def fake_query(query, params=None):
+        if query.lstrip().startswith("SELECT"):
+            return [dict(user)]
+        return []
+    auth_route.execute_mysql_query = fake_query
+
+
+async def run(inline: bool):
+    install_fake_backend(inline)
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        logins_done = asyncio.Event()
+        latencies = []
+        statuses = []
+
+        async def sample_health():
+            # Latency counts from when the probe was due, so time the loop
+            # spends stuck in bcrypt before the probe even starts is included
+            due = time.perf_counter()
+            while not logins_done.is_set():
+                response = await client.get("/health")
+                latencies.append(time.perf_counter() - due)
+                assert response.status_code == 200
+                due = time.perf_counter() + HEALTH_INTERVAL_SECONDS
+                await asyncio.sleep(HEALTH_INTERVAL_SECONDS)
+
+        async def login():
+            response = await client.post(
+                "/auth/login-json", json={"username": "bench", "password": PASSWORD})
+            statuses.append(response.status_code)
+
+        async def fire_logins():
+            # Let the sampler take a baseline first
+            await asyncio.sleep(0.05)
+            await asyncio.gather(*(login() for _ in range(CONCURRENT_LOGINS)))
+            logins_done.set()
+
+        start = time.perf_counter()
+        await asyncio.gather(sample_health(), fire_logins())
+        elapsed = time.perf_counter() - start
+
+    succeeded = statuses.count(200)
+    mode = "inline (legacy)" if inline else "password pool"
+    print(f"mode:                {mode}")
+    print(f"bcrypt rounds:       {password_hasher.rounds}")
+    print(f"logins:              {CONCURRENT_LOGINS} concurrent, {succeeded} ok, "
+          f"{statuses.count(429)} shed (429)")
+    print(f"wall time:           {elapsed:.2f}s")
+    print(f"logins/second:       {succeeded / elapsed:.1f}")
+    print(f"/health samples:     {len(latencies)}")
+    print(f"/health p50:         {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"/health p99:         {percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"/health max:         {max(latencies) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--inline", action="store_true",
+                        help="run bcrypt on the event loop (pre-pool behaviour)")
+    args = parser.parse_args()
+    asyncio.run(run(args.inline))
@@ -0,0 +1,113 @@
+"""
+Benchmark: materializing and serializing a large result set.
+
+Builds ROWS attendance-shaped row tuples (what the drivers hand back) and
+times turning them into a JSON response body in each layout:
+
+    legacy         dict per row, returned as a dict so FastAPI runs
+                   jsonable_encoder before serializing (original behaviour)
+    objects        dict per row, serialized by FastJSONResponse
+    rows           RowSet tuples, serialized by FastJSONResponse
+    columns        per-column arrays, serialized by FastJSONResponse
+
+Run from the python_server directory:
+
+    python -m benchmarks.bench_row_materialization
+    python -m benchmarks.bench_row_materialization --rows 10000 --repeat 5
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, time as clock_time, timedelta
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from utils.db import RowSet  # noqa: E402
+from utils.responses import rowset_response  # noqa: E402
+
+ROWS = 100_000
+REPEAT = 3
+
+COLUMNS = ["AttendanceID", "EmployeeID", "EmployeeName", "Department", "Date",
+           "CheckIn", "CheckOut", "Status", "WorkHours", "LateMinutes", "Overtime"]
+
+
+def make_rows(count):
+    """Row tuples like pyodbc returns for /attendance/daily"""
+    rng = random.Random(42)
+    start = date(2025, 3, 1)
+    statuses = ("Present", "Absent", "Leave")
+    rows = []
+    for i in range(count):
+        day = start + timedelta(days=i % 31)
+        check_in = datetime.combine(day, clock_time(8, rng.randint(0, 59)))
+        rows.append((
+            i + 1,
+            f"E{i % 3000:04d}",
+            f"Employee {i % 3000}",
+            f"Department {i % 12}",
+            day,
+            check_in,
+            check_in + timedelta(hours=8, minutes=rng.randint(0, 90)),
+            statuses[i % 3],
+            Decimal(f"{rng.randint(6, 10)}.{rng.randint(0, 99):02d}"),
+            rng.randint(0, 30),
+            Decimal(f"{rng.randint(0, 3)}.50"),
+        ))
+    return rows
+
+
+def legacy(columns, rows):
+    data = [dict(zip(columns, row)) for row in rows]
+    return JSONResponse(jsonable_encoder({"Status": True, "Data": data})).body
+
+
+def fast(result_format):
+    def run(columns, rows):
+        return rowset_response(RowSet(columns, rows), result_format).body
+    return run
+
+
+def measure(func, columns, rows, repeat):
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        body = func(columns, rows)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(body)
+
+
+def main(count, repeat):
+    rows = make_rows(count)
+    cases = [
+        ("legacy", legacy),
+        ("objects", fast("objects")),
+        ("rows", fast("rows")),
+        ("columns", fast("columns")),
+    ]
+
+    print(f"rows: {count}, best of {repeat}")
+    print(f"{'layout':<10}{'time':>12}{'vs legacy':>12}{'body':>12}")
+    baseline = None
+    for name, func in cases:
+        elapsed, size = measure(func, COLUMNS, rows, repeat)
+        baseline = baseline or elapsed
+        print(f"{name:<10}{elapsed * 1000:>10.1f}ms{baseline / elapsed:>11.1f}x"
+              f"{size / 1024 / 1024:>10.1f}MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
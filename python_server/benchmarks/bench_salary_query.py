@@ -0,0 +1,74 @@
+"""
+Benchmark: the /payroll/salary query, correlated subqueries vs set-based.
+
+Loads generated payroll data (benchmarks/salary_dataset.py) for each
+employee count into SQLite and times one month of the salary list with
+
+    legacy         deductions summed by a correlated subquery, twice per
+                   row, months matched with FORMAT(date, 'yyyy-MM')
+    set-based      utils.payroll_engine: one grouped pass over the month's
+                   deductions with a half-open date range, joined back
+
+SQLite stands in for SQL Server, so absolute times differ; the shape of
+the work (per-row subqueries and unindexable filters vs one range scan)
+is the same. Run from the python_server directory:
+
+    python -m benchmarks.bench_salary_query
+    python -m benchmarks.bench_salary_query --employees 1000 10000 --repeat 5
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.salary_dataset import LEGACY_SALARY_QUERY, build_database, run_query  # noqa: E402
+from utils.payroll_engine import salary_query  # noqa: E402
+
+EMPLOYEES = (1_000, 10_000, 100_000)
+MONTH = "2025-06"
+REPEAT = 3
+
+
+def measure(db, query, params, repeat):
+    best, rows = None, None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        _, rows = run_query(db, query, params)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, rows
+
+
+def main(counts, repeat):
+    query, params = salary_query(MONTH)
+    cases = [
+        ("legacy", LEGACY_SALARY_QUERY, {"Month": MONTH}),
+        ("set-based", query, params),
+    ]
+
+    print(f"month: {MONTH}, best of {repeat}")
+    print(f"{'employees':>10}  {'query':<10}{'time':>12}{'vs legacy':>12}{'rows':>10}")
+    for count in counts:
+        db = build_database(count)
+        baseline, expected = None, None
+        for name, case_query, case_params in cases:
+            elapsed, rows = measure(db, case_query, case_params, repeat)
+            baseline = baseline or elapsed
+            expected = expected or rows
+            if rows != expected:
+                raise SystemExit(f"{name} returned different rows for {count} employees")
+            print(f"{count:>10}  {name:<10}{elapsed * 1000:>10.1f}ms"
+                  f"{baseline / elapsed:>11.1f}x{len(rows):>10}")
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--employees", type=int, nargs="+", default=list(EMPLOYEES))
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    args = parser.parse_args()
+    main(args.employees, args.repeat)
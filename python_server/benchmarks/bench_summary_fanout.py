@@ -0,0 +1,82 @@
+"""
+Benchmark: latency of the multi-query summary endpoints.
+
+Calls /reports/mysql/organization-stats, /reports/mysql/employee-stats and
+/attendance/summary SAMPLES times each. Every database round trip is
+replaced by a ROUND_TRIP_SECONDS sleep, so the benchmark measures how many
+round trips an endpoint waits for one after another, not how fast the
+databases are.
+
+Run from the python_server directory:
+
+    python -m benchmarks.bench_summary_fanout
+    python -m benchmarks.bench_summary_fanout --sequential   # one query at a time
+
+`--sequential` limits each fan-out to one call in flight, which is how the
+report endpoints awaited their queries before utils/fanout.py.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import routes.attendance_route as attendance_route  # noqa: E402
+import routes.reports_route as reports_route  # noqa: E402
+import utils.fanout as fanout  # noqa: E402
+
+SAMPLES = 50
+ROUND_TRIP_SECONDS = 0.04
+
+
+async def slow_query(query, params=None, **kwargs):
+    await asyncio.sleep(ROUND_TRIP_SECONDS)
+    if "GROUPING SETS" in query:
+        return [{"Department": None, "IsOverall": 1, "TotalEmployees": 10,
+                 "TotalPresent": 8, "TotalAbsent": 1, "TotalLate": 1}]
+    return [{"TotalEmployees": 10, "NewHires": 1, "TurnoverRate": 5.0, "AvgSalary": 1000.0,
+             "TotalDepartments": 3, "AvgEmployeesPerDepartment": 3.3, "LargestDepartment": "IT",
+             "SmallestDepartment": "HR", "TotalManagers": 2, "ManagerToEmployeeRatio": 0.2,
+             "AvgTeamSize": 5, "Male": 50.0, "Female": 50.0}]
+
+
+async def measure(call):
+    latencies = []
+    for _ in range(SAMPLES):
+        start = time.perf_counter()
+        await call()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def run(sequential: bool):
+    reports_route.execute_mysql_query = slow_query
+    reports_route.FORCE_DEMO_DATA = False
+    attendance_route.execute_sqlserver_query = slow_query
+    if sequential:
+        fanout.FANOUT_CONCURRENCY = 1
+
+    endpoints = {
+        "/reports/mysql/organization-stats": lambda: reports_route.get_organization_stats_mysql(None),
+        "/reports/mysql/employee-stats": lambda: reports_route.get_employee_stats_mysql(2025, None),
+        "/attendance/summary": lambda: attendance_route.get_attendance_summary(2025, 3),
+    }
+
+    mode = "sequential (legacy)" if sequential else f"fan-out (limit {fanout.FANOUT_CONCURRENCY})"
+    print(f"mode:        {mode}")
+    print(f"round trip:  {ROUND_TRIP_SECONDS * 1000:.0f} ms, {SAMPLES} samples per endpoint")
+    for name, call in endpoints.items():
+        latencies = await measure(call)
+        print(f"{name:36} p50 {statistics.median(latencies) * 1000:6.1f} ms"
+              f"   max {max(latencies) * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sequential", action="store_true",
+                        help="run one query at a time (pre-fan-out behaviour)")
+    args = parser.parse_args()
+    asyncio.run(run(args.sequential))
@@ -0,0 +1,139 @@
+"""
+Generated payroll data for the salary query parity test and benchmark.
+
+Loads Employees, Departments, Positions, Dividends and Deductions into an
+in-memory SQLite database and runs SQL Server salary queries against it.
+The T-SQL is kept as written; `to_sqlite` only strips the database/schema
+prefix and maps ISNULL and FORMAT(date, 'yyyy-MM') to their SQLite
+equivalents. SQLite accepts @Name parameters natively.
+
+LEGACY_SALARY_QUERY is the /payroll/salary query utils.payroll_engine
+replaced, kept as the reference the new query must match.
+"""
+import random
+import re
+import sqlite3
+from datetime import date, datetime, timedelta
+
+LEGACY_SALARY_QUERY = """
+        SELECT
+            d.DividendID,
+            e.EmployeeID,
+            e.FullName,
+            e.Salary as BaseSalary,
+            ISNULL(d.DividendAmount, 0) as Bonus,
+            ISNULL(
+                (SELECT SUM(Amount)
+                 FROM [HUMAN].[dbo].[Deductions]
+                 WHERE EmployeeID = e.EmployeeID
+                 AND CASE
+                     WHEN @Month IS NOT NULL THEN FORMAT(DeductionDate, 'yyyy-MM') = @Month
+                     ELSE 1=1
+                 END),
+                0
+            ) as Deductions,
+            e.Salary + ISNULL(d.DividendAmount, 0) -
+            ISNULL(
+                (SELECT SUM(Amount)
+                 FROM [HUMAN].[dbo].[Deductions]
+                 WHERE EmployeeID = e.EmployeeID
+                 AND CASE
+                     WHEN @Month IS NOT NULL THEN FORMAT(DeductionDate, 'yyyy-MM') = @Month
+                     ELSE 1=1
+                 END),
+                0
+            ) as NetSalary,
+            d.DividendDate as PayDate,
+            dept.DepartmentName,
+            pos.PositionName
+        FROM [HUMAN].[dbo].[Employees] e
+        LEFT JOIN [HUMAN].[dbo].[Dividends] d
+            ON d.EmployeeID = e.EmployeeID
+            AND CASE
+                WHEN @Month IS NOT NULL THEN FORMAT(d.DividendDate, 'yyyy-MM') = @Month
+                ELSE 1=1
+            END
+        JOIN [HUMAN].[dbo].[Departments] dept ON e.DepartmentID = dept.DepartmentID
+        JOIN [HUMAN].[dbo].[Positions] pos ON e.PositionID = pos.PositionID
+    """
+
+SCHEMA = """
+    CREATE TABLE Departments (DepartmentID INTEGER PRIMARY KEY, DepartmentName TEXT);
+    CREATE TABLE Positions (PositionID INTEGER PRIMARY KEY, PositionName TEXT);
+    CREATE TABLE Employees (
+        EmployeeID TEXT PRIMARY KEY, FullName TEXT, Salary INTEGER,
+        DepartmentID INTEGER, PositionID INTEGER);
+    CREATE TABLE Dividends (
+        DividendID INTEGER PRIMARY KEY, EmployeeID TEXT, DividendAmount INTEGER,
+        DividendDate TEXT);
+    CREATE TABLE Deductions (
+        DeductionID INTEGER PRIMARY KEY, EmployeeID TEXT, Amount INTEGER,
+        DeductionDate TEXT);
+    CREATE INDEX IX_Dividends_Employee ON Dividends (EmployeeID, DividendDate);
+    CREATE INDEX IX_Deductions_Employee ON Deductions (EmployeeID, DeductionDate);
+"""
+
+DEPARTMENTS = 12
+POSITIONS = 8
+# Entries are spread over this year, so month filters select about 1/12th
+YEAR = 2025
+
+
+def _random_moment(rng):
+    day = date(YEAR, 1, 1) + timedelta(days=rng.randrange(365))
+    # Mix plain dates with timestamps late on the last day of a month
+    if rng.random() < 0.5:
+        return day.isoformat()
+    return datetime.combine(day, datetime.min.time()).replace(
+        hour=rng.randrange(24), minute=rng.randrange(60)).isoformat(sep=" ")
+
+
+def build_database(employees, seed=42):
+    """In-memory SQLite database with `employees` employees
+
+    Amounts are integers so both queries sum them exactly. Some employees
+    have no dividends or deductions at all.
+    """
+    rng = random.Random(seed)
+    db = sqlite3.connect(":memory:")
+    db.executescript(SCHEMA)
+    db.executemany("INSERT INTO Departments VALUES (?, ?)",
+                   [(i, f"Department {i}") for i in range(1, DEPARTMENTS + 1)])
+    db.executemany("INSERT INTO Positions VALUES (?, ?)",
+                   [(i, f"Position {i}") for i in range(1, POSITIONS + 1)])
+
+    staff, dividends, deductions = [], [], []
+    for i in range(employees):
+        employee_id = f"E{i:06d}"
+        staff.append((employee_id, f"Employee {i}", rng.randrange(800, 5000) * 10,
+                      rng.randint(1, DEPARTMENTS), rng.randint(1, POSITIONS)))
+        for _ in range(rng.choice((0, 1, 2, 3, 4))):
+            dividends.append((employee_id, rng.randrange(50, 500) * 10, _random_moment(rng)))
+        for _ in range(rng.choice((0, 2, 4, 6, 8))):
+            deductions.append((employee_id, rng.randrange(1, 100) * 5, _random_moment(rng)))
+
+    db.executemany("INSERT INTO Employees VALUES (?, ?, ?, ?, ?)", staff)
+    db.executemany("INSERT INTO Dividends (EmployeeID, DividendAmount, DividendDate)"
+                   " VALUES (?, ?, ?)", dividends)
+    db.executemany("INSERT INTO Deductions (EmployeeID, Amount, DeductionDate)"
+                   " VALUES (?, ?, ?)", deductions)
+    db.commit()
+    return db
+
+
+def to_sqlite(query):
+    """The SQLite dialect of a SQL Server salary query"""
+    query = query.replace("[HUMAN].[dbo].", "")
+    query = re.sub(r"FORMAT\(([\w.]+), 'yyyy-MM'\)", r"strftime('%Y-%m', \1)", query)
+    return query.replace("ISNULL(", "IFNULL(")
+
+
+def run_query(db, query, params):
+    """Rows of a SQL Server query as sorted tuples, with its column names"""
+    params = {name: value.isoformat() if isinstance(value, date) else value
+              for name, value in params.items()}
+    cursor = db.execute(to_sqlite(query), params)
+    columns = [column[0] for column in cursor.description]
+    rows = cursor.fetchall()
+    rows.sort(key=lambda row: tuple((value is not None, value) for value in row))
+    return columns, rows
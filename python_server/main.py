@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
@@ -16,14 +17,31 @@ from routes.department_route import department_router
 from routes.attendance_route import attendance_router
 from routes.alerts_route import alerts_router
 from routes.reports_route import reports_router
+from routes.dashboard_route import dashboard_router
 from middleware.auth import verify_token
 from middleware.api_auth import protect_employee_endpoint, protect_payroll_endpoint, admin_only
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the health monitor and report refresher; stop them and close the pools on shutdown"""
+    from utils.db import close_pools
+    from utils.health import health_monitor
+    from routes.reports_route import report_store
+    health_monitor.start()
+    report_store.start()
+    yield
+    await report_store.stop()
+    await health_monitor.stop()
+    await close_pools()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="HR Payroll API",
     description="API for HR and Payroll Management System",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS - Expanded to handle multiple origins and proper credentials
@@ -53,16 +71,24 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    from utils.db import check_mysql_health, check_sqlserver_health
+    """Service health, served from the background monitor's last probes"""
+    from utils.db import sql_server_pool, sql_server_stream_pool, mysql_pool, resilience_stats
+    from utils.cache import cache_stats
+    from utils.health import HEALTHY, SATURATED, health_monitor
+    from utils.passwords import password_hasher
+    from middleware.auth import token_cache
+    from routes.reports_route import report_store
     import time
 
     start_time = time.time()
-    mysql_health = check_mysql_health()
-    sqlserver_health = check_sqlserver_health()
+    mysql_health = health_monitor.status("mysql")
+    sqlserver_health = health_monitor.status("sqlServer")
     response_time = time.time() - start_time
 
     health = {
-        "status": "healthy" if mysql_health["status"] == "healthy" and sqlserver_health["status"] == "healthy" else "unhealthy",
+        # A saturated pool is busy, not down
+        "status": "healthy" if all(health["status"] in (HEALTHY, SATURATED)
+                                   for health in (mysql_health, sqlserver_health)) else "unhealthy",
         "uptime": time.time(),  # This would be replaced with actual uptime in a real app
         "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
         "responseTime": response_time,
@@ -70,11 +96,26 @@ async def health_check():
             "mysql": mysql_health,
             "sqlServer": sqlserver_health
         },
+        "monitor": {
+            "running": health_monitor.running,
+            "intervalSeconds": health_monitor.interval
+        },
+        "pools": {
+            "mysql": mysql_pool.stats() if mysql_pool else None,
+            "sqlServer": sql_server_pool.stats(),
+            "sqlServerStream": sql_server_stream_pool.stats()
+        },
+        "resilience": resilience_stats(),
+        "caches": cache_stats(),
+        "passwords": password_hasher.stats(),
+        "tokens": token_cache.stats(),
+        "reports": report_store.stats(),
         "environment": os.getenv("ENV", "development")
     }
 
     return health
 
+
 # Include routers with prefix
 app.include_router(auth_router, prefix="/auth", tags=["Authentication"])
 app.include_router(employee_router, prefix="/employees", tags=["Employees"])
@@ -87,6 +128,8 @@ app.include_router(alerts_router, prefix="/alerts",
                    tags=["Alerts"], dependencies=[Depends(verify_token)])
 app.include_router(reports_router, prefix="/reports",
                    tags=["Reports"], dependencies=[Depends(verify_token)])
+app.include_router(dashboard_router, prefix="/dashboard",
+                   tags=["Dashboard"], dependencies=[Depends(verify_token)])
 
 # Run the app
 if __name__ == "__main__":
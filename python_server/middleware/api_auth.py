@@ -1,7 +1,7 @@
-from fastapi import Request, HTTPException, Depends
-from typing import Callable, List, Dict, Any
+from fastapi import Request, HTTPException
 import logging
-from .auth import verify_token, Roles
+from .auth import (ADMIN_AREA, ALLOW, EMPLOYEE_DATA, PAYROLL_DATA, ROLE_PERMISSIONS, SELF_ONLY,
+                   resolve_auth)
 
 # Configure logging
 logger = logging.getLogger("api_auth")
@@ -16,104 +16,59 @@ class RoleBasedAccessControl:
     - HR Manager → Can manage employee data from HUMAN_2025 but cannot modify payroll
     - Payroll Manager → Can manage payroll data from PAYROLL but cannot modify employee data
     - Employee → Can only view their own personal information & salary
+
+    The rules come from ROLE_PERMISSIONS, compiled once into
+    PERMISSION_MATRIX; the token is verified once per request (resolve_auth).
     """
 
     @staticmethod
-    async def verify_employee_data_access(request: Request, employee_id: str = None):
-        """Verify access to employee data based on role"""
-        await verify_token(request)
-        user_role = request.state.role
-        user_id = request.state.id
-
-        # Admin has full access
-        if user_role == Roles.ADMIN:
-            return True
+    async def _authorize(request: Request, resource: str, employee_id: str, self_message: str):
+        """Apply the precompiled role matrix to the request's auth context"""
+        context = await resolve_auth(request)
+        decision = context.access(resource, read_only=request.method == "GET")
 
-        # HR Manager can access all employee data
-        if user_role == Roles.HR_MANAGER:
+        if decision == ALLOW:
             return True
 
-        # Payroll Manager can view employee data but not modify
-        if user_role == Roles.PAYROLL_MANAGER:
-            # Check if this is a GET request (view only)
-            if request.method != "GET":
-                raise HTTPException(
-                    status_code=403,
-                    detail={
-                        "Status": False, "Message": "Payroll Manager cannot modify employee data"}
-                )
-            return True
-
-        # Employees can only access their own data
-        if user_role == Roles.EMPLOYEE:
+        if decision == SELF_ONLY:
             # If employee_id is provided, check if it matches the user's ID
-            if employee_id and str(user_id) != employee_id:
+            if employee_id and str(context.id) != employee_id:
                 raise HTTPException(
                     status_code=403,
-                    detail={"Status": False,
-                            "Message": "You can only access your own data"}
+                    detail={"Status": False, "Message": self_message}
                 )
 
-            # For employee list endpoints, restrict to only return their own data
+            # For list endpoints, restrict to only return their own data
             request.state.self_only = True
+            return True
 
-        return True
+        if context.role not in ROLE_PERMISSIONS:
+            message = f"Access denied for role: {context.role}"
+        elif resource == ADMIN_AREA:
+            message = "Only Admin can access this endpoint"
+        else:
+            message = f"{context.role} cannot modify {resource} data"
+        raise HTTPException(
+            status_code=403,
+            detail={"Status": False, "Message": message}
+        )
+
+    @staticmethod
+    async def verify_employee_data_access(request: Request, employee_id: str = None):
+        """Verify access to employee data based on role"""
+        return await RoleBasedAccessControl._authorize(
+            request, EMPLOYEE_DATA, employee_id, "You can only access your own data")
 
     @staticmethod
     async def verify_payroll_data_access(request: Request, employee_id: str = None):
         """Verify access to payroll data based on role"""
-        await verify_token(request)
-        user_role = request.state.role
-        user_id = request.state.id
-
-        # Admin has full access
-        if user_role == Roles.ADMIN:
-            return True
-
-        # Payroll Manager can access all payroll data
-        if user_role == Roles.PAYROLL_MANAGER:
-            return True
-
-        # HR Manager can view payroll data but not modify
-        if user_role == Roles.HR_MANAGER:
-            # Check if this is a GET request (view only)
-            if request.method != "GET":
-                raise HTTPException(
-                    status_code=403,
-                    detail={"Status": False,
-                            "Message": "HR Manager cannot modify payroll data"}
-                )
-            return True
-
-        # Employees can only access their own payroll data
-        if user_role == Roles.EMPLOYEE:
-            # If employee_id is provided, check if it matches the user's ID
-            if employee_id and str(user_id) != employee_id:
-                raise HTTPException(
-                    status_code=403,
-                    detail={
-                        "Status": False, "Message": "You can only access your own payroll data"}
-                )
-
-            # For payroll list endpoints, restrict to only return their own data
-            request.state.self_only = True
-
-        return True
+        return await RoleBasedAccessControl._authorize(
+            request, PAYROLL_DATA, employee_id, "You can only access your own payroll data")
 
     @staticmethod
     async def admin_only(request: Request):
         """Allow only Admins to access"""
-        await verify_token(request)
-        user_role = request.state.role
-
-        if user_role != Roles.ADMIN:
-            raise HTTPException(
-                status_code=403,
-                detail={"Status": False,
-                        "Message": "Only Admin can access this endpoint"}
-            )
-
-        return True
+        return await RoleBasedAccessControl._authorize(request, ADMIN_AREA, None, "")
 
 # Factory functions for dependency injection
 
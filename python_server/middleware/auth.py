@@ -1,17 +1,17 @@
+import hashlib
 import jwt
 import os
 import time
+from collections import OrderedDict
 from fastapi import Request, HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, NamedTuple, Optional, List, Tuple, Union
 import logging
+from utils.cache import CACHE_BACKEND, USER_TAG_PREFIX, Cache, create_cache, invalidation_bus
 
 # Configure logging
 logger = logging.getLogger("auth")
 
-# Token cache to minimize repeated decoding
-token_cache = {}
-
 # Security scheme for JWT
 security = HTTPBearer()
 
@@ -19,6 +19,15 @@ security = HTTPBearer()
 JWT_SECRET = os.getenv("JWT_SECRET", "your-secret-key")
 JWT_ALGORITHM = "HS256"
 
+# Token cache settings
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+# Seconds a decoded token is reused before its signature is checked again
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+TOKEN_CACHE_SWEEP_INTERVAL = float(os.getenv("TOKEN_CACHE_SWEEP_INTERVAL", "60"))
+# Longest a token can live (ACCESS_TOKEN_EXPIRE_MINUTES in routes/auth_route.py);
+# a shared user revocation is kept this long
+TOKEN_MAX_LIFETIME = float(os.getenv("TOKEN_MAX_LIFETIME", str(50000 * 60)))
+
 # Role definitions
 
 
@@ -38,6 +47,7 @@ ROLE_PERMISSIONS = {
         "can_manage_employees": True,  # Can add, update, delete employees
         "can_view_employees": True,     # Can view employee data
         "can_manage_departments": True,  # Can manage departments
+        "can_view_payroll": True,       # Can view payroll data
         "cannot_manage_payroll": True,  # Cannot modify payroll data
     },
     Roles.PAYROLL_MANAGER: {
@@ -51,33 +61,267 @@ ROLE_PERMISSIONS = {
 }
 
 
-def verify_and_decode_token(token: str) -> Dict[str, Any]:
-    """Verify and decode JWT token with caching"""
-    # Check cache first
-    if token in token_cache:
-        cached_data = token_cache[token]
-        # Check token expiry in cache
-        if cached_data["expiry"] > time.time():
-            return {"valid": True, "decoded": cached_data["decoded"]}
-        else:
-            # Remove expired token from cache
-            del token_cache[token]
+# Data guarded by middleware.api_auth.RoleBasedAccessControl
+EMPLOYEE_DATA = "employee"
+PAYROLL_DATA = "payroll"
+ADMIN_AREA = "admin"
 
-    try:
-        # Decode token
+# Access decisions
+ALLOW = "allow"
+SELF_ONLY = "self"  # only the caller's own records
+DENY = "deny"
+
+_RESOURCE_FLAGS = {
+    # resource: (flag allowing changes, flag allowing reads)
+    EMPLOYEE_DATA: ("can_manage_employees", "can_view_employees"),
+    PAYROLL_DATA: ("can_manage_payroll", "can_view_payroll"),
+    ADMIN_AREA: (None, None),
+}
+
+
+def compile_permissions(role_permissions: Dict[str, Dict[str, bool]]) -> Dict[Tuple[str, str, bool], str]:
+    """
+    Flatten ROLE_PERMISSIONS into (role, resource, read_only) -> decision
+
+    Done once at import, so a permission check is a single dict lookup.
+    Roles that are not listed have no entry and are denied.
+    """
+    matrix = {}
+    for role, flags in role_permissions.items():
+        for resource, (manage_flag, view_flag) in _RESOURCE_FLAGS.items():
+            for read_only in (True, False):
+                if (flags.get("can_access_all") or flags.get(manage_flag)
+                        or (read_only and flags.get(view_flag))):
+                    decision = ALLOW
+                elif flags.get("can_view_self") and resource != ADMIN_AREA:
+                    decision = SELF_ONLY
+                else:
+                    decision = DENY
+                matrix[(role, resource, read_only)] = decision
+    return matrix
+
+
+PERMISSION_MATRIX = compile_permissions(ROLE_PERMISSIONS)
+
+
+class AuthContext(NamedTuple):
+    """The authenticated caller, resolved once per request"""
+    user: Dict[str, Any]
+    id: Any
+    role: Optional[str]
+
+    def access(self, resource: str, read_only: bool) -> str:
+        return PERMISSION_MATRIX.get((self.role, resource, read_only), DENY)
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of decoded tokens, with revocation
+
+    Entries are keyed by the SHA-256 digest of the token, so a long token
+    costs 32 bytes of key and raw tokens are not kept in memory. An entry
+    lives for TOKEN_CACHE_TTL seconds or until the token expires, whichever
+    is sooner; the least recently used entries go once the cache is full,
+    and expired ones are swept every TOKEN_CACHE_SWEEP_INTERVAL seconds.
+
+    `revoke_token` rejects one token from then on (logout), `revoke_user`
+    every token issued to a user so far (role or status changes). Revoked
+    tokens are remembered until they expire and revoked users as one
+    timestamp each.
+
+    These revocations are per-process. With several workers, give the cache
+    a `shared` Cache (CACHE_BACKEND=redis does): `share_token_revocation`
+    and `share_user_revocation` record a revocation there, and
+    `verify_shared` checks it on every request, so a token or user revoked
+    in one worker is rejected by all of them.
+    """
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_MAX_ENTRIES, ttl: float = TOKEN_CACHE_TTL,
+                 sweep_interval: float = TOKEN_CACHE_SWEEP_INTERVAL, shared: Optional[Cache] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._entries = OrderedDict()
+        # Revoked token digest -> token expiry (epoch seconds)
+        self._revoked_tokens: Dict[bytes, float] = {}
+        # User ID -> tokens issued before this time (epoch seconds) are revoked
+        self._revoked_users: Dict[str, float] = {}
+        self.shared = shared
+        self._last_sweep = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rejected = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def _is_revoked(self, key: bytes, decoded: Dict[str, Any]) -> bool:
+        if key in self._revoked_tokens:
+            return True
+        revoked_at = self._revoked_users.get(str(decoded.get("id")))
+        return revoked_at is not None and decoded.get("iat", 0) < revoked_at
+
+    def _maybe_sweep(self):
+        now = time.monotonic()
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        expired = [key for key, (_, expires_at) in self._entries.items() if now >= expires_at]
+        for key in expired:
+            del self._entries[key]
+        self.expirations += len(expired)
+        wall_now = time.time()
+        for key in [key for key, exp in self._revoked_tokens.items() if exp <= wall_now]:
+            del self._revoked_tokens[key]
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """Decoded claims of a valid, unrevoked token; raises jwt.InvalidTokenError"""
+        self._maybe_sweep()
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is not None:
+            decoded, expires_at = entry
+            if time.monotonic() < expires_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return decoded
+            del self._entries[key]
+            self.expirations += 1
+
+        self.misses += 1
         decoded = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        if self._is_revoked(key, decoded):
+            self.rejected += 1
+            raise jwt.InvalidTokenError("Token has been revoked")
+
+        ttl = self.ttl
+        if "exp" in decoded:
+            ttl = min(ttl, decoded["exp"] - time.time())
+        if ttl > 0:
+            self._entries[key] = (decoded, time.monotonic() + ttl)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return decoded
+
+    async def verify_shared(self, token: str) -> Dict[str, Any]:
+        """`verify`, also rejecting tokens revoked by other workers"""
+        decoded = self.verify(token)
+        if self.shared is None:
+            return decoded
+        key = self._key(token)
+        user_id = str(decoded.get("id"))
+        # Remembered here too, so the next request needs no lookup
+        if await self.shared.get(f"token:{key.hex()}"):
+            self._revoked_tokens[key] = decoded.get("exp", time.time() + self.ttl)
+        revoked_at = await self.shared.get(f"user:{user_id}")
+        if revoked_at is not None:
+            self._revoked_users[user_id] = max(revoked_at, self._revoked_users.get(user_id, 0))
+        if self._is_revoked(key, decoded):
+            self._entries.pop(key, None)
+            self.rejected += 1
+            raise jwt.InvalidTokenError("Token has been revoked")
+        return decoded
+
+    def _expiry(self, token: str) -> Optional[float]:
+        try:
+            # Only the expiry is needed, to know how long to remember it
+            claims = jwt.decode(token, options={"verify_signature": False})
+        except jwt.InvalidTokenError:
+            return None
+        return claims.get("exp", time.time() + self.ttl)
+
+    def revoke_token(self, token: str):
+        """Reject `token` from now on"""
+        key = self._key(token)
+        self._entries.pop(key, None)
+        expiry = self._expiry(token)
+        if expiry is not None:
+            self._revoked_tokens[key] = expiry
+
+    async def share_token_revocation(self, token: str):
+        """Record a revocation in the shared store, for the other workers"""
+        expiry = self._expiry(token)
+        if self.shared is None or expiry is None:
+            return
+        await self.shared.set(f"token:{self._key(token).hex()}", True, ttl=max(expiry - time.time(), 1))
+
+    def revoke_user(self, user_id):
+        """Reject every token issued to `user_id` until now"""
+        self._revoked_users[str(user_id)] = time.time()
+        for key in [key for key, (decoded, _) in self._entries.items()
+                    if str(decoded.get("id")) == str(user_id)]:
+            del self._entries[key]
+
+    async def share_user_revocation(self, user_id):
+        """Record a user revocation in the shared store, for the other workers"""
+        revoked_at = self._revoked_users.get(str(user_id))
+        if self.shared is None or revoked_at is None:
+            return
+        await self.shared.set(f"user:{user_id}", revoked_at, ttl=TOKEN_MAX_LIFETIME)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxEntries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "rejected": self.rejected,
+            "revokedTokens": len(self._revoked_tokens),
+            "revokedUsers": len(self._revoked_users),
+        }
+
+
+# Revocations reach every worker only through a shared backend; with the
+# memory backend each process keeps its own
+token_revocations = create_cache("token_revocations", TOKEN_CACHE_TTL) if CACHE_BACKEND == "redis" else None
+
+# Token cache to minimize repeated decoding
+token_cache = TokenCache(shared=token_revocations)
 
-        # Save to cache with expiry
-        expiry = decoded.get("exp", time.time() + 3600)  # Default 1 hour
-        token_cache[token] = {"decoded": decoded, "expiry": expiry}
 
-        return {"valid": True, "decoded": decoded}
+async def verify_and_decode_token(token: str) -> Dict[str, Any]:
+    """Verify and decode JWT token with caching"""
+    try:
+        return {"valid": True, "decoded": await token_cache.verify_shared(token)}
     except jwt.ExpiredSignatureError:
         return {"valid": False, "error": "Token has expired"}
     except jwt.InvalidTokenError as e:
         return {"valid": False, "error": f"Invalid token: {str(e)}"}
 
 
+async def revoke_token(token: str):
+    """Revocation hook for logout: the token stops working immediately"""
+    token_cache.revoke_token(token)
+    await token_cache.share_token_revocation(token)
+
+
+async def revoke_user_tokens(user_id):
+    """Revocation hook for role or status changes: the user must log in again"""
+    token_cache.revoke_user(user_id)
+    await token_cache.share_user_revocation(user_id)
+
+
+async def _revoke_published_users(tags):
+    for tag in tags:
+        if tag.startswith(USER_TAG_PREFIX):
+            await revoke_user_tokens(tag[len(USER_TAG_PREFIX):])
+
+
+# Publishing user_tag(id) on the invalidation bus revokes that user's tokens
+invalidation_bus.subscribe(_revoke_published_users)
+
+
 def extract_token(request: Request) -> Optional[str]:
     """Extract token from cookies or authorization header"""
     # Check cookies first
@@ -92,33 +336,51 @@ def extract_token(request: Request) -> Optional[str]:
     return token
 
 
-async def verify_token(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Verify access token middleware"""
-    try:
-        # Use token from Authorization header (provided by the HTTPBearer dependency)
-        token = getattr(credentials, 'credentials', None)
+async def resolve_auth(request: Request, token: Optional[str] = None) -> AuthContext:
+    """
+    Authenticate the request, once
 
-        # Alternative: Extract token from cookies if needed
-        if not token:
-            token = extract_token(request)
+    Routers and routes stack several auth dependencies; the first one to run
+    verifies the token and stores the result on request.state.auth, and the
+    others reuse it.
+    """
+    context = getattr(request.state, "auth", None)
+    if context is not None:
+        return context
 
-        if not token:
-            raise HTTPException(status_code=401, detail={
-                                "Status": False, "Message": "Token not found"})
+    # Alternative: Extract token from cookies if needed
+    if not token:
+        token = extract_token(request)
 
-        result = verify_and_decode_token(token)
+    if not token:
+        raise HTTPException(status_code=401, detail={
+                            "Status": False, "Message": "Token not found"})
 
-        if not result["valid"]:
-            logger.error(f"JWT Verification Error: {result.get('error')}")
-            raise HTTPException(status_code=401, detail={
-                                "Status": False, "Message": "Invalid token"})
+    result = await verify_and_decode_token(token)
+
+    if not result["valid"]:
+        logger.error(f"JWT Verification Error: {result.get('error')}")
+        raise HTTPException(status_code=401, detail={
+                            "Status": False, "Message": "Invalid token"})
+
+    decoded = result["decoded"]
+    context = AuthContext(user=decoded, id=decoded.get("id"), role=decoded.get("role"))
+
+    # Add user info to request state
+    request.state.auth = context
+    request.state.user = decoded
+    request.state.role = context.role
+    request.state.id = context.id
+
+    return context
 
-        # Add user info to request state
-        request.state.user = result["decoded"]
-        request.state.role = result["decoded"].get("role")
-        request.state.id = result["decoded"].get("id")
 
-        return result["decoded"]
+async def verify_token(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Verify access token middleware"""
+    try:
+        # Use token from Authorization header (provided by the HTTPBearer dependency)
+        context = await resolve_auth(request, getattr(credentials, 'credentials', None))
+        return context.user
     except Exception as e:
         logger.error(f"Token verification error: {str(e)}")
         raise HTTPException(status_code=401, detail={
@@ -1,86 +0,0 @@
--- Drop existing tables if they exist
-DROP TABLE IF EXISTS attendance;
-DROP TABLE IF EXISTS salaries;
-DROP TABLE IF EXISTS employees;
-DROP TABLE IF EXISTS positions;
-DROP TABLE IF EXISTS departments;
-DROP TABLE IF EXISTS users;
-
--- Create users table
-CREATE TABLE users (
-    id INT AUTO_INCREMENT PRIMARY KEY,
-    username VARCHAR(50) NOT NULL UNIQUE,
-    password VARCHAR(255) NOT NULL,
-    email VARCHAR(100) UNIQUE,
-    role VARCHAR(20) NOT NULL,
-    status BOOLEAN DEFAULT TRUE,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-);
-
--- Create Departments table
-CREATE TABLE departments (
-    id INT AUTO_INCREMENT PRIMARY KEY,
-    name VARCHAR(100) NOT NULL,
-    description TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-);
-
--- Create Positions table
-CREATE TABLE positions (
-    id INT AUTO_INCREMENT PRIMARY KEY,
-    name VARCHAR(100) NOT NULL,
-    description TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-);
-
--- Create Employees table
-CREATE TABLE employees (
-    id INT AUTO_INCREMENT PRIMARY KEY,
-    employee_code VARCHAR(20) NOT NULL UNIQUE,
-    first_name VARCHAR(50) NOT NULL,
-    last_name VARCHAR(50) NOT NULL,
-    email VARCHAR(100) UNIQUE,
-    phone VARCHAR(20),
-    birth_date DATE,
-    gender VARCHAR(10),
-    department_id INT,
-    position_id INT,
-    hire_date DATE,
-    status VARCHAR(20) DEFAULT 'active',
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    FOREIGN KEY (department_id) REFERENCES departments(id),
-    FOREIGN KEY (position_id) REFERENCES positions(id)
-);
-
--- Create Attendance table
-CREATE TABLE attendance (
-    id INT AUTO_INCREMENT PRIMARY KEY,
-    employee_id INT,
-    check_in DATETIME,
-    check_out DATETIME,
-    status VARCHAR(20),
-    work_hours DECIMAL(5,2),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    FOREIGN KEY (employee_id) REFERENCES employees(id)
-);
-
--- Create Salaries table
-CREATE TABLE salaries (
-    id INT AUTO_INCREMENT PRIMARY KEY,
-    employee_id INT,
-    basic_salary DECIMAL(18,2) NOT NULL,
-    allowance DECIMAL(18,2) DEFAULT 0,
-    bonus DECIMAL(18,2) DEFAULT 0,
-    deduction DECIMAL(18,2) DEFAULT 0,
-    net_salary DECIMAL(18,2),
-    pay_date DATE,
-    status VARCHAR(20) DEFAULT 'pending',
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    FOREIGN KEY (employee_id) REFERENCES employees(id)
-); 
\ No newline at end of file
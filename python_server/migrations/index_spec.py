@@ -0,0 +1,58 @@
+"""
+Indexes the hot query predicates of routes/* rely on
+
+`python -m migrations.run_migrations check` compares each database against
+this list. An existing index satisfies an entry when its key columns start
+with the entry's columns and its key or included columns cover the entry's
+`include` columns, whatever it is called. Add an entry here together with
+the migration that creates the index.
+"""
+from typing import NamedTuple, Tuple
+
+
+class IndexSpec(NamedTuple):
+    table: str
+    name: str
+    columns: Tuple[str, ...]
+    include: Tuple[str, ...] = ()
+    used_by: str = ""
+
+
+MYSQL_INDEXES = [
+    IndexSpec("user", "UX_user_Username", ("Username",),
+              used_by="login, registration, user lookups"),
+    # Created by the foreign key, which InnoDB backs with an index
+    IndexSpec("employee", "DepartmentID", ("DepartmentID",),
+              used_by="reports: employees per department"),
+    IndexSpec("employee", "IX_employee_Status_Salary", ("Status", "Salary"),
+              used_by="reports: salary, structure and gender statistics"),
+]
+
+SQLSERVER_INDEXES = [
+    IndexSpec("PayrollLedger", "PK_PayrollLedger", ("PayrollMonth", "EmployeeID"),
+              used_by="GET /payroll/monthly, ledger refreshes"),
+    IndexSpec("PayrollLedger", "IX_PayrollLedger_Employee", ("EmployeeID", "PayrollMonth"),
+              used_by="salary changes carried into later months"),
+    IndexSpec("Attendance", "IX_Attendance_Date_Employee", ("Date", "EmployeeID"),
+              ("Status", "LateMinutes", "WorkHours"),
+              used_by="attendance daily/monthly/summary, leave violations"),
+    IndexSpec("Attendance", "IX_Attendance_Employee_Date", ("EmployeeID", "Date"),
+              used_by="self-service attendance, joins from Employees"),
+    IndexSpec("Deductions", "IX_Deductions_Employee_Date", ("EmployeeID", "DeductionDate"),
+              ("Amount",), used_by="salary list, monthly payroll, deduction listings"),
+    IndexSpec("Bonuses", "IX_Bonuses_Employee_Date", ("EmployeeID", "BonusDate"),
+              ("BonusAmount",), used_by="monthly payroll, ledger refreshes"),
+    IndexSpec("Dividends", "IX_Dividends_Employee_Date", ("EmployeeID", "DividendDate"),
+              ("DividendAmount",), used_by="salary list, salary history"),
+    IndexSpec("Allowances", "IX_Allowances_Employee_Date", ("EmployeeID", "AllowanceDate"),
+              ("Amount",), used_by="allowance listings, ledger refreshes"),
+    IndexSpec("Employees", "IX_Employees_Department_Status", ("DepartmentID", "Status"),
+              used_by="GET /employees/list filters, department head counts"),
+    IndexSpec("Employees", "IX_Employees_Status", ("Status",), ("Salary",),
+              used_by="reports: active-employee payroll statistics"),
+]
+
+INDEXES = {
+    "mysql": MYSQL_INDEXES,
+    "sqlserver": SQLSERVER_INDEXES,
+}
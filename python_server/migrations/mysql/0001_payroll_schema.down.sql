@@ -0,0 +1,5 @@
+-- Drops the payroll schema and its data; children first for the foreign keys
+DROP TABLE IF EXISTS employee;
+DROP TABLE IF EXISTS position;
+DROP TABLE IF EXISTS department;
+DROP TABLE IF EXISTS user;
@@ -0,0 +1,53 @@
+-- Payroll schema as the routes query it (user, department, position, employee)
+CREATE TABLE IF NOT EXISTS user (
+    UserID INT AUTO_INCREMENT PRIMARY KEY,
+    Username VARCHAR(50) NOT NULL,
+    Password VARCHAR(255) NOT NULL,
+    Email VARCHAR(100),
+    Role VARCHAR(50) NOT NULL DEFAULT 'Employee',
+    Status BOOLEAN NOT NULL DEFAULT 1,
+    CreatedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UpdatedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    LastLoginAt TIMESTAMP NULL,
+    UNIQUE KEY UX_user_Username (Username),
+    CONSTRAINT CHK_Role CHECK (Role IN ('Admin', 'HR Manager', 'Payroll Manager', 'Employee'))
+);
+
+CREATE TABLE IF NOT EXISTS department (
+    DepartmentID INT AUTO_INCREMENT PRIMARY KEY,
+    DepartmentName VARCHAR(100) NOT NULL,
+    Description TEXT,
+    CreatedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UpdatedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS position (
+    PositionID INT AUTO_INCREMENT PRIMARY KEY,
+    PositionName VARCHAR(100) NOT NULL,
+    Description TEXT,
+    DepartmentID INT,
+    CreatedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UpdatedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (DepartmentID) REFERENCES department(DepartmentID)
+);
+
+CREATE TABLE IF NOT EXISTS employee (
+    EmployeeID INT AUTO_INCREMENT PRIMARY KEY,
+    FirstName VARCHAR(50) NOT NULL,
+    LastName VARCHAR(50) NOT NULL,
+    Gender ENUM('Male', 'Female', 'Other') DEFAULT 'Male',
+    DateOfBirth DATE,
+    Email VARCHAR(100),
+    Phone VARCHAR(20),
+    Address TEXT,
+    PositionID INT,
+    DepartmentID INT,
+    JoinDate DATE DEFAULT (CURRENT_DATE),
+    EndDate DATE,
+    Salary DECIMAL(15, 2) DEFAULT 0,
+    Status ENUM('Active', 'Inactive', 'On Leave') DEFAULT 'Active',
+    CreatedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UpdatedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (PositionID) REFERENCES `position`(PositionID),
+    FOREIGN KEY (DepartmentID) REFERENCES department(DepartmentID)
+);
@@ -0,0 +1,2 @@
+-- A missing index is skipped by the runner (error 1091)
+DROP INDEX IX_employee_Status_Salary ON employee;
@@ -0,0 +1,7 @@
+-- Indexes for the employee predicates of the report endpoints. Joins on
+-- DepartmentID/PositionID use the indexes behind the foreign keys.
+-- MySQL has no CREATE INDEX IF NOT EXISTS; the runner skips indexes that
+-- already exist (error 1061), so this file can be re-applied.
+
+-- Active-employee payroll, structure and gender reports
+CREATE INDEX IX_employee_Status_Salary ON employee (Status, Salary);
@@ -0,0 +1,390 @@
+"""
+Versioned schema migrations for the MySQL payroll and SQL Server HUMAN databases
+
+Each database has a directory of numbered script pairs,
+migrations/<database>/NNNN_name.up.sql and NNNN_name.down.sql. Applied
+versions are recorded in the database itself (schema_migrations in MySQL,
+[HUMAN].[dbo].[SchemaMigrations] in SQL Server), so `apply` runs only what
+is pending and `rollback` undoes the most recent versions. Scripts guard
+every change with IF [NOT] EXISTS (in MySQL, the runner skips duplicate or
+missing index errors instead), so a migration that failed halfway can be
+applied again.
+
+Run from the python_server directory:
+
+    python -m migrations.run_migrations status
+    python -m migrations.run_migrations apply [--db mysql|sqlserver] [--to VERSION]
+    python -m migrations.run_migrations rollback --db sqlserver [--steps N | --to VERSION]
+    python -m migrations.run_migrations check [--db mysql|sqlserver]
+
+`check` exits with status 1 if a migration is pending or an index declared
+in migrations/index_spec.py is missing.
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from mysql.connector import Error as MySQLError
+
+from migrations.index_spec import INDEXES, IndexSpec
+from utils.db import execute_mysql_query, execute_sqlserver_query
+
+logger = logging.getLogger("migrations")
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+DATABASES = ("mysql", "sqlserver")
+
+# Index builds on large tables outlast the normal query timeout
+MIGRATION_TIMEOUT = float(os.getenv('MIGRATION_TIMEOUT', '600'))
+
+_SCRIPT_NAME = re.compile(r"^(\d{4})_(\w+)\.(up|down)\.sql$")
+_GO_LINE = re.compile(r"^\s*GO\s*$", re.IGNORECASE | re.MULTILINE)
+_STATEMENT_END = re.compile(r";\s*$", re.MULTILINE)
+
+# Existing index on (table, key columns, included columns)
+ExistingIndexes = Dict[str, List[Tuple[Tuple[str, ...], Tuple[str, ...]]]]
+
+
+class Migration:
+    def __init__(self, version: int, name: str, up: str, down: str):
+        self.version = version
+        self.name = name
+        self.up = up
+        self.down = down
+        self.checksum = hashlib.sha256(up.encode("utf-8")).hexdigest()
+
+    def __str__(self):
+        return f"{self.version:04d}_{self.name}"
+
+
+def discover(database: str) -> List[Migration]:
+    """The migrations of a database in version order"""
+    directory = os.path.join(MIGRATIONS_DIR, database)
+    scripts: Dict[int, Dict[str, str]] = {}
+    for file_name in sorted(os.listdir(directory)):
+        match = _SCRIPT_NAME.match(file_name)
+        if not match:
+            continue
+        version, name, direction = int(match[1]), match[2], match[3]
+        entry = scripts.setdefault(version, {"name": name})
+        if entry["name"] != name:
+            raise ValueError(f"{database} migration {version:04d} is named both "
+                             f"'{entry['name']}' and '{name}'")
+        with open(os.path.join(directory, file_name), encoding="utf-8") as script:
+            entry[direction] = script.read()
+
+    migrations = []
+    for version in sorted(scripts):
+        entry = scripts[version]
+        for direction in ("up", "down"):
+            if direction not in entry:
+                raise ValueError(f"{database} migration {version:04d}_{entry['name']} "
+                                 f"has no {direction} script")
+        migrations.append(Migration(version, entry["name"], entry["up"], entry["down"]))
+    return migrations
+
+
+def split_statements(script: str, database: str) -> List[str]:
+    """Statements of a script, one per driver call
+
+    SQL Server scripts are split into batches on GO lines; MySQL scripts on
+    semicolons ending a line, since the connector runs one statement at a
+    time. Comment lines are dropped so each statement starts with its verb.
+    """
+    parts = _GO_LINE.split(script) if database == "sqlserver" else _STATEMENT_END.split(script)
+    statements = []
+    for part in parts:
+        lines = [line for line in part.splitlines() if not line.strip().startswith("--")]
+        statement = "\n".join(lines).strip()
+        if statement:
+            statements.append(statement)
+    return statements
+
+
+class MigrationTarget:
+    """A database the runner migrates: runs scripts and keeps the history"""
+
+    database = ""
+    HISTORY_DDL = ""
+    APPLIED_QUERY = ""
+    RECORD_QUERY = ""
+    FORGET_QUERY = ""
+    INDEX_QUERY = ""
+
+    async def execute(self, statement: str, params=None):
+        raise NotImplementedError
+
+    def _record_params(self, migration: Migration):
+        raise NotImplementedError
+
+    def _forget_params(self, migration: Migration):
+        raise NotImplementedError
+
+    async def run_script(self, script: str):
+        for statement in split_statements(script, self.database):
+            await self.execute(statement)
+
+    async def ensure_history(self):
+        await self.execute(self.HISTORY_DDL)
+
+    async def applied(self) -> Dict[int, str]:
+        """Checksum of each applied version"""
+        rows = await self.execute(self.APPLIED_QUERY)
+        return {row["Version"]: row["Checksum"] for row in rows}
+
+    async def record(self, migration: Migration):
+        await self.execute(self.RECORD_QUERY, self._record_params(migration))
+
+    async def forget(self, migration: Migration):
+        await self.execute(self.FORGET_QUERY, self._forget_params(migration))
+
+    async def indexes(self) -> ExistingIndexes:
+        existing: Dict[Tuple[str, str], Tuple[list, list]] = {}
+        for row in await self.execute(self.INDEX_QUERY):
+            keys, included = existing.setdefault(
+                (row["TableName"].lower(), row["IndexName"]), ([], []))
+            (included if row["IsIncluded"] else keys).append(row["ColumnName"].lower())
+
+        by_table: ExistingIndexes = {}
+        for (table, _), (keys, included) in existing.items():
+            by_table.setdefault(table, []).append((tuple(keys), tuple(included)))
+        return by_table
+
+
+class MySQLTarget(MigrationTarget):
+    database = "mysql"
+
+    HISTORY_DDL = """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            Version INT PRIMARY KEY,
+            Name VARCHAR(200) NOT NULL,
+            Checksum CHAR(64) NOT NULL,
+            AppliedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """
+    APPLIED_QUERY = "SELECT Version, Checksum FROM schema_migrations"
+    RECORD_QUERY = "INSERT INTO schema_migrations (Version, Name, Checksum) VALUES (%s, %s, %s)"
+    FORGET_QUERY = "DELETE FROM schema_migrations WHERE Version = %s"
+    INDEX_QUERY = """
+        SELECT TABLE_NAME AS TableName, INDEX_NAME AS IndexName,
+               COLUMN_NAME AS ColumnName, 0 AS IsIncluded
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+        ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+    """
+
+    # Duplicate key name and can't DROP a missing key: MySQL has no
+    # CREATE/DROP INDEX IF [NOT] EXISTS, so these mean "already done"
+    ALREADY_DONE_ERRNOS = {1061, 1091}
+
+    async def execute(self, statement: str, params=None):
+        try:
+            return await execute_mysql_query(statement, params, timeout=MIGRATION_TIMEOUT)
+        except MySQLError as err:
+            if err.errno not in self.ALREADY_DONE_ERRNOS:
+                raise
+            logger.info(f"Skipped, already applied: {err.msg}")
+            return {"affected_rows": 0}
+
+    def _record_params(self, migration: Migration):
+        return (migration.version, migration.name, migration.checksum)
+
+    def _forget_params(self, migration: Migration):
+        return (migration.version,)
+
+
+class SqlServerTarget(MigrationTarget):
+    database = "sqlserver"
+
+    HISTORY_DDL = """
+        IF OBJECT_ID(N'[HUMAN].[dbo].[SchemaMigrations]', N'U') IS NULL
+            CREATE TABLE [HUMAN].[dbo].[SchemaMigrations] (
+                Version INT NOT NULL PRIMARY KEY,
+                Name NVARCHAR(200) NOT NULL,
+                Checksum CHAR(64) NOT NULL,
+                AppliedAt DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME()
+            )
+    """
+    APPLIED_QUERY = "SELECT Version, Checksum FROM [HUMAN].[dbo].[SchemaMigrations]"
+    RECORD_QUERY = """
+        INSERT INTO [HUMAN].[dbo].[SchemaMigrations] (Version, Name, Checksum)
+        VALUES (@Version, @Name, @Checksum)
+    """
+    FORGET_QUERY = "DELETE FROM [HUMAN].[dbo].[SchemaMigrations] WHERE Version = @Version"
+    INDEX_QUERY = """
+        SELECT t.name AS TableName, i.name AS IndexName,
+               c.name AS ColumnName, ic.is_included_column AS IsIncluded
+        FROM [HUMAN].sys.indexes i
+        JOIN [HUMAN].sys.tables t ON i.object_id = t.object_id
+        JOIN [HUMAN].sys.schemas s ON t.schema_id = s.schema_id
+        JOIN [HUMAN].sys.index_columns ic
+            ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+        JOIN [HUMAN].sys.columns c
+            ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+        WHERE s.name = 'dbo' AND i.name IS NOT NULL
+        ORDER BY t.name, i.name, ic.is_included_column, ic.key_ordinal
+    """
+
+    async def execute(self, statement: str, params=None):
+        return await execute_sqlserver_query(statement, params, timeout=MIGRATION_TIMEOUT)
+
+    def _record_params(self, migration: Migration):
+        return {"Version": migration.version, "Name": migration.name,
+                "Checksum": migration.checksum}
+
+    def _forget_params(self, migration: Migration):
+        return {"Version": migration.version}
+
+
+TARGETS = {
+    "mysql": MySQLTarget,
+    "sqlserver": SqlServerTarget,
+}
+
+
+async def apply(target: MigrationTarget, migrations: List[Migration],
+                to: Optional[int] = None) -> List[Migration]:
+    """Apply pending migrations up to version `to` (default: all)"""
+    await target.ensure_history()
+    applied = await target.applied()
+    done = []
+    for migration in migrations:
+        if to is not None and migration.version > to:
+            break
+        if migration.version in applied:
+            if applied[migration.version] != migration.checksum:
+                logger.warning(f"{target.database} {migration} changed after it was applied")
+            continue
+        logger.info(f"Applying {target.database} {migration}")
+        await target.run_script(migration.up)
+        await target.record(migration)
+        done.append(migration)
+    return done
+
+
+async def rollback(target: MigrationTarget, migrations: List[Migration],
+                   steps: int = 1, to: Optional[int] = None) -> List[Migration]:
+    """Undo the latest `steps` applied migrations, or all above version `to`"""
+    await target.ensure_history()
+    versions = sorted(await target.applied(), reverse=True)
+    versions = [v for v in versions if v > to] if to is not None else versions[:steps]
+
+    known = {migration.version: migration for migration in migrations}
+    done = []
+    for version in versions:
+        migration = known.get(version)
+        if migration is None:
+            raise ValueError(f"{target.database} version {version:04d} is applied "
+                             "but its scripts are missing")
+        logger.info(f"Rolling back {target.database} {migration}")
+        await target.run_script(migration.down)
+        await target.forget(migration)
+        done.append(migration)
+    return done
+
+
+def _satisfies(spec: IndexSpec, keys: Tuple[str, ...], included: Tuple[str, ...]) -> bool:
+    wanted = tuple(column.lower() for column in spec.columns)
+    covered = set(keys) | set(included)
+    return (keys[:len(wanted)] == wanted
+            and all(column.lower() in covered for column in spec.include))
+
+
+def missing_indexes(specs: List[IndexSpec], existing: ExistingIndexes) -> List[IndexSpec]:
+    """Declared indexes no existing index satisfies"""
+    return [spec for spec in specs
+            if not any(_satisfies(spec, keys, included)
+                       for keys, included in existing.get(spec.table.lower(), []))]
+
+
+def migration_states(migrations: List[Migration],
+                     applied: Dict[int, str]) -> List[Tuple[Migration, str]]:
+    """Each migration with its state: applied, pending or changed since applied"""
+    states = []
+    for migration in migrations:
+        if migration.version not in applied:
+            state = "pending"
+        elif applied[migration.version] != migration.checksum:
+            state = "changed"
+        else:
+            state = "applied"
+        states.append((migration, state))
+    return states
+
+
+async def status(target: MigrationTarget, migrations: List[Migration]) -> List[str]:
+    """One line per migration with its state"""
+    await target.ensure_history()
+    applied = await target.applied()
+    lines = [f"{target.database:<10} {str(migration):<32} {state}"
+             for migration, state in migration_states(migrations, applied)]
+    for version in sorted(set(applied) - {migration.version for migration in migrations}):
+        lines.append(f"{target.database:<10} {f'{version:04d} (no scripts)':<32} applied")
+    return lines
+
+
+async def check(target: MigrationTarget, migrations: List[Migration]) -> List[str]:
+    """Problems found: pending migrations and missing declared indexes"""
+    await target.ensure_history()
+    applied = await target.applied()
+    problems = [f"{migration} is pending"
+                for migration, state in migration_states(migrations, applied)
+                if state == "pending"]
+    for spec in missing_indexes(INDEXES[target.database], await target.indexes()):
+        columns = ", ".join(spec.columns)
+        include = f" INCLUDE ({', '.join(spec.include)})" if spec.include else ""
+        problems.append(f"missing index {spec.name} on {spec.table} ({columns}){include}"
+                        f", used by {spec.used_by}")
+    return problems
+
+
+async def main(args) -> int:
+    databases = [args.db] if args.db else list(DATABASES)
+    exit_code = 0
+    for database in databases:
+        target = TARGETS[database]()
+        migrations = discover(database)
+
+        if args.command == "apply":
+            done = await apply(target, migrations, args.to)
+            print(f"{database}: applied {len(done)} migration(s)")
+        elif args.command == "rollback":
+            done = await rollback(target, migrations, args.steps, args.to)
+            print(f"{database}: rolled back {len(done)} migration(s)")
+        elif args.command == "status":
+            for line in await status(target, migrations):
+                print(line)
+        else:
+            problems = await check(target, migrations)
+            for problem in problems:
+                print(f"{database}: {problem}")
+            if problems:
+                exit_code = 1
+            else:
+                print(f"{database}: up to date, all declared indexes present")
+    return exit_code
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("command", choices=("apply", "rollback", "status", "check"))
+    parser.add_argument("--db", choices=DATABASES, help="database to migrate (default: both)")
+    parser.add_argument("--to", type=int, metavar="VERSION",
+                        help="apply up to / roll back to this version")
+    parser.add_argument("--steps", type=int, default=1,
+                        help="migrations to roll back (default 1)")
+    return parser
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = _parser()
+    args = parser.parse_args()
+    if args.command == "rollback" and not args.db:
+        parser.error("rollback needs --db")
+    sys.exit(asyncio.run(main(args)))
@@ -1,69 +1,45 @@
-import mysql.connector
-import os
+import asyncio
 import logging
 
+import mysql.connector
+
+from migrations.run_migrations import MySQLTarget, apply, discover
+from utils.db import MYSQL_CONFIG
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("database_setup")
 
 
-def setup_database():
-    """Setup MySQL database and tables"""
+def create_database(name: str):
+    """Create the MySQL database if it does not exist"""
+    server_config = {key: value for key, value in MYSQL_CONFIG.items() if key != 'database'}
+    connection = mysql.connector.connect(**server_config)
     try:
-        # Connect to MySQL server
-        connection = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password=''
-        )
         cursor = connection.cursor()
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{name}`")
+        cursor.close()
+        logger.info(f"Database '{name}' created or already exists")
+    finally:
+        connection.close()
 
-        # Create database if not exists
-        cursor.execute("CREATE DATABASE IF NOT EXISTS payroll")
-        logger.info("Database 'payroll' created or already exists")
-
-        # Use the database
-        cursor.execute("USE payroll")
-
-        # Create user table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                username VARCHAR(50) NOT NULL UNIQUE,
-                password VARCHAR(255) NOT NULL,
-                email VARCHAR(100) UNIQUE,
-                role VARCHAR(20) NOT NULL,
-                status BOOLEAN DEFAULT TRUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-            )
-        """)
-        logger.info("Table 'users' created or already exists")
 
-        # Create other tables
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS departments (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(100) NOT NULL,
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-            )
-        """)
-        logger.info("Table 'departments' created or already exists")
+def setup_database():
+    """Setup the MySQL database and bring its schema up to date
 
-        # Commit changes
-        connection.commit()
-        logger.info("Database setup completed successfully")
+    Tables and indexes come from the versioned migrations in
+    migrations/mysql (see migrations/run_migrations.py).
+    """
+    try:
+        # Pooled connections are opened lazily, so they see the new database
+        MYSQL_CONFIG['database'] = MYSQL_CONFIG['database'] or 'payroll'
+        create_database(MYSQL_CONFIG['database'])
 
+        applied = asyncio.run(apply(MySQLTarget(), discover("mysql")))
+        logger.info(f"Database setup completed, applied {len(applied)} migration(s)")
     except Exception as e:
         logger.error(f"Error setting up database: {str(e)}")
         raise
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'connection' in locals():
-            connection.close()
 
 
 if __name__ == "__main__":
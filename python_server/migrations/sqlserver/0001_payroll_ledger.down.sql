@@ -0,0 +1,4 @@
+-- Drops the materialized ledger; the source tables are untouched, and
+-- re-applying 0001 followed by a rebuild restores it
+IF OBJECT_ID(N'[HUMAN].[dbo].[PayrollLedger]', N'U') IS NOT NULL
+    DROP TABLE [HUMAN].[dbo].[PayrollLedger];
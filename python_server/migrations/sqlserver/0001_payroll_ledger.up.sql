@@ -0,0 +1,22 @@
+-- Materialized monthly payroll, one row per employee per month.
+-- Maintained by utils/payroll_ledger.py; rebuild a range with
+--   python -m utils.payroll_ledger 2025-01 2025-12
+IF OBJECT_ID(N'[HUMAN].[dbo].[PayrollLedger]', N'U') IS NULL
+BEGIN
+    CREATE TABLE [HUMAN].[dbo].[PayrollLedger] (
+        PayrollMonth DATE NOT NULL,             -- first day of the month
+        EmployeeID NVARCHAR(50) NOT NULL,
+        BaseSalary DECIMAL(18, 2) NOT NULL DEFAULT 0,
+        Bonus DECIMAL(18, 2) NOT NULL DEFAULT 0,
+        Allowances DECIMAL(18, 2) NOT NULL DEFAULT 0,
+        Deductions DECIMAL(18, 2) NOT NULL DEFAULT 0,
+        -- Same definition as the live monthly report: allowances are listed
+        -- but not part of net salary
+        NetSalary AS (BaseSalary + Bonus - Deductions) PERSISTED,
+        UpdatedAt DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME(),
+        CONSTRAINT PK_PayrollLedger PRIMARY KEY (PayrollMonth, EmployeeID)
+    );
+
+    CREATE INDEX IX_PayrollLedger_Employee
+        ON [HUMAN].[dbo].[PayrollLedger] (EmployeeID, PayrollMonth);
+END
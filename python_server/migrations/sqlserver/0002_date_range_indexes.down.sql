@@ -0,0 +1,14 @@
+IF EXISTS (SELECT 1 FROM [HUMAN].sys.indexes
+           WHERE name = N'IX_Bonuses_Employee_Date'
+             AND object_id = OBJECT_ID(N'[HUMAN].[dbo].[Bonuses]'))
+    DROP INDEX IX_Bonuses_Employee_Date ON [HUMAN].[dbo].[Bonuses];
+
+IF EXISTS (SELECT 1 FROM [HUMAN].sys.indexes
+           WHERE name = N'IX_Deductions_Employee_Date'
+             AND object_id = OBJECT_ID(N'[HUMAN].[dbo].[Deductions]'))
+    DROP INDEX IX_Deductions_Employee_Date ON [HUMAN].[dbo].[Deductions];
+
+IF EXISTS (SELECT 1 FROM [HUMAN].sys.indexes
+           WHERE name = N'IX_Attendance_Date_Employee'
+             AND object_id = OBJECT_ID(N'[HUMAN].[dbo].[Attendance]'))
+    DROP INDEX IX_Attendance_Date_Employee ON [HUMAN].[dbo].[Attendance];
@@ -0,0 +1,24 @@
+-- Covering indexes for the month-range filters (see utils/dates.py).
+-- Attendance is searched by date first; payroll entries are read per
+-- employee and month. INCLUDE columns let the reports answer from the
+-- index alone, without key lookups into the base tables.
+IF NOT EXISTS (SELECT 1 FROM [HUMAN].sys.indexes
+               WHERE name = N'IX_Attendance_Date_Employee'
+                 AND object_id = OBJECT_ID(N'[HUMAN].[dbo].[Attendance]'))
+    CREATE INDEX IX_Attendance_Date_Employee
+        ON [HUMAN].[dbo].[Attendance] (Date, EmployeeID)
+        INCLUDE (Status, LateMinutes, WorkHours);
+
+IF NOT EXISTS (SELECT 1 FROM [HUMAN].sys.indexes
+               WHERE name = N'IX_Deductions_Employee_Date'
+                 AND object_id = OBJECT_ID(N'[HUMAN].[dbo].[Deductions]'))
+    CREATE INDEX IX_Deductions_Employee_Date
+        ON [HUMAN].[dbo].[Deductions] (EmployeeID, DeductionDate)
+        INCLUDE (Amount);
+
+IF NOT EXISTS (SELECT 1 FROM [HUMAN].sys.indexes
+               WHERE name = N'IX_Bonuses_Employee_Date'
+                 AND object_id = OBJECT_ID(N'[HUMAN].[dbo].[Bonuses]'))
+    CREATE INDEX IX_Bonuses_Employee_Date
+        ON [HUMAN].[dbo].[Bonuses] (EmployeeID, BonusDate)
+        INCLUDE (BonusAmount);
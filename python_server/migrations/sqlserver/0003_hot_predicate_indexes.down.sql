@@ -0,0 +1,24 @@
+IF EXISTS (SELECT 1 FROM [HUMAN].sys.indexes
+           WHERE name = N'IX_Employees_Status'
+             AND object_id = OBJECT_ID(N'[HUMAN].[dbo].[Employees]'))
+    DROP INDEX IX_Employees_Status ON [HUMAN].[dbo].[Employees];
+
+IF EXISTS (SELECT 1 FROM [HUMAN].sys.indexes
+           WHERE name = N'IX_Employees_Department_Status'
+             AND object_id = OBJECT_ID(N'[HUMAN].[dbo].[Employees]'))
+    DROP INDEX IX_Employees_Department_Status ON [HUMAN].[dbo].[Employees];
+
+IF EXISTS (SELECT 1 FROM [HUMAN].sys.indexes
+           WHERE name = N'IX_Allowances_Employee_Date'
+             AND object_id = OBJECT_ID(N'[HUMAN].[dbo].[Allowances]'))
+    DROP INDEX IX_Allowances_Employee_Date ON [HUMAN].[dbo].[Allowances];
+
+IF EXISTS (SELECT 1 FROM [HUMAN].sys.indexes
+           WHERE name = N'IX_Dividends_Employee_Date'
+             AND object_id = OBJECT_ID(N'[HUMAN].[dbo].[Dividends]'))
+    DROP INDEX IX_Dividends_Employee_Date ON [HUMAN].[dbo].[Dividends];
+
+IF EXISTS (SELECT 1 FROM [HUMAN].sys.indexes
+           WHERE name = N'IX_Attendance_Employee_Date'
+             AND object_id = OBJECT_ID(N'[HUMAN].[dbo].[Attendance]'))
+    DROP INDEX IX_Attendance_Employee_Date ON [HUMAN].[dbo].[Attendance];
@@ -0,0 +1,39 @@
+-- Indexes for the per-employee and per-department predicates of routes/*.
+
+-- Attendance of one employee (self-service views, joins from Employees)
+IF NOT EXISTS (SELECT 1 FROM [HUMAN].sys.indexes
+               WHERE name = N'IX_Attendance_Employee_Date'
+                 AND object_id = OBJECT_ID(N'[HUMAN].[dbo].[Attendance]'))
+    CREATE INDEX IX_Attendance_Employee_Date
+        ON [HUMAN].[dbo].[Attendance] (EmployeeID, Date);
+
+-- Salary history (newest first) and the monthly salary list
+IF NOT EXISTS (SELECT 1 FROM [HUMAN].sys.indexes
+               WHERE name = N'IX_Dividends_Employee_Date'
+                 AND object_id = OBJECT_ID(N'[HUMAN].[dbo].[Dividends]'))
+    CREATE INDEX IX_Dividends_Employee_Date
+        ON [HUMAN].[dbo].[Dividends] (EmployeeID, DividendDate)
+        INCLUDE (DividendAmount);
+
+-- Employee allowance listings and payroll ledger refreshes
+IF NOT EXISTS (SELECT 1 FROM [HUMAN].sys.indexes
+               WHERE name = N'IX_Allowances_Employee_Date'
+                 AND object_id = OBJECT_ID(N'[HUMAN].[dbo].[Allowances]'))
+    CREATE INDEX IX_Allowances_Employee_Date
+        ON [HUMAN].[dbo].[Allowances] (EmployeeID, AllowanceDate)
+        INCLUDE (Amount);
+
+-- Employee list filtered by department/status, department head counts
+IF NOT EXISTS (SELECT 1 FROM [HUMAN].sys.indexes
+               WHERE name = N'IX_Employees_Department_Status'
+                 AND object_id = OBJECT_ID(N'[HUMAN].[dbo].[Employees]'))
+    CREATE INDEX IX_Employees_Department_Status
+        ON [HUMAN].[dbo].[Employees] (DepartmentID, Status);
+
+-- Active-employee payroll reports
+IF NOT EXISTS (SELECT 1 FROM [HUMAN].sys.indexes
+               WHERE name = N'IX_Employees_Status'
+                 AND object_id = OBJECT_ID(N'[HUMAN].[dbo].[Employees]'))
+    CREATE INDEX IX_Employees_Status
+        ON [HUMAN].[dbo].[Employees] (Status)
+        INCLUDE (Salary);
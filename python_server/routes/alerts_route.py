@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List
 from datetime import datetime, timedelta
+from utils.dates import current_month_window, month_params
 from utils.db import execute_sqlserver_query
 from middleware.auth import verify_token
 import logging
@@ -62,25 +63,23 @@ async def get_leave_violations():
             e.EmployeeID,
             e.FullName,
             d.DepartmentName,
-            COUNT(CASE WHEN a.Status = 'Leave' THEN 1 END) as LeaveDays,
-            MONTH(GETDATE()) as Month,
-            YEAR(GETDATE()) as Year
+            COUNT(CASE WHEN a.Status = 'Leave' THEN 1 END) as LeaveDays
         FROM [HUMAN].[dbo].[Employees] e
         JOIN [HUMAN].[dbo].[Departments] d ON e.DepartmentID = d.DepartmentID
         LEFT JOIN [HUMAN].[dbo].[Attendance] a ON e.EmployeeID = a.EmployeeID 
-            AND YEAR(a.Date) = YEAR(GETDATE()) 
-            AND MONTH(a.Date) = MONTH(GETDATE())
+            AND a.Date >= @MonthStart AND a.Date < @MonthEnd
         GROUP BY e.EmployeeID, e.FullName, d.DepartmentName
         HAVING COUNT(CASE WHEN a.Status = 'Leave' THEN 1 END) > 3  -- Assuming 3 days is the limit
         ORDER BY LeaveDays DESC
         """
 
-        results = await execute_sqlserver_query(query)
+        month_start, month_end = current_month_window()
+        results = await execute_sqlserver_query(query, month_params(month_start, month_end))
 
         # Format results
         for result in results:
-            result['Month'] = datetime(
-                result['Year'], result['Month'], 1).strftime('%B %Y')
+            result['Year'] = month_start.year
+            result['Month'] = month_start.strftime('%B %Y')
             result['ExcessDays'] = result['LeaveDays'] - \
                 3  # Assuming 3 days is the limit
 
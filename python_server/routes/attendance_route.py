@@ -1,7 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request
+from typing import List, Optional
 from datetime import datetime
-from utils.db import execute_sqlserver_query
+from utils.dates import month_params, month_window
+from utils.db import execute_sqlserver_query, stream_sqlserver_query
+from utils.export import EXPORT_BATCH_SIZE, check_export_format, export_response
+from utils.responses import STREAM_FORMATS, check_result_format, stream_rowset_response
+from utils.pagination import MAX_PAGE_SIZE, Keyset, fetch_page, wants_page
 from middleware.auth import verify_token
 import logging
 
@@ -11,12 +15,26 @@ logger = logging.getLogger("attendance")
 # Create router
 attendance_router = APIRouter()
 
+# Daily records are paged newest first; AttendanceID breaks ties
+DAILY_ATTENDANCE_KEYSET = Keyset(("Date", "DESC"), ("EmployeeID", "ASC"), ("AttendanceID", "ASC"))
+
 
 @attendance_router.get("/daily/{year}/{month}", dependencies=[Depends(verify_token)])
-async def get_daily_attendance(year: int, month: int):
+async def get_daily_attendance(year: int, month: int = Path(..., ge=1, le=12),
+                               result_format: str = Query("objects", alias="format"),
+                               page_size: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                               cursor: Optional[str] = None,
+                               include_total: bool = False):
     """
     Get daily attendance records for a specific month
+
+    `format` selects the response layout: objects (default), rows, columns
+    or ndjson. Every layout but columns is streamed as rows are fetched.
+    Pass `page_size` (and the returned `NextCursor` as `cursor`) to page
+    through the month by date, newest first; `include_total` adds the count.
     """
+    check_result_format(result_format, STREAM_FORMATS)
+    paged = wants_page(DAILY_ATTENDANCE_KEYSET, page_size, cursor, result_format)
     try:
         logger.info(f"Getting daily attendance for {year}-{month}")
 
@@ -36,12 +54,17 @@ async def get_daily_attendance(year: int, month: int):
         FROM [HUMAN].[dbo].[Attendance] a
         JOIN [HUMAN].[dbo].[Employees] e ON a.EmployeeID = e.EmployeeID
         JOIN [HUMAN].[dbo].[Departments] d ON e.DepartmentID = d.DepartmentID
-        WHERE YEAR(a.Date) = @Year AND MONTH(a.Date) = @Month
-        ORDER BY a.Date DESC, a.EmployeeID
+        WHERE a.Date >= @MonthStart AND a.Date < @MonthEnd
         """
+        params = month_params(*month_window(year, month))
 
-        results = await execute_sqlserver_query(query, {"Year": year, "Month": month})
-        return {"Status": True, "Data": results}
+        if paged:
+            return await fetch_page(query, params, DAILY_ATTENDANCE_KEYSET, page_size,
+                                    cursor, include_total, result_format)
+
+        query += " ORDER BY a.Date DESC, a.EmployeeID"
+        batches = stream_sqlserver_query(query, params)
+        return await stream_rowset_response(batches, result_format)
 
     except Exception as e:
         logger.error(f"Error getting daily attendance: {str(e)}")
@@ -52,8 +75,62 @@ async def get_daily_attendance(year: int, month: int):
         )
 
 
+@attendance_router.get("/export/{year}/{month}", dependencies=[Depends(verify_token)])
+async def export_daily_attendance(request: Request, year: int, month: int = Path(..., ge=1, le=12),
+                                  export_format: str = Query("csv", alias="format"),
+                                  gzip: bool = False):
+    """
+    Download a month of daily attendance records as CSV or XLSX (`format`)
+
+    Rows are streamed from the database into the file (see utils/export.py);
+    `gzip=true` compresses a CSV export.
+    """
+    check_export_format(export_format, gzip)
+    try:
+        logger.info(f"Exporting daily attendance for {year}-{month} as {export_format}")
+
+        query = """
+        SELECT 
+            a.AttendanceID,
+            a.EmployeeID,
+            e.FullName as EmployeeName,
+            d.DepartmentName as Department,
+            a.Date,
+            a.CheckIn,
+            a.CheckOut,
+            a.Status,
+            a.WorkHours,
+            a.LateMinutes,
+            a.Overtime
+        FROM [HUMAN].[dbo].[Attendance] a
+        JOIN [HUMAN].[dbo].[Employees] e ON a.EmployeeID = e.EmployeeID
+        JOIN [HUMAN].[dbo].[Departments] d ON e.DepartmentID = d.DepartmentID
+        WHERE a.Date >= @MonthStart AND a.Date < @MonthEnd
+        """
+        params = month_params(*month_window(year, month))
+
+        if getattr(request.state, 'self_only', False):
+            query += " AND a.EmployeeID = @EmployeeID"
+            params["EmployeeID"] = request.state.id
+
+        query += " ORDER BY a.Date, a.EmployeeID"
+        batches = stream_sqlserver_query(query, params, batch_size=EXPORT_BATCH_SIZE)
+        return await export_response(batches, export_format, f"attendance-{year}-{month:02d}",
+                                     sheet_name=f"Attendance {year}-{month:02d}", gzip=gzip)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error exporting daily attendance: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail={"Status": False, "Error": str(
+                e), "Message": "Failed to export attendance data. Please try again later."}
+        )
+
+
 @attendance_router.get("/monthly/{year}/{month}", dependencies=[Depends(verify_token)])
-async def get_monthly_attendance(year: int, month: int):
+async def get_monthly_attendance(year: int, month: int = Path(..., ge=1, le=12)):
     """
     Get monthly attendance summary for each employee
     """
@@ -73,12 +150,12 @@ async def get_monthly_attendance(year: int, month: int):
         FROM [HUMAN].[dbo].[Employees] e
         JOIN [HUMAN].[dbo].[Departments] d ON e.DepartmentID = d.DepartmentID
         LEFT JOIN [HUMAN].[dbo].[Attendance] a ON e.EmployeeID = a.EmployeeID 
-            AND YEAR(a.Date) = @Year AND MONTH(a.Date) = @Month
+            AND a.Date >= @MonthStart AND a.Date < @MonthEnd
         GROUP BY e.EmployeeID, e.FullName, d.DepartmentName
         ORDER BY d.DepartmentName, e.FullName
         """
 
-        results = await execute_sqlserver_query(query, {"Year": year, "Month": month})
+        results = await execute_sqlserver_query(query, month_params(*month_window(year, month)))
         return {"Status": True, "Data": results}
 
     except Exception as e:
@@ -91,29 +168,41 @@ async def get_monthly_attendance(year: int, month: int):
 
 
 @attendance_router.get("/summary/{year}/{month}", dependencies=[Depends(verify_token)])
-async def get_attendance_summary(year: int, month: int):
+async def get_attendance_summary(year: int, month: int = Path(..., ge=1, le=12)):
     """
     Get attendance summary statistics
     """
     try:
         logger.info(f"Getting attendance summary for {year}-{month}")
+        params = month_params(*month_window(year, month))
 
-        # Get department-wise statistics
-        dept_query = """
+        # Department rows and the company-wide row in one round trip; the
+        # () grouping set counts every employee, with or without a department
+        query = """
         SELECT 
             d.DepartmentName as Department,
+            GROUPING(d.DepartmentName) as IsOverall,
             COUNT(DISTINCT e.EmployeeID) as TotalEmployees,
             COUNT(CASE WHEN a.Status = 'Present' THEN 1 END) as TotalPresent,
             COUNT(CASE WHEN a.Status = 'Absent' THEN 1 END) as TotalAbsent,
             COUNT(CASE WHEN a.LateMinutes > 0 THEN 1 END) as TotalLate
-        FROM [HUMAN].[dbo].[Departments] d
-        JOIN [HUMAN].[dbo].[Employees] e ON d.DepartmentID = e.DepartmentID
+        FROM [HUMAN].[dbo].[Employees] e
+        LEFT JOIN [HUMAN].[dbo].[Departments] d ON d.DepartmentID = e.DepartmentID
         LEFT JOIN [HUMAN].[dbo].[Attendance] a ON e.EmployeeID = a.EmployeeID 
-            AND YEAR(a.Date) = @Year AND MONTH(a.Date) = @Month
-        GROUP BY d.DepartmentName
+            AND a.Date >= @MonthStart AND a.Date < @MonthEnd
+        GROUP BY GROUPING SETS ((d.DepartmentName), ())
         """
 
-        department_stats = await execute_sqlserver_query(dept_query, {"Year": year, "Month": month})
+        results = await execute_sqlserver_query(query, params)
+
+        department_stats = []
+        overall_stats = None
+        for stats in results:
+            if stats.pop('IsOverall'):
+                del stats['Department']
+                overall_stats = stats
+            elif stats['Department'] is not None:
+                department_stats.append(stats)
 
         # Calculate rates for each department
         for stats in department_stats:
@@ -129,21 +218,6 @@ async def get_attendance_summary(year: int, month: int):
                 stats['AbsentRate'] = 0
                 stats['LateRate'] = 0
 
-        # Get overall statistics
-        overall_query = """
-        SELECT 
-            COUNT(DISTINCT e.EmployeeID) as TotalEmployees,
-            COUNT(CASE WHEN a.Status = 'Present' THEN 1 END) as TotalPresent,
-            COUNT(CASE WHEN a.Status = 'Absent' THEN 1 END) as TotalAbsent,
-            COUNT(CASE WHEN a.LateMinutes > 0 THEN 1 END) as TotalLate
-        FROM [HUMAN].[dbo].[Employees] e
-        LEFT JOIN [HUMAN].[dbo].[Attendance] a ON e.EmployeeID = a.EmployeeID 
-            AND YEAR(a.Date) = @Year AND MONTH(a.Date) = @Month
-        """
-
-        overall_stats = await execute_sqlserver_query(overall_query, {"Year": year, "Month": month})
-        overall_stats = overall_stats[0]
-
         # Calculate overall rates
         if overall_stats['TotalEmployees'] > 0:
             overall_stats['AveragePresentRate'] = round(
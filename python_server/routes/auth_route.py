@@ -2,12 +2,14 @@ from fastapi import APIRouter, Depends, HTTPException, Response, Cookie, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from typing import Dict, Any, Optional
 import jwt
-import bcrypt
 from datetime import datetime, timedelta
 import logging
+import time
+from utils.cache import cache_key, create_cache, invalidation_bus, user_tag
 from utils.db import execute_mysql_query
+from utils.passwords import hash_password, verify_password, needs_rehash
 import os
-from middleware.auth import verify_token, Roles
+from middleware.auth import verify_token, verify_and_decode_token, extract_token, revoke_token, Roles
 from middleware.api_auth import RoleBasedAccessControl, protect_employee_endpoint, protect_payroll_endpoint, admin_only
 
 # Initialize logger
@@ -21,6 +23,15 @@ JWT_SECRET = os.getenv('JWT_SECRET', 'your-secret-key')
 JWT_ALGORITHM = 'HS256'  # os.getenv('JWT_ALGORITHM', 'HS256')
 # int(os.getenv('ACCESS_TOKEN_EXPIRE_MINUTES', '1440'))
 ACCESS_TOKEN_EXPIRE_MINUTES = 50000
+# Put the account status in tokens, so /check-auth can answer from the token
+TOKEN_EMBED_PROFILE = os.getenv('TOKEN_EMBED_PROFILE', 'false').lower() in ('1', 'true', 'yes')
+
+# Match with CHK_Role constraint
+USER_ROLES = ["Admin", "HR Manager", "Payroll Manager", "Employee"]
+
+# Account profiles read by /check-auth, dropped when user_tag(id) is published
+USER_PROFILE_CACHE_TTL = float(os.getenv('USER_PROFILE_CACHE_TTL', '60'))  # seconds
+user_profile_cache = create_cache("user_profiles", USER_PROFILE_CACHE_TTL)
 
 
 def generate_token(user_data: Dict[str, Any]) -> str:
@@ -29,10 +40,14 @@ def generate_token(user_data: Dict[str, Any]) -> str:
 
     to_encode = {
         "exp": expire,
+        # Fractional seconds, so revoking a user never catches a token issued after it
+        "iat": time.time(),
         "id": user_data["UserID"],
         "username": user_data["Username"],
         "role": user_data["Role"]
     }
+    if TOKEN_EMBED_PROFILE and "Status" in user_data:
+        to_encode["status"] = user_data["Status"]
 
     token = jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
     logger.info(f"Generated token for user: {user_data['Username']}")
@@ -46,6 +61,8 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     try:
         logger.info("Using OAuth2 form login method")
         return await process_login(form_data.username, form_data.password)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"OAuth2 login error: {str(e)}")
         raise HTTPException(
@@ -133,10 +150,7 @@ async def process_login(username: str, password: str):
             # Create test user if it doesn't exist
             if username == "admin":
                 logger.info("Creating admin test user")
-                hashed_password = bcrypt.hashpw(
-                    "admin123".encode('utf-8'),
-                    bcrypt.gensalt()
-                ).decode('utf-8')
+                hashed_password = await hash_password("admin123")
 
                 # Save new admin user
                 insert_query = """
@@ -175,10 +189,10 @@ async def process_login(username: str, password: str):
                             "Message": "Invalid password format"}
                 )
 
-            is_valid = bcrypt.checkpw(
-                password.encode('utf-8'),
-                stored_password.encode('utf-8')
-            )
+            # Runs on the password pool; sheds with 429 when it is saturated
+            is_valid = await verify_password(password, stored_password)
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Password check error: {str(e)}")
             logger.error(f"Stored password: {stored_password}")
@@ -195,6 +209,9 @@ async def process_login(username: str, password: str):
                 detail={"Status": False, "Message": "Incorrect password"}
             )
 
+        if needs_rehash(stored_password):
+            await rehash_password(user["UserID"], password)
+
         # Generate token
         token = generate_token(user)
 
@@ -229,6 +246,22 @@ async def process_login(username: str, password: str):
         )
 
 
+async def rehash_password(user_id: int, password: str):
+    """Store a hash at the current BCRYPT_ROUNDS after a successful login
+
+    Best effort: a failure leaves the old hash in place, which still verifies.
+    """
+    try:
+        hashed_password = await hash_password(password)
+        await execute_mysql_query(
+            "UPDATE user SET Password = %s WHERE UserID = %s",
+            (hashed_password, user_id)
+        )
+        logger.info(f"Rehashed password for user ID: {user_id}")
+    except Exception as e:
+        logger.warning(f"Password rehash skipped for user ID {user_id}: {str(e)}")
+
+
 @auth_router.post("/register")
 async def register(user_data: Dict[str, Any]):
     """Register a new user"""
@@ -255,10 +288,7 @@ async def register(user_data: Dict[str, Any]):
             )
 
         # Hash password
-        hashed_password = bcrypt.hashpw(
-            password.encode('utf-8'),
-            bcrypt.gensalt()
-        ).decode('utf-8')
+        hashed_password = await hash_password(password)
 
         # Save new user
         insert_query = """
@@ -284,6 +314,17 @@ async def register(user_data: Dict[str, Any]):
         )
 
 
+async def get_user_profile(user_id) -> Optional[Dict[str, Any]]:
+    """UserID, Username, Role and Status of an account, cached by UserID"""
+    async def load():
+        query = "SELECT UserID, Username, Role, Status FROM user WHERE UserID = %s"
+        users = await execute_mysql_query(query, (user_id,))
+        return users[0] if users else None
+
+    return await user_profile_cache.get_or_load(
+        cache_key("user-profile", UserID=user_id), load, tags=(user_tag(user_id),))
+
+
 @auth_router.get("/check-auth")
 async def check_auth(token: str = Cookie(None)):
     """Check if user is authenticated"""
@@ -294,29 +335,36 @@ async def check_auth(token: str = Cookie(None)):
                 detail={"Status": False, "Message": "Not authenticated"}
             )
 
-        try:
-            # Verify token
-            payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-            user_id = payload.get("id")
-
-            # Get user info from database
-            query = "SELECT UserID, Username, Role, Status FROM user WHERE UserID = %s"
-            users = await execute_mysql_query(query, (user_id,))
-
-            if not users:
-                raise HTTPException(
-                    status_code=401,
-                    detail={"Status": False,
-                            "Message": "Invalid login session"}
-                )
-
-            return {"Status": True, "Data": users[0]}
-
-        except jwt.PyJWTError:
+        # Verify token (cached, and honouring logout revocations)
+        result = await verify_and_decode_token(token)
+        if not result["valid"]:
             raise HTTPException(
                 status_code=401,
                 detail={"Status": False, "Message": "Invalid or expired token"}
             )
+        payload = result["decoded"]
+
+        # Tokens carrying the profile need no database round trip; a role or
+        # status change revokes them (see update_user)
+        if TOKEN_EMBED_PROFILE and "status" in payload:
+            return {"Status": True, "Data": {
+                "UserID": payload.get("id"),
+                "Username": payload.get("username"),
+                "Role": payload.get("role"),
+                "Status": payload.get("status"),
+            }}
+
+        # Get user info from database (cached)
+        user = await get_user_profile(payload.get("id"))
+
+        if not user:
+            raise HTTPException(
+                status_code=401,
+                detail={"Status": False,
+                        "Message": "Invalid login session"}
+            )
+
+        return {"Status": True, "Data": user}
 
     except HTTPException:
         raise
@@ -330,8 +378,11 @@ async def check_auth(token: str = Cookie(None)):
 
 
 @auth_router.post("/logout")
-async def logout(response: Response):
-    """Logout user by clearing the token cookie"""
+async def logout(request: Request, response: Response):
+    """Logout user by clearing the token cookie and revoking the token"""
+    token = extract_token(request)
+    if token:
+        await revoke_token(token)
     response.delete_cookie(key="token")
     return {"Status": True, "Message": "Logout successful"}
 
@@ -359,9 +410,7 @@ async def get_users():
 async def get_roles():
     """Get list of available roles"""
     try:
-        # Match with CHK_Role constraint
-        roles = ["Admin", "HR Manager", "Employee"]
-        return {"Status": True, "Data": roles}
+        return {"Status": True, "Data": USER_ROLES}
     except Exception as e:
         logger.error(f"Error getting roles: {str(e)}")
         raise HTTPException(
@@ -370,6 +419,55 @@ async def get_roles():
         )
 
 
+@auth_router.put("/users/{user_id}", dependencies=[Depends(admin_only())])
+async def update_user(user_id: int, changes: Dict[str, Any]):
+    """Change the role and/or status of an account
+
+    The user's cached profile is dropped and their existing tokens are
+    revoked, so the change applies from their next request. Other workers
+    see the revocation only through a shared cache (CACHE_BACKEND=redis);
+    see TokenCache in middleware/auth.py.
+    """
+    try:
+        updates = {}
+        if "role" in changes:
+            if changes["role"] not in USER_ROLES:
+                raise HTTPException(
+                    status_code=400,
+                    detail={"Status": False,
+                            "Message": f"Role must be one of: {', '.join(USER_ROLES)}"}
+                )
+            updates["Role"] = changes["role"]
+        if "status" in changes:
+            updates["Status"] = 1 if changes["status"] else 0
+
+        if not updates:
+            raise HTTPException(
+                status_code=400,
+                detail={"Status": False, "Message": "Nothing to update (role, status)"}
+            )
+
+        assignments = ", ".join(f"{column} = %s" for column in updates)
+        await execute_mysql_query(
+            f"UPDATE user SET {assignments} WHERE UserID = %s",
+            (*updates.values(), user_id)
+        )
+
+        # Drops the cached profile and revokes the user's tokens
+        await invalidation_bus.publish(user_tag(user_id))
+
+        logger.info(f"Updated user {user_id}: {', '.join(updates)}")
+        return {"Status": True, "Message": "User updated successfully"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating user: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail={"Status": False, "Error": str(e)}
+        )
+
+
 @auth_router.get("/test-auth", dependencies=[Depends(verify_token)])
 async def test_auth(request: Request):
     """Test the authentication and get current user role"""
@@ -0,0 +1,111 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Any, Awaitable, Callable, Dict, Optional
+from datetime import date
+import logging
+import os
+from middleware.auth import ALLOW, EMPLOYEE_DATA, PAYROLL_DATA, resolve_auth
+from utils.cache import DEPARTMENTS_TAG, EMPLOYEES_TAG, cache_key, create_cache
+from utils.fanout import fan_out
+from routes import alerts_route, attendance_route, reports_route
+from routes.auth_route import get_user_profile
+
+# Logger
+logger = logging.getLogger("dashboard")
+
+# Create router
+dashboard_router = APIRouter()
+
+# Report sections per data source; attendance and alerts live in SQL Server only
+SOURCES = {
+    "sqlserver": {
+        "employees": reports_route.get_employee_stats,
+        "salary": reports_route.get_salary_stats,
+        "organization": reports_route.get_organization_stats,
+    },
+    "mysql": {
+        "employees": reports_route.get_employee_stats_mysql,
+        "salary": reports_route.get_salary_stats_mysql,
+        "organization": reports_route.get_organization_stats_mysql,
+    },
+}
+
+# Attendance and alert summaries are shared by every dashboard for a short while
+DASHBOARD_CACHE_TTL = float(os.getenv('DASHBOARD_CACHE_TTL', '60'))  # seconds
+dashboard_cache = create_cache("dashboard", DASHBOARD_CACHE_TTL)
+
+
+async def _attendance_summary(year: int, month: int):
+    async def load():
+        return (await attendance_route.get_attendance_summary(year, month))["Data"]
+
+    return await dashboard_cache.get_or_load(
+        cache_key("attendance-summary", Year=year, Month=month), load,
+        tags=(EMPLOYEES_TAG, DEPARTMENTS_TAG))
+
+
+async def _alert_counts():
+    async def load():
+        anniversaries = await alerts_route.get_work_anniversaries()
+        violations = await alerts_route.get_leave_violations()
+        return {
+            "workAnniversaries": len(anniversaries["Data"]),
+            "leaveViolations": len(violations["Data"]),
+        }
+
+    return await dashboard_cache.get_or_load("alert-counts", load, tags=(EMPLOYEES_TAG,))
+
+
+async def _data(response: Awaitable[Dict[str, Any]]):
+    return (await response)["Data"]
+
+
+def dashboard_sections(context, source: str, year: int, today: date) -> Dict[str, Callable[[], Awaitable[Any]]]:
+    """The sections a caller may see, as name -> loader"""
+    reports = SOURCES[source]
+    sections = {"profile": lambda: get_user_profile(context.id)}
+    if context.access(EMPLOYEE_DATA, True) == ALLOW:
+        sections["employees"] = lambda: _data(reports["employees"](year, None))
+        sections["organization"] = lambda: _data(reports["organization"](None))
+        sections["attendance"] = lambda: _attendance_summary(today.year, today.month)
+        sections["alerts"] = _alert_counts
+    if context.access(PAYROLL_DATA, True) == ALLOW:
+        sections["salary"] = lambda: _data(reports["salary"](year, None))
+    return sections
+
+
+@dashboard_router.get("/bootstrap")
+async def get_dashboard_bootstrap(request: Request, year: Optional[int] = None,
+                                  source: str = Query("sqlserver")):
+    """
+    Everything the dashboard shows on load, in one request
+
+    The sections depend on the caller's role: employees see their profile,
+    staff who can read employee data also get employee, organization,
+    attendance and alert summaries, and payroll readers get salary figures.
+    Sections load concurrently from the report rollups and caches. A section
+    that fails is null and listed under `Unavailable`; `Timings` gives each
+    section's load time in milliseconds.
+    """
+    if source not in SOURCES:
+        raise HTTPException(
+            status_code=400,
+            detail={"Status": False,
+                    "Message": f"Unknown source: {source}. Use one of: {', '.join(SOURCES)}"}
+        )
+
+    context = await resolve_auth(request)
+    today = date.today()
+    year = year or today.year
+    logger.info(f"Building dashboard for role {context.role} (year: {year}, source: {source})")
+
+    sections = dashboard_sections(context, source, year, today)
+    outcome = await fan_out(sections)
+    snapshot = reports_route.report_store.snapshot if source == "sqlserver" else None
+
+    return {
+        "Status": True,
+        "Data": {name: outcome.get(name) for name in sections},
+        "Unavailable": sorted(outcome.errors),
+        "Timings": {name: round(seconds * 1000, 1) for name, seconds in outcome.timings.items()},
+        "AsOf": snapshot.as_of if snapshot else None
+    }
@@ -4,6 +4,7 @@ from pydantic import BaseModel
 import logging
 from middleware.auth import check_role, verify_token
 from utils.db import execute_sqlserver_query
+from utils.cache import DEPARTMENTS_TAG, department_tag, invalidation_bus
 
 # Logger
 logger = logging.getLogger("department")
@@ -160,6 +161,7 @@ async def add_department(
 
         # Get inserted department ID
         department_id = results[0]["DepartmentID"] if results else None
+        await invalidation_bus.publish(department_tag(department_id), DEPARTMENTS_TAG)
 
         return {
             "Status": True,
@@ -248,6 +250,7 @@ async def update_department(
 
         # Execute update
         await execute_sqlserver_query(update_query, params)
+        await invalidation_bus.publish(department_tag(department_id), DEPARTMENTS_TAG)
 
         return {
             "Status": True,
@@ -328,6 +331,7 @@ async def delete_department(department_id: int, request: Request):
             delete_query,
             {"DepartmentID": department_id}
         )
+        await invalidation_bus.publish(department_tag(department_id), DEPARTMENTS_TAG)
 
         return {
             "Status": True,
@@ -1,15 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel, Field, validator, EmailStr
 from datetime import date, datetime
 import logging
 from middleware.auth import verify_token
 from middleware.api_auth import protect_employee_endpoint
-from utils.db import execute_sqlserver_query, execute_mysql_query
+from utils.db import execute_sqlserver_query, execute_mysql_query, stream_sqlserver_query, RowSet
+from utils.responses import STREAM_FORMATS, check_result_format, rowset_response, stream_rowset_response
+from utils.pagination import MAX_PAGE_SIZE, Keyset, fetch_page, wants_page
+from utils.cache import EMPLOYEES_TAG, employee_tag, invalidation_bus
+from utils.export import EXPORT_BATCH_SIZE, check_export_format, export_response
 
 # Logger
 logger = logging.getLogger("employee")
 
+# Employee lists are paged in EmployeeID order
+EMPLOYEE_KEYSET = Keyset(("EmployeeID", "ASC"))
+
 # Create router
 employee_router = APIRouter()
 
@@ -56,44 +63,49 @@ class EmployeeCreate(BaseModel):
 
 
 @employee_router.get("/", dependencies=[Depends(protect_employee_endpoint())])
-async def get_employees(request: Request):
+async def get_employees(request: Request,
+                        result_format: str = Query("objects", alias="format"),
+                        page_size: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                        cursor: Optional[str] = None,
+                        include_total: bool = False):
     """
     Get all employees with their department and position information
+
+    The list is streamed in the `format` layout (objects by default). Pass
+    `page_size` (and the returned `NextCursor` as `cursor`) to page through it
+    by EmployeeID instead; `include_total` adds the overall count.
     """
+    check_result_format(result_format, STREAM_FORMATS)
+    paged = wants_page(EMPLOYEE_KEYSET, page_size, cursor, result_format)
     try:
         logger.info("Getting list of all employees")
 
+        query = """
+            SELECT e.EmployeeID, e.FullName, e.DateOfBirth, e.Gender, 
+                   e.PhoneNumber, e.Email, e.HireDate, e.Status, 
+                   d.DepartmentName, p.PositionName 
+            FROM [HUMAN].[dbo].[Employees] e
+            JOIN [HUMAN].[dbo].[Departments] d ON e.DepartmentID = d.DepartmentID
+            JOIN [HUMAN].[dbo].[Positions] p ON e.PositionID = p.PositionID
+        """
+        params = {}
+
         # Check if we should filter to only show the current employee's data
         if hasattr(request.state, 'self_only') and request.state.self_only:
             employee_id = request.state.id
             logger.info(
                 f"Filtering employee list to only show employee ID: {employee_id}")
 
-            query = """
-                SELECT e.EmployeeID, e.FullName, e.DateOfBirth, e.Gender, 
-                       e.PhoneNumber, e.Email, e.HireDate, e.Status, 
-                       d.DepartmentName, p.PositionName 
-                FROM [HUMAN].[dbo].[Employees] e
-                JOIN [HUMAN].[dbo].[Departments] d ON e.DepartmentID = d.DepartmentID
-                JOIN [HUMAN].[dbo].[Positions] p ON e.PositionID = p.PositionID
-                WHERE e.EmployeeID = @EmployeeID
-            """
-
-            results = await execute_sqlserver_query(query, {"EmployeeID": employee_id})
-        else:
-            # Regular query for admins, HR managers, and payroll managers
-            query = """
-                SELECT e.EmployeeID, e.FullName, e.DateOfBirth, e.Gender, 
-                       e.PhoneNumber, e.Email, e.HireDate, e.Status, 
-                       d.DepartmentName, p.PositionName 
-                FROM [HUMAN].[dbo].[Employees] e
-                JOIN [HUMAN].[dbo].[Departments] d ON e.DepartmentID = d.DepartmentID
-                JOIN [HUMAN].[dbo].[Positions] p ON e.PositionID = p.PositionID
-            """
+            query += " WHERE e.EmployeeID = @EmployeeID"
+            params["EmployeeID"] = employee_id
 
-            results = await execute_sqlserver_query(query)
+        if paged:
+            return await fetch_page(query, params, EMPLOYEE_KEYSET, page_size,
+                                    cursor, include_total, result_format,
+                                    total_tags=(EMPLOYEES_TAG,))
 
-        return {"Status": True, "Data": results}
+        batches = stream_sqlserver_query(query, params)
+        return await stream_rowset_response(batches, result_format)
 
     except Exception as e:
         logger.error(f"Error getting employees: {str(e)}")
@@ -106,10 +118,14 @@ async def get_employees(request: Request):
 
 
 @employee_router.get("/mysql", dependencies=[Depends(protect_employee_endpoint())])
-async def get_employees_mysql(request: Request):
+async def get_employees_mysql(request: Request,
+                              result_format: str = Query("objects", alias="format")):
     """
     Get all employees with their department and position information from MySQL
+
+    `format` selects the response layout: objects (default), rows or columns.
     """
+    check_result_format(result_format)
     try:
         logger.info("Getting list of all employees from MySQL")
 
@@ -139,7 +155,7 @@ async def get_employees_mysql(request: Request):
                 WHERE e.EmployeeID = %s
             """
 
-            results = await execute_mysql_query(query, (employee_id,))
+            results = await execute_mysql_query(query, (employee_id,), as_rows=True)
         else:
             # Regular query for admins, HR managers, and payroll managers
             query = """
@@ -161,26 +177,28 @@ async def get_employees_mysql(request: Request):
                 JOIN position p ON e.PositionID = p.PositionID
             """
 
-            results = await execute_mysql_query(query)
+            results = await execute_mysql_query(query, as_rows=True)
 
-        # Format the results to match the frontend expectations
-        formatted_results = []
-        for employee in results:
+        # Format the results to match the frontend expectations, working on
+        # row tuples so each employee is materialized only once
+        first_name = results.index('FirstName')
+        last_name = results.index('LastName')
+        date_columns = (results.index('DateOfBirth'), results.index('HireDate'))
+
+        formatted_rows = []
+        for row in results:
+            values = list(row)
             # Convert datetime objects to string format
-            if employee.get('DateOfBirth'):
-                employee['DateOfBirth'] = employee['DateOfBirth'].strftime(
-                    '%Y-%m-%d')
-            if employee.get('HireDate'):
-                employee['HireDate'] = employee['HireDate'].strftime(
-                    '%Y-%m-%d')
+            for position in date_columns:
+                if values[position]:
+                    values[position] = values[position].strftime('%Y-%m-%d')
 
             # Format name fields
-            employee['FullName'] = f"{employee.get('FirstName', '')} {employee.get('LastName', '')}".strip(
-            )
+            values.append(f"{values[first_name]} {values[last_name]}".strip())
+            formatted_rows.append(values)
 
-            formatted_results.append(employee)
-
-        return {"Status": True, "Data": formatted_results}
+        formatted = RowSet(results.columns + ['FullName'], formatted_rows)
+        return rowset_response(formatted, result_format)
 
     except Exception as e:
         logger.error(f"Error getting employees from MySQL: {str(e)}")
@@ -195,10 +213,17 @@ async def get_employees_mysql(request: Request):
 @employee_router.get("/list", dependencies=[Depends(protect_employee_endpoint())])
 async def get_employee_list(request: Request,
                             department_id: Optional[int] = None,
-                            status: Optional[str] = None):
+                            status: Optional[str] = None,
+                            page_size: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                            cursor: Optional[str] = None,
+                            include_total: bool = False):
     """
     Get list of employees with optional filtering
+
+    Pass `page_size` (and the returned `NextCursor` as `cursor`) to page
+    through the list by EmployeeID; `include_total` adds the overall count.
     """
+    paged = wants_page(EMPLOYEE_KEYSET, page_size, cursor)
     try:
         logger.info("Getting employee list with filters")
 
@@ -233,6 +258,10 @@ async def get_employee_list(request: Request,
             query_base += " AND e.EmployeeID = @EmployeeID"
             params["EmployeeID"] = employee_id
 
+        if paged:
+            return await fetch_page(query_base, params, EMPLOYEE_KEYSET, page_size,
+                                    cursor, include_total, total_tags=(EMPLOYEES_TAG,))
+
         # Execute query
         results = await execute_sqlserver_query(query_base, params)
         return {"Status": True, "Data": results}
@@ -244,6 +273,62 @@ async def get_employee_list(request: Request,
             detail={"Status": False, "Error": str(e)}
         )
 
+# Export the employee list as a file
+
+
+@employee_router.get("/export", dependencies=[Depends(protect_employee_endpoint())])
+async def export_employees(request: Request,
+                           export_format: str = Query("csv", alias="format"),
+                           department_id: Optional[int] = None,
+                           status: Optional[str] = None,
+                           gzip: bool = False):
+    """
+    Download the employee list as CSV or XLSX (`format`), optionally
+    filtered like /employees/list
+
+    Rows are streamed from the database into the file (see utils/export.py);
+    `gzip=true` compresses a CSV export.
+    """
+    check_export_format(export_format, gzip)
+    try:
+        logger.info(f"Exporting employee list as {export_format}")
+
+        query = """
+            SELECT e.EmployeeID, e.FullName, e.DateOfBirth, e.Gender, 
+                   e.PhoneNumber, e.Email, e.HireDate, e.Status, 
+                   d.DepartmentName, p.PositionName 
+            FROM [HUMAN].[dbo].[Employees] e
+            JOIN [HUMAN].[dbo].[Departments] d ON e.DepartmentID = d.DepartmentID
+            JOIN [HUMAN].[dbo].[Positions] p ON e.PositionID = p.PositionID
+            WHERE 1=1
+        """
+        params = {}
+
+        if department_id:
+            query += " AND e.DepartmentID = @DepartmentID"
+            params["DepartmentID"] = department_id
+
+        if status:
+            query += " AND e.Status = @Status"
+            params["Status"] = status
+
+        if hasattr(request.state, 'self_only') and request.state.self_only:
+            query += " AND e.EmployeeID = @EmployeeID"
+            params["EmployeeID"] = request.state.id
+
+        query += " ORDER BY e.EmployeeID"
+        batches = stream_sqlserver_query(query, params, batch_size=EXPORT_BATCH_SIZE)
+        return await export_response(batches, export_format, "employees", sheet_name="Employees", gzip=gzip)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error exporting employees: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail={"Status": False, "Error": str(e)}
+        )
+
 # Add a new employee
 
 
@@ -298,6 +383,7 @@ async def add_employee(employee: EmployeeCreate,
         ]}
 
         await execute_sqlserver_query(insert_query, employee_dict)
+        await invalidation_bus.publish(employee_tag(employee.EmployeeID), EMPLOYEES_TAG)
 
         return {
             "Status": True,
@@ -440,6 +526,7 @@ async def update_employee(
 
         # Execute update
         await execute_sqlserver_query(update_query, params)
+        await invalidation_bus.publish(employee_tag(employee_id), EMPLOYEES_TAG)
 
         return {
             "Status": True,
@@ -1,10 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request
 from typing import Dict, Any, List, Optional
 from datetime import datetime, date
 import logging
-from utils.db import execute_sqlserver_query
+import os
+from utils.cache import (PAYROLL_ALL_MONTHS_TAG, PAYROLL_TAG, EMPLOYEES_TAG, DEPARTMENTS_TAG,
+                         cache_key, create_cache, employee_tag, invalidation_bus,
+                         payroll_month_tag)
+from utils.dates import month_params, month_window, parse_month
+from utils.db import execute_sqlserver_query, stream_sqlserver_query
+from utils.responses import STREAM_FORMATS, check_result_format, stream_rowset_response
+from utils.export import EXPORT_BATCH_SIZE, check_export_format, export_response
+from utils.pagination import MAX_PAGE_SIZE, Keyset, fetch_page, wants_page
 from middleware.auth import verify_token
-from middleware.api_auth import protect_payroll_endpoint
+from middleware.api_auth import protect_payroll_endpoint, admin_only
+from utils import payroll_engine, payroll_ledger
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from dependencies import get_db
@@ -15,102 +24,154 @@ logger = logging.getLogger("payroll")
 # Create router
 payroll_router = APIRouter()
 
-# Simple in-memory cache with TTL
-cache = {}
-CACHE_TTL = 5 * 60  # 5 minutes in seconds
+# Salary rows are paged by employee; employees without a dividend sort first
+SALARY_KEYSET = Keyset(("EmployeeID", "ASC"), ("DividendID", "ASC", 0))
+
+# Month-end report aggregated from the source tables, for when the ledger
+# is unavailable; same columns as payroll_ledger.READ_MONTH_QUERY
+MONTHLY_PAYROLL_QUERY = """
+    SELECT 
+        e.EmployeeID,
+        e.FullName,
+        d.DepartmentName,
+        e.Salary as BaseSalary,
+        COALESCE(b.BonusAmount, 0) as Bonus,
+        COALESCE(al.AllowanceAmount, 0) as Allowances,
+        COALESCE(dd.DeductionAmount, 0) as Deductions,
+        e.Salary + COALESCE(b.BonusAmount, 0) - COALESCE(dd.DeductionAmount, 0) as NetSalary
+    FROM [HUMAN].[dbo].[Employees] e
+    JOIN [HUMAN].[dbo].[Departments] d ON e.DepartmentID = d.DepartmentID
+    LEFT JOIN (
+        SELECT EmployeeID, SUM(BonusAmount) as BonusAmount
+        FROM [HUMAN].[dbo].[Bonuses]
+        WHERE BonusDate >= @MonthStart AND BonusDate < @MonthEnd
+        GROUP BY EmployeeID
+    ) b ON e.EmployeeID = b.EmployeeID
+    LEFT JOIN (
+        SELECT EmployeeID, SUM(Amount) as AllowanceAmount
+        FROM [HUMAN].[dbo].[Allowances]
+        WHERE AllowanceDate >= @MonthStart AND AllowanceDate < @MonthEnd
+        GROUP BY EmployeeID
+    ) al ON e.EmployeeID = al.EmployeeID
+    LEFT JOIN (
+        SELECT EmployeeID, SUM(Amount) as DeductionAmount
+        FROM [HUMAN].[dbo].[Deductions]
+        WHERE DeductionDate >= @MonthStart AND DeductionDate < @MonthEnd
+        GROUP BY EmployeeID
+    ) dd ON e.EmployeeID = dd.EmployeeID
+    ORDER BY d.DepartmentName, e.FullName
+"""
+
+# New hires and salary edits reach the ledger months already built
+invalidation_bus.subscribe(payroll_ledger.on_employees_changed)
+
+# Payroll read models are cached per key; see utils/cache.py for the backend
+CACHE_TTL = float(os.getenv('PAYROLL_CACHE_TTL', str(5 * 60)))  # seconds
+payroll_cache = create_cache("payroll", CACHE_TTL)
 
 # Helper function for caching
 
 
-async def get_cached_data(key: str, fetch_data_func):
-    """Get data from cache or fetch it and cache it"""
-    current_time = datetime.now().timestamp()
+async def get_cached_data(key: str, fetch_data_func, tags=()):
+    """Get data from cache or fetch it once (concurrent misses share the fetch)
 
-    if key in cache:
-        data, expiry = cache[key]
-        if current_time < expiry:
-            return data
+    `tags` name what the data was built from; publishing any of them on
+    `invalidation_bus` drops the entry.
+    """
+    return await payroll_cache.get_or_load(key, fetch_data_func, tags=tags)
 
-    # Fetch new data
-    data = await fetch_data_func()
 
-    # Cache the data
-    cache[key] = (data, current_time + CACHE_TTL)
+async def sync_ledger(update):
+    """Apply a payroll ledger update after a committed mutation
 
-    return data
+    The mutation has already succeeded, so a ledger failure is logged rather
+    than reported to the client; `python -m utils.payroll_ledger` repairs it.
+    """
+    try:
+        await update
+    except Exception as e:
+        logger.error(f"Payroll ledger update failed, rebuild the month: {str(e)}")
+
+
+def payroll_change_tags(employee_id, when=None):
+    """Tags published when an employee's payroll entries change
+
+    With the entry date only that month and the all-months views are
+    affected; without it every payroll view is.
+    """
+    if when is None:
+        return {employee_tag(employee_id), PAYROLL_TAG}
+    return {employee_tag(employee_id), payroll_month_tag(when), PAYROLL_ALL_MONTHS_TAG}
 
 # Get salary information
 
 
-@payroll_router.get("/salary", dependencies=[Depends(protect_payroll_endpoint())])
-async def get_salary(request: Request, month: Optional[str] = None):
-    """Get salary information for all employees"""
+def _check_month(month: Optional[str]):
+    if month is None:
+        return
     try:
-        cache_key = f"salary-list-{month}" if month else "salary-list"
+        parse_month(month)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail={"Status": False, "Message": f"Invalid month '{month}', expected YYYY-MM"}
+        )
 
-        async def fetch_data():
-            logger.info("Fetching salary data from database")
 
-            # Base query
-            query_base = """
-                SELECT 
-                    d.DividendID, 
-                    d.EmployeeID, 
-                    e.FullName,
-                    e.Salary as BaseSalary,
-                    ISNULL(d.DividendAmount, 0) as Bonus,
-                    ISNULL(
-                        (SELECT SUM(Amount) 
-                         FROM [HUMAN].[dbo].[Deductions] 
-                         WHERE EmployeeID = e.EmployeeID 
-                         AND CASE 
-                             WHEN @Month IS NOT NULL THEN FORMAT(DeductionDate, 'yyyy-MM') = @Month 
-                             ELSE 1=1 
-                         END),
-                        0
-                    ) as Deductions,
-                    e.Salary + ISNULL(d.DividendAmount, 0) - 
-                    ISNULL(
-                        (SELECT SUM(Amount) 
-                         FROM [HUMAN].[dbo].[Deductions] 
-                         WHERE EmployeeID = e.EmployeeID 
-                         AND CASE 
-                             WHEN @Month IS NOT NULL THEN FORMAT(DeductionDate, 'yyyy-MM') = @Month 
-                             ELSE 1=1 
-                         END),
-                        0
-                    ) as NetSalary,
-                    d.DividendDate as PayDate, 
-                    dept.DepartmentName, 
-                    pos.PositionName
-                FROM [HUMAN].[dbo].[Employees] e
-                LEFT JOIN [HUMAN].[dbo].[Dividends] d 
-                    ON d.EmployeeID = e.EmployeeID
-                    AND CASE 
-                        WHEN @Month IS NOT NULL THEN FORMAT(d.DividendDate, 'yyyy-MM') = @Month 
-                        ELSE 1=1 
-                    END
-                JOIN [HUMAN].[dbo].[Departments] dept ON e.DepartmentID = dept.DepartmentID
-                JOIN [HUMAN].[dbo].[Positions] pos ON e.PositionID = pos.PositionID
-            """
+def _group_by_employee(rows: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    groups = {}
+    for row in rows:
+        groups.setdefault(str(row["EmployeeID"]), []).append(row)
+    return groups
 
-            # Prepare parameters
-            params = {"Month": month} if month else {}
 
-            # Filter to only show the current employee's data if needed
-            if hasattr(request.state, 'self_only') and request.state.self_only:
-                employee_id = request.state.id
-                logger.info(
-                    f"Filtering salary data to only show employee ID: {employee_id}")
-                query_base += " WHERE e.EmployeeID = @EmployeeID"
-                params["EmployeeID"] = employee_id
+async def _load_salary_list(month: Optional[str]):
+    """Full salary list for a month plus an index of each employee's rows"""
+    logger.info("Fetching salary data from database")
+    query_base, params = payroll_engine.salary_query(month)
+    query_base += "    ORDER BY e.EmployeeID"
+    rows = await execute_sqlserver_query(query_base, params)
+    return {"Data": rows, "ByEmployee": _group_by_employee(rows)}
 
-            query_base += " ORDER BY e.EmployeeID"
 
-            # Execute query
-            return await execute_sqlserver_query(query_base, params)
+@payroll_router.get("/salary", dependencies=[Depends(protect_payroll_endpoint())])
+async def get_salary(request: Request, month: Optional[str] = None,
+                     page_size: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                     cursor: Optional[str] = None,
+                     include_total: bool = False):
+    """Get salary information for all employees
+
+    Every role reads the same cached full list for the month; employees
+    limited to their own data get their rows sliced from it, so a month
+    costs one query however many employees open their dashboard.
+
+    Pass `page_size` (and the returned `NextCursor` as `cursor`) to page
+    through the list by employee; pages are not cached, totals are.
+    """
+    _check_month(month)
+    paged = wants_page(SALARY_KEYSET, page_size, cursor)
+    self_only = getattr(request.state, 'self_only', False)
+    employee_id = request.state.id if self_only else None
+    try:
+        if self_only:
+            logger.info(
+                f"Filtering salary data to only show employee ID: {employee_id}")
+
+        if paged:
+            query_base, params = payroll_engine.salary_query(month, employee_id)
+            return await fetch_page(query_base, params, SALARY_KEYSET, page_size,
+                                    cursor, include_total,
+                                    total_tags=(PAYROLL_TAG, EMPLOYEES_TAG))
 
-        data = await get_cached_data(cache_key, fetch_data)
+        month_tag = payroll_month_tag(month) if month else PAYROLL_ALL_MONTHS_TAG
+        salary_list = await get_cached_data(
+            cache_key("salary-list", month=month), lambda: _load_salary_list(month),
+            tags=(PAYROLL_TAG, month_tag, EMPLOYEES_TAG, DEPARTMENTS_TAG))
+
+        if self_only:
+            data = salary_list["ByEmployee"].get(str(employee_id), [])
+        else:
+            data = salary_list["Data"]
 
         return {"Status": True, "Data": data}
     except Exception as e:
@@ -128,7 +189,7 @@ async def get_salary(request: Request, month: Optional[str] = None):
 async def get_salary_history(employee_id: str, request: Request):
     """Get salary history for a specific employee"""
     try:
-        cache_key = f"salary-history-{employee_id}"
+        history_key = cache_key("salary-history", employee_id=employee_id)
 
         async def fetch_data():
             logger.info(f"Fetching salary history for employee: {employee_id}")
@@ -148,7 +209,8 @@ async def get_salary_history(employee_id: str, request: Request):
             """
             return await execute_sqlserver_query(query, {"EmployeeID": employee_id})
 
-        data = await get_cached_data(cache_key, fetch_data)
+        data = await get_cached_data(history_key, fetch_data,
+                                     tags=(employee_tag(employee_id), DEPARTMENTS_TAG))
 
         return {"Status": True, "Data": data}
     except Exception as e:
@@ -164,8 +226,10 @@ async def get_salary_history(employee_id: str, request: Request):
 
 
 @payroll_router.get("/attendance", dependencies=[Depends(protect_payroll_endpoint())])
-async def get_attendance(request: Request):
-    """Get attendance data"""
+async def get_attendance(request: Request,
+                         result_format: str = Query("objects", alias="format")):
+    """Get attendance data, streamed in the `format` layout (objects by default)"""
+    check_result_format(result_format, STREAM_FORMATS)
     try:
         logger.info("Fetching attendance data from database")
 
@@ -198,8 +262,8 @@ async def get_attendance(request: Request):
         query_base += " ORDER BY a.AttendanceMonth DESC"
 
         # Execute query
-        data = await execute_sqlserver_query(query_base, params)
-        return {"Status": True, "Data": data}
+        batches = stream_sqlserver_query(query_base, params)
+        return await stream_rowset_response(batches, result_format)
 
     except Exception as e:
         logger.error(f"Error getting attendance data: {str(e)}")
@@ -252,9 +316,10 @@ async def update_salary(employee_id: str, data: Dict[str, Any], request: Request
             "Reason": reason
         })
 
-        # Clear cache
-        if f"salary-history-{employee_id}" in cache:
-            del cache[f"salary-history-{employee_id}"]
+        await sync_ledger(payroll_ledger.apply_salary_change(employee_id, salary, effective_date))
+
+        # Base salary shows in every month's payroll
+        await invalidation_bus.publish(*payroll_change_tags(employee_id))
 
         return {"Status": True, "Message": "Salary updated successfully"}
     except HTTPException:
@@ -297,42 +362,37 @@ async def get_leave_statistics(employee_id: str):
         )
 
 
-@payroll_router.get("/monthly/{year}/{month}")
-async def get_monthly_payroll(year: int, month: int):
-    """Get monthly payroll information"""
+def _check_all_employees(request: Request):
+    """Month-wide payroll covers every employee; self-only callers are refused"""
+    if getattr(request.state, 'self_only', False):
+        raise HTTPException(
+            status_code=403,
+            detail={"Status": False, "Message": "Monthly payroll covers every employee; use /payroll/salary for your own data"}
+        )
+
+
+@payroll_router.get("/monthly/{year}/{month}", dependencies=[Depends(protect_payroll_endpoint())])
+async def get_monthly_payroll(request: Request,
+                              year: int = Path(..., ge=payroll_ledger.FIRST_LEDGER_YEAR, le=2100),
+                              month: int = Path(..., ge=1, le=12)):
+    """Get monthly payroll information
+
+    Served from the materialized payroll ledger (built on first request for
+    a month up to the current one). Falls back to aggregating the source
+    tables for later months, or if the ledger is unavailable, e.g. before
+    the SQL Server migrations are applied.
+    """
+    _check_all_employees(request)
     try:
         logger.info(f"Fetching payroll data for {year}-{month}")
 
-        query = """
-            SELECT 
-                e.EmployeeID,
-                e.FullName,
-                d.DepartmentName,
-                e.Salary as BaseSalary,
-                COALESCE(b.BonusAmount, 0) as Bonus,
-                COALESCE(dd.DeductionAmount, 0) as Deductions,
-                e.Salary + COALESCE(b.BonusAmount, 0) - COALESCE(dd.DeductionAmount, 0) as NetSalary
-            FROM [HUMAN].[dbo].[Employees] e
-            JOIN [HUMAN].[dbo].[Departments] d ON e.DepartmentID = d.DepartmentID
-            LEFT JOIN (
-                SELECT EmployeeID, SUM(BonusAmount) as BonusAmount
-                FROM [HUMAN].[dbo].[Bonuses]
-                WHERE YEAR(BonusDate) = @Year AND MONTH(BonusDate) = @Month
-                GROUP BY EmployeeID
-            ) b ON e.EmployeeID = b.EmployeeID
-            LEFT JOIN (
-                SELECT EmployeeID, SUM(DeductionAmount) as DeductionAmount
-                FROM [HUMAN].[dbo].[Deductions]
-                WHERE YEAR(DeductionDate) = @Year AND MONTH(DeductionDate) = @Month
-                GROUP BY EmployeeID
-            ) dd ON e.EmployeeID = dd.EmployeeID
-            ORDER BY d.DepartmentName, e.FullName
-        """
+        try:
+            data = await payroll_ledger.read_month(year, month)
+            return {"Status": True, "Data": data, "Source": "ledger"}
+        except Exception as e:
+            logger.warning(f"Payroll ledger unavailable, aggregating live: {str(e)}")
 
-        data = await execute_sqlserver_query(query, {
-            "Year": year,
-            "Month": month
-        })
+        data = await execute_sqlserver_query(MONTHLY_PAYROLL_QUERY, month_params(*month_window(year, month)))
 
         return {"Status": True, "Data": data}
     except Exception as e:
@@ -343,6 +403,44 @@ async def get_monthly_payroll(year: int, month: int):
         )
 
 
+@payroll_router.get("/export/{year}/{month}", dependencies=[Depends(protect_payroll_endpoint())])
+async def export_monthly_payroll(request: Request,
+                                 year: int = Path(..., ge=payroll_ledger.FIRST_LEDGER_YEAR, le=2100),
+                                 month: int = Path(..., ge=1, le=12),
+                                 export_format: str = Query("csv", alias="format"),
+                                 gzip: bool = False):
+    """
+    Download a month's payroll as CSV or XLSX (`format`)
+
+    Same rows as /payroll/monthly, streamed from the payroll ledger (or the
+    live aggregate when the ledger is unavailable) into the file; see
+    utils/export.py. `gzip=true` compresses a CSV export.
+    """
+    check_export_format(export_format, gzip)
+    _check_all_employees(request)
+    try:
+        logger.info(f"Exporting payroll for {year}-{month} as {export_format}")
+
+        try:
+            batches = await payroll_ledger.stream_month(year, month, batch_size=EXPORT_BATCH_SIZE)
+        except Exception as e:
+            logger.warning(f"Payroll ledger unavailable, exporting live aggregate: {str(e)}")
+            batches = stream_sqlserver_query(MONTHLY_PAYROLL_QUERY, month_params(*month_window(year, month)),
+                                             batch_size=EXPORT_BATCH_SIZE)
+
+        return await export_response(batches, export_format, f"payroll-{year}-{month:02d}",
+                                     sheet_name=f"Payroll {year}-{month:02d}", gzip=gzip)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error exporting monthly payroll: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail={"Status": False, "Error": str(e)}
+        )
+
+
 @payroll_router.post("/add-allowance", dependencies=[Depends(protect_payroll_endpoint())])
 async def add_allowance(
     employee_id: str,
@@ -367,6 +465,9 @@ async def add_allowance(
             "Description": description
         })
 
+        await sync_ledger(payroll_ledger.refresh_employee(employee_id, [date]))
+        await invalidation_bus.publish(*payroll_change_tags(employee_id, date))
+
         return {"Status": True, "Message": "Allowance added successfully"}
 
     except Exception as e:
@@ -401,6 +502,9 @@ async def add_deduction(
             "Description": description
         })
 
+        await sync_ledger(payroll_ledger.refresh_employee(employee_id, [date]))
+        await invalidation_bus.publish(*payroll_change_tags(employee_id, date))
+
         return {"Status": True, "Message": "Deduction added successfully"}
 
     except Exception as e:
@@ -505,6 +609,13 @@ async def delete_allowance(allowance_id: int):
     try:
         logger.info(f"Deleting allowance {allowance_id}")
 
+        # Look up whose payroll month the row belongs to before it goes
+        rows = await execute_sqlserver_query("""
+            SELECT EmployeeID, AllowanceDate AS EntryDate
+            FROM [HUMAN].[dbo].[Allowances]
+            WHERE AllowanceID = @AllowanceID
+        """, {"AllowanceID": allowance_id})
+
         query = """
             DELETE FROM [HUMAN].[dbo].[Allowances]
             WHERE AllowanceID = @AllowanceID
@@ -512,6 +623,10 @@ async def delete_allowance(allowance_id: int):
 
         await execute_sqlserver_query(query, {"AllowanceID": allowance_id})
 
+        for row in rows:
+            await sync_ledger(payroll_ledger.refresh_employee(row["EmployeeID"], [row["EntryDate"]]))
+            await invalidation_bus.publish(*payroll_change_tags(row["EmployeeID"], row["EntryDate"]))
+
         return {"Status": True, "Message": "Allowance deleted successfully"}
 
     except Exception as e:
@@ -528,6 +643,13 @@ async def delete_deduction(deduction_id: int):
     try:
         logger.info(f"Deleting deduction {deduction_id}")
 
+        # Look up whose payroll month the row belongs to before it goes
+        rows = await execute_sqlserver_query("""
+            SELECT EmployeeID, DeductionDate AS EntryDate
+            FROM [HUMAN].[dbo].[Deductions]
+            WHERE DeductionID = @DeductionID
+        """, {"DeductionID": deduction_id})
+
         query = """
             DELETE FROM [HUMAN].[dbo].[Deductions]
             WHERE DeductionID = @DeductionID
@@ -535,6 +657,10 @@ async def delete_deduction(deduction_id: int):
 
         await execute_sqlserver_query(query, {"DeductionID": deduction_id})
 
+        for row in rows:
+            await sync_ledger(payroll_ledger.refresh_employee(row["EmployeeID"], [row["EntryDate"]]))
+            await invalidation_bus.publish(*payroll_change_tags(row["EmployeeID"], row["EntryDate"]))
+
         return {"Status": True, "Message": "Deduction deleted successfully"}
 
     except Exception as e:
@@ -544,6 +670,33 @@ async def delete_deduction(deduction_id: int):
             detail={"Status": False, "Error": str(e)}
         )
 
+
+@payroll_router.post("/ledger/rebuild", dependencies=[Depends(admin_only())])
+async def rebuild_payroll_ledger(first: str, last: Optional[str] = None, salaries: bool = False):
+    """Recompute the payroll ledger for the months first..last (YYYY-MM).
+
+    Existing rows keep their BaseSalary unless `salaries` is set.
+    """
+    try:
+        first_month = payroll_ledger.month_of(f"{first}-01")
+        last_month = payroll_ledger.month_of(f"{last or first}-01")
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail={"Status": False, "Message": "Months must be given as YYYY-MM"}
+        )
+
+    try:
+        count = await payroll_ledger.rebuild(first_month, last_month, salaries)
+        await invalidation_bus.publish(PAYROLL_TAG)
+        return {"Status": True, "Message": f"Rebuilt {count} month(s) of the payroll ledger"}
+    except Exception as e:
+        logger.error(f"Error rebuilding payroll ledger: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail={"Status": False, "Error": str(e)}
+        )
+
 # Add a simple test endpoint
 
 
@@ -2,7 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException, Request
 from typing import List, Dict, Any, Optional
 import logging
 from middleware.auth import verify_token
-from utils.db import execute_sqlserver_query, check_sqlserver_health, execute_mysql_query
+from utils.db import execute_mysql_query, sqlserver_breaker, CircuitBreaker, CircuitOpenError
+from utils.fanout import fan_out
+from utils.health import health_monitor
+from utils.report_store import ReportStore
 import os
 
 # Configure logging
@@ -65,9 +68,13 @@ async def check_db_connection():
         logger.info("Using demo data, skipping connection check")
         return
 
-    health = await check_sqlserver_health()
-    if health["status"] != "healthy":
-        logger.error(f"Database connection error: {health}")
+    # Fail fast while the breaker is open instead of waiting on a dead server
+    if sqlserver_breaker.state == CircuitBreaker.OPEN:
+        raise CircuitOpenError(sqlserver_breaker.name)
+
+    # Last background probe (utils/health.py); no connection is opened here
+    if not health_monitor.is_available("sqlServer"):
+        logger.error(f"Database connection error: {health_monitor.status('sqlServer')}")
         raise HTTPException(
             status_code=503,
             detail={"Status": False,
@@ -75,6 +82,11 @@ async def check_db_connection():
         )
 
 
+# SQL Server report aggregates, refreshed in the background (utils/report_store.py)
+report_store = ReportStore(precheck=check_db_connection)
+report_store.subscribe()
+
+
 @reports_router.get("/employee-stats")
 async def get_employee_stats(year: int, request: Request):
     """
@@ -89,52 +101,21 @@ async def get_employee_stats(year: int, request: Request):
                 "Data": DEMO_EMPLOYEE_STATS
             }
 
-        await check_db_connection()
         logger.info(f"Getting employee statistics for year {year}")
-
-        # Get overall employee stats
-        stats_query = """
-            SELECT COUNT(*) as TotalEmployees,
-            SUM(CASE WHEN YEAR(HireDate) = @Year THEN 1 ELSE 0 END) as NewHires,
-            CAST(SUM(CASE WHEN Status = 'Inactive' AND YEAR(EndDate) = @Year THEN 1 ELSE 0 END) AS FLOAT) / 
-            NULLIF(COUNT(*), 0) * 100 as TurnoverRate,
-            AVG(Salary) as AvgSalary
-            FROM [HUMAN].[dbo].[Employees]
-        """
-
-        stats_results = await execute_sqlserver_query(stats_query, {"Year": year})
-
-        # Get department counts
-        dept_query = """
-            SELECT d.DepartmentName as name, COUNT(e.EmployeeID) as count
-            FROM [HUMAN].[dbo].[Departments] d
-            LEFT JOIN [HUMAN].[dbo].[Employees] e ON d.DepartmentID = e.DepartmentID
-            GROUP BY d.DepartmentName
-            ORDER BY count DESC
-        """
-
-        dept_results = await execute_sqlserver_query(dept_query)
-
-        # Format results
-        total_employees = stats_results[0]["TotalEmployees"] if stats_results else 0
-        total_new_hires = stats_results[0]["NewHires"] if stats_results else 0
-        turnover_rate = round(
-            stats_results[0]["TurnoverRate"] or 0, 1) if stats_results else 0
-        avg_salary = stats_results[0]["AvgSalary"] if stats_results else 0
+        snapshot = await report_store.get()
 
         return {
             "Status": True,
-            "Data": {
-                "byDepartment": dept_results or [],
-                "overall": {
-                    "totalEmployees": total_employees,
-                    "totalNewHires": total_new_hires,
-                    "turnoverRate": turnover_rate,
-                    "averageSalary": avg_salary
-                }
-            }
+            "Data": snapshot.employee_stats(year),
+            "AsOf": snapshot.as_of
         }
 
+    except CircuitOpenError:
+        logger.warning("SQL Server unavailable, using demo employee statistics")
+        return {
+            "Status": True,
+            "Data": DEMO_EMPLOYEE_STATS
+        }
     except HTTPException as he:
         raise he
     except Exception as e:
@@ -173,8 +154,6 @@ async def get_employee_stats_mysql(year: int, request: Request):
             FROM employee
         """
 
-        stats_results = await execute_mysql_query(stats_query, (year, year))
-
         # Get department counts from MySQL
         dept_query = """
             SELECT d.DepartmentName as name, COUNT(e.EmployeeID) as count
@@ -184,7 +163,21 @@ async def get_employee_stats_mysql(year: int, request: Request):
             ORDER BY count DESC
         """
 
-        dept_results = await execute_mysql_query(dept_query)
+        # The two queries are independent; run them side by side
+        sections = await fan_out({
+            "overall": lambda: execute_mysql_query(stats_query, (year, year)),
+            "byDepartment": lambda: execute_mysql_query(dept_query),
+        })
+        sections.raise_if_all_failed()
+        if not sections.ok("overall"):
+            return {
+                "Status": True,
+                "Data": {**DEMO_EMPLOYEE_STATS, "byDepartment": sections.get("byDepartment") or []}
+            }
+        if not sections.ok("byDepartment"):
+            logger.warning("Department counts unavailable, using demo values")
+        stats_results = sections.get("overall")
+        dept_results = sections.get("byDepartment", DEMO_EMPLOYEE_STATS["byDepartment"])
 
         # Format results
         total_employees = stats_results[0]["TotalEmployees"] if stats_results else 0
@@ -206,6 +199,12 @@ async def get_employee_stats_mysql(year: int, request: Request):
             }
         }
 
+    except CircuitOpenError:
+        logger.warning("MySQL unavailable, using demo employee statistics")
+        return {
+            "Status": True,
+            "Data": DEMO_EMPLOYEE_STATS
+        }
     except HTTPException as he:
         raise he
     except Exception as e:
@@ -231,41 +230,13 @@ async def get_salary_stats(year: int, request: Request):
                 "Data": DEMO_SALARY_STATS
             }
 
-        await check_db_connection()
         logger.info(f"Getting salary statistics for year {year}")
-
-        # Sample SQL Server query for salary stats
-        query = """
-            SELECT 
-                SUM(Salary) as TotalPayroll,
-                AVG(Salary) as AverageSalary,
-                MAX(Salary) as HighestSalary,
-                SUM(Salary) * 0.1 as TotalBonuses  -- Just a placeholder calculation
-            FROM [HUMAN].[dbo].[Employees]
-            WHERE Status = 'Active'
-        """
-
-        results = await execute_sqlserver_query(query)
-
-        if not results:
-            return {
-                "Status": True,
-                "Data": {
-                    "totalPayroll": 0,
-                    "averageSalary": 0,
-                    "highestSalary": 0,
-                    "totalBonuses": 0
-                }
-            }
+        snapshot = await report_store.get()
 
         return {
             "Status": True,
-            "Data": {
-                "totalPayroll": results[0]["TotalPayroll"] or 0,
-                "averageSalary": results[0]["AverageSalary"] or 0,
-                "highestSalary": results[0]["HighestSalary"] or 0,
-                "totalBonuses": results[0]["TotalBonuses"] or 0
-            }
+            "Data": snapshot.salary_stats(),
+            "AsOf": snapshot.as_of
         }
 
     except Exception as e:
@@ -349,82 +320,13 @@ async def get_organization_stats(request: Request):
                 "Data": DEMO_ORGANIZATION_STATS
             }
 
-        await check_db_connection()
         logger.info("Getting organization structure statistics")
-
-        # Get department stats
-        dept_query = """
-            SELECT 
-                COUNT(DepartmentID) as TotalDepartments,
-                AVG(EmployeeCount) as AvgEmployeesPerDepartment,
-                (SELECT TOP 1 DepartmentName FROM [HUMAN].[dbo].[Departments] ORDER BY EmployeeCount DESC) as LargestDepartment,
-                (SELECT TOP 1 DepartmentName FROM [HUMAN].[dbo].[Departments] WHERE EmployeeCount > 0 ORDER BY EmployeeCount ASC) as SmallestDepartment
-            FROM [HUMAN].[dbo].[Departments]
-        """
-
-        dept_results = await execute_sqlserver_query(dept_query)
-
-        # Get structure stats
-        structure_query = """
-            SELECT 
-                SUM(CASE WHEN JobTitle LIKE '%Manager%' THEN 1 ELSE 0 END) as TotalManagers,
-                CAST(SUM(CASE WHEN JobTitle LIKE '%Manager%' THEN 1 ELSE 0 END) AS FLOAT) / 
-                NULLIF(COUNT(*), 0) as ManagerToEmployeeRatio,
-                COUNT(*) / NULLIF(SUM(CASE WHEN JobTitle LIKE '%Manager%' THEN 1 ELSE 0 END), 0) as AvgTeamSize
-            FROM [HUMAN].[dbo].[Employees]
-            WHERE Status = 'Active'
-        """
-
-        structure_results = await execute_sqlserver_query(structure_query)
-
-        # Get gender stats
-        gender_query = """
-            SELECT 
-                SUM(CASE WHEN Gender = 'Male' THEN 1 ELSE 0 END) * 100.0 / COUNT(*) as Male,
-                SUM(CASE WHEN Gender = 'Female' THEN 1 ELSE 0 END) * 100.0 / COUNT(*) as Female
-            FROM [HUMAN].[dbo].[Employees]
-            WHERE Status = 'Active'
-        """
-
-        gender_results = await execute_sqlserver_query(gender_query)
-
-        # Format results
-        total_departments = dept_results[0]["TotalDepartments"] if dept_results else 0
-        avg_employees_per_dept = round(
-            dept_results[0]["AvgEmployeesPerDepartment"] or 0, 1) if dept_results else 0
-        largest_department = dept_results[0]["LargestDepartment"] if dept_results else ""
-        smallest_department = dept_results[0]["SmallestDepartment"] if dept_results else ""
-
-        total_managers = structure_results[0]["TotalManagers"] if structure_results else 0
-        manager_ratio = round(
-            structure_results[0]["ManagerToEmployeeRatio"] or 0, 2) if structure_results else 0
-        avg_team_size = round(
-            structure_results[0]["AvgTeamSize"] or 0, 1) if structure_results else 0
-
-        male_percentage = round(
-            gender_results[0]["Male"] or 0, 0) if gender_results else 0
-        female_percentage = round(
-            gender_results[0]["Female"] or 0, 0) if gender_results else 0
+        snapshot = await report_store.get()
 
         return {
             "Status": True,
-            "Data": {
-                "departments": {
-                    "totalDepartments": total_departments,
-                    "avgEmployeesPerDepartment": avg_employees_per_dept,
-                    "largestDepartment": largest_department,
-                    "smallestDepartment": smallest_department
-                },
-                "structure": {
-                    "totalManagers": total_managers,
-                    "managerToEmployeeRatio": manager_ratio,
-                    "avgTeamSize": avg_team_size
-                },
-                "gender": {
-                    "male": male_percentage,
-                    "female": female_percentage
-                }
-            }
+            "Data": snapshot.organization_stats(),
+            "AsOf": snapshot.as_of
         }
 
     except Exception as e:
@@ -461,30 +363,26 @@ async def get_organization_stats_mysql(request: Request):
             FROM department
         """
 
-        dept_results = await execute_mysql_query(dept_query)
-
-        # Get structure stats from MySQL
-        structure_query = """
+        # Manager and gender figures come from the same rows: one query
+        workforce_query = """
             SELECT 
                 SUM(CASE WHEN JobTitle LIKE '%Manager%' THEN 1 ELSE 0 END) as TotalManagers,
                 SUM(CASE WHEN JobTitle LIKE '%Manager%' THEN 1 ELSE 0 END) / COUNT(*) as ManagerToEmployeeRatio,
-                COUNT(*) / NULLIF(SUM(CASE WHEN JobTitle LIKE '%Manager%' THEN 1 ELSE 0 END), 0) as AvgTeamSize
-            FROM employee
-            WHERE Status = 'Active'
-        """
-
-        structure_results = await execute_mysql_query(structure_query)
-
-        # Get gender stats from MySQL
-        gender_query = """
-            SELECT 
+                COUNT(*) / NULLIF(SUM(CASE WHEN JobTitle LIKE '%Manager%' THEN 1 ELSE 0 END), 0) as AvgTeamSize,
                 SUM(CASE WHEN Gender = 'Male' THEN 1 ELSE 0 END) * 100.0 / COUNT(*) as Male,
                 SUM(CASE WHEN Gender = 'Female' THEN 1 ELSE 0 END) * 100.0 / COUNT(*) as Female
             FROM employee
             WHERE Status = 'Active'
         """
 
-        gender_results = await execute_mysql_query(gender_query)
+        # The department and workforce queries are independent; run them side by side
+        sections = await fan_out({
+            "departments": lambda: execute_mysql_query(dept_query),
+            "workforce": lambda: execute_mysql_query(workforce_query),
+        })
+        sections.raise_if_all_failed()
+        dept_results = sections.get("departments")
+        structure_results = gender_results = sections.get("workforce")
 
         # Format results
         total_departments = dept_results[0]["TotalDepartments"] if dept_results else 0
@@ -504,25 +402,33 @@ async def get_organization_stats_mysql(request: Request):
         female_percentage = round(
             float(gender_results[0]["Female"] or 0), 0) if gender_results else 0
 
+        data = {
+            "departments": {
+                "totalDepartments": total_departments,
+                "avgEmployeesPerDepartment": avg_employees_per_dept,
+                "largestDepartment": largest_department,
+                "smallestDepartment": smallest_department
+            },
+            "structure": {
+                "totalManagers": total_managers,
+                "managerToEmployeeRatio": manager_ratio,
+                "avgTeamSize": avg_team_size
+            },
+            "gender": {
+                "male": male_percentage,
+                "female": female_percentage
+            }
+        }
+        # A failed query's sections fall back to demo values, as a full failure does
+        if not sections.ok("departments"):
+            data["departments"] = DEMO_ORGANIZATION_STATS["departments"]
+        if not sections.ok("workforce"):
+            data["structure"] = DEMO_ORGANIZATION_STATS["structure"]
+            data["gender"] = DEMO_ORGANIZATION_STATS["gender"]
+
         return {
             "Status": True,
-            "Data": {
-                "departments": {
-                    "totalDepartments": total_departments,
-                    "avgEmployeesPerDepartment": avg_employees_per_dept,
-                    "largestDepartment": largest_department,
-                    "smallestDepartment": smallest_department
-                },
-                "structure": {
-                    "totalManagers": total_managers,
-                    "managerToEmployeeRatio": manager_ratio,
-                    "avgTeamSize": avg_team_size
-                },
-                "gender": {
-                    "male": male_percentage,
-                    "female": female_percentage
-                }
-            }
+            "Data": data
         }
 
     except Exception as e:
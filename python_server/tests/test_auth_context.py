@@ -0,0 +1,109 @@
+import os
+import sys
+
+from fastapi import APIRouter, Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from middleware import auth
+from middleware.api_auth import admin_only, protect_employee_endpoint, protect_payroll_endpoint
+from middleware.auth import (ADMIN_AREA, ALLOW, DENY, EMPLOYEE_DATA, PAYROLL_DATA, PERMISSION_MATRIX,
+                             SELF_ONLY, Roles, TokenCache, verify_token)
+from routes.auth_route import generate_token
+
+
+class CountingTokenCache(TokenCache):
+    def __init__(self):
+        super().__init__()
+        self.verifications = 0
+
+    def verify(self, token):
+        self.verifications += 1
+        return super().verify(token)
+
+
+def stacked_app():
+    """Router- and route-level auth dependencies, stacked like main.py does"""
+    router = APIRouter()
+
+    @router.get("/{employee_id}", dependencies=[Depends(verify_token),
+                                                Depends(protect_employee_endpoint("employee_id")),
+                                                Depends(protect_payroll_endpoint("employee_id"))])
+    async def get_employee(employee_id: str, request: Request):
+        return {"self_only": getattr(request.state, "self_only", False)}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/employees",
+                       dependencies=[Depends(protect_employee_endpoint())])
+    return app
+
+
+def headers_for(user_id, role):
+    token = generate_token({"UserID": user_id, "Username": "tester", "Role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_stacked_dependencies_verify_the_token_once(monkeypatch):
+    cache = CountingTokenCache()
+    monkeypatch.setattr(auth, "token_cache", cache)
+    client = TestClient(stacked_app())
+
+    response = client.get("/employees/7", headers=headers_for(7, Roles.EMPLOYEE))
+
+    assert response.status_code == 200
+    assert response.json() == {"self_only": True}
+    assert cache.verifications == 1
+
+
+def test_denied_requests_still_verify_once(monkeypatch):
+    cache = CountingTokenCache()
+    monkeypatch.setattr(auth, "token_cache", cache)
+    client = TestClient(stacked_app())
+
+    response = client.get("/employees/8", headers=headers_for(7, Roles.EMPLOYEE))
+
+    assert response.status_code == 403
+    assert response.json()["detail"]["Message"] == "You can only access your own data"
+    assert cache.verifications == 1
+
+
+def test_matrix_matches_role_rules():
+    expected = {
+        # role: employee read/write, payroll read/write, admin area
+        Roles.ADMIN: (ALLOW, ALLOW, ALLOW, ALLOW, ALLOW),
+        Roles.HR_MANAGER: (ALLOW, ALLOW, ALLOW, DENY, DENY),
+        Roles.PAYROLL_MANAGER: (ALLOW, DENY, ALLOW, ALLOW, DENY),
+        Roles.EMPLOYEE: (SELF_ONLY, SELF_ONLY, SELF_ONLY, SELF_ONLY, DENY),
+    }
+    for role, decisions in expected.items():
+        actual = (PERMISSION_MATRIX[(role, EMPLOYEE_DATA, True)],
+                  PERMISSION_MATRIX[(role, EMPLOYEE_DATA, False)],
+                  PERMISSION_MATRIX[(role, PAYROLL_DATA, True)],
+                  PERMISSION_MATRIX[(role, PAYROLL_DATA, False)],
+                  PERMISSION_MATRIX[(role, ADMIN_AREA, True)])
+        assert actual == decisions, role
+
+
+def test_write_denials_keep_their_messages(monkeypatch):
+    monkeypatch.setattr(auth, "token_cache", TokenCache())
+    app = FastAPI()
+
+    @app.put("/payroll", dependencies=[Depends(protect_payroll_endpoint())])
+    async def update_payroll():
+        return {}
+
+    @app.get("/admin", dependencies=[Depends(admin_only())])
+    async def admin_area():
+        return {}
+
+    client = TestClient(app)
+    hr = headers_for(2, Roles.HR_MANAGER)
+    unknown = headers_for(3, "User")
+
+    assert client.put("/payroll", headers=hr).json()["detail"]["Message"] == \
+        "HR Manager cannot modify payroll data"
+    assert client.get("/admin", headers=hr).json()["detail"]["Message"] == \
+        "Only Admin can access this endpoint"
+    assert client.put("/payroll", headers=unknown).status_code == 403
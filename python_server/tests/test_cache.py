@@ -0,0 +1,112 @@
+import asyncio
+import os
+import sys
+from datetime import date
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cache import (PAYROLL_ALL_MONTHS_TAG, Cache, InvalidationBus, MemoryBackend, cache_key,
+                         employee_tag, payroll_month_tag)
+
+
+def test_memory_backend_evicts_least_recently_used():
+    async def scenario():
+        cache = Cache("lru", MemoryBackend(max_entries=2))
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        await cache.get("a")
+        await cache.set("c", 3)
+        return [await cache.get(key) for key in ("a", "b", "c")], cache.stats()
+
+    values, stats = asyncio.run(scenario())
+    assert values == [1, None, 3]
+    assert stats["evictions"] == 1
+    assert stats["size"] == 2
+
+
+def test_entries_expire_after_their_ttl():
+    async def scenario():
+        cache = Cache("ttl", MemoryBackend(), default_ttl=0.01)
+        await cache.set("a", 1)
+        await asyncio.sleep(0.02)
+        return await cache.get("a"), cache.stats()["expirations"]
+
+    assert asyncio.run(scenario()) == (None, 1)
+
+
+def test_concurrent_misses_share_one_load():
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"rows": 42}
+
+    async def scenario():
+        cache = Cache("flight", MemoryBackend())
+        results = await asyncio.gather(*(cache.get_or_load("k", load) for _ in range(10)))
+        return results, cache.stats()
+
+    results, stats = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(result == {"rows": 42} for result in results)
+    assert stats["coalesced"] == 9
+
+
+def test_load_errors_reach_every_waiter_and_are_not_cached():
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("database down")
+
+    async def scenario():
+        cache = Cache("errors", MemoryBackend())
+        outcomes = await asyncio.gather(*(cache.get_or_load("k", fail) for _ in range(3)),
+                                        return_exceptions=True)
+        await asyncio.gather(cache.get_or_load("k", fail), return_exceptions=True)
+        return outcomes
+
+    outcomes = asyncio.run(scenario())
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    assert len(calls) == 2
+
+
+def test_cache_keys_separate_scopes_and_ignore_parameter_order():
+    full = cache_key("salary-list", month="2025-03")
+    own = cache_key("salary-list", scope="employee:E001", month="2025-03")
+
+    assert full != own
+    assert cache_key("report", a=1, b=2) == cache_key("report", b=2, a=1)
+
+
+def test_invalidation_drops_only_tagged_entries():
+    async def scenario():
+        bus = InvalidationBus()
+        cache = Cache("tags", MemoryBackend())
+        bus.subscribe(cache.invalidate)
+        await cache.set("march", 1, tags=(payroll_month_tag("2025-03"), PAYROLL_ALL_MONTHS_TAG))
+        await cache.set("april", 2, tags=(payroll_month_tag(date(2025, 4, 9)),))
+        await cache.set("history", 3, tags=(employee_tag("E001"),))
+
+        await bus.publish(payroll_month_tag("2025-03"), employee_tag("E001"))
+        return [await cache.get(key) for key in ("march", "april", "history")]
+
+    assert asyncio.run(scenario()) == [None, 2, None]
+
+
+def test_value_loaded_across_an_invalidation_is_not_stored():
+    async def scenario():
+        cache = Cache("race", MemoryBackend())
+
+        async def load():
+            # A mutation commits and publishes while the old data is in flight
+            await cache.invalidate({"payroll"})
+            return "stale"
+
+        first = await cache.get_or_load("k", load, tags=("payroll",))
+        return first, await cache.get("k")
+
+    assert asyncio.run(scenario()) == ("stale", None)
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import routes.auth_route as auth_route
+from main import app
+from middleware import auth
+from middleware.auth import TokenCache
+from routes.auth_route import generate_token
+
+USER = {"UserID": 5, "Username": "hr", "Role": "HR Manager", "Status": 1}
+ADMIN = {"UserID": 1, "Username": "admin", "Role": "Admin", "Status": 1}
+
+
+@pytest.fixture
+def user_table(monkeypatch):
+    """In-memory user table; records every query run against it"""
+    users = {USER["UserID"]: dict(USER)}
+    queries = []
+
+    async def fake_execute(query, params=None):
+        queries.append(query)
+        if query.startswith("UPDATE user SET Role"):
+            users[params[-1]]["Role"] = params[0]
+            return []
+        user = users.get(params[0])
+        return [dict(user)] if user else []
+
+    monkeypatch.setattr(auth_route, "execute_mysql_query", fake_execute)
+    monkeypatch.setattr(auth, "token_cache", TokenCache())
+    asyncio.run(auth_route.user_profile_cache.clear())
+    return queries
+
+
+def check_auth(token):
+    client = TestClient(app, cookies={"token": token})
+    return client.get("/auth/check-auth")
+
+
+def test_profile_is_read_once_per_user(user_table):
+    token = generate_token(USER)
+
+    first, second = check_auth(token), check_auth(token)
+
+    assert first.status_code == second.status_code == 200
+    assert second.json()["Data"] == USER
+    assert len(user_table) == 1
+
+
+def test_role_change_drops_profile_and_revokes_tokens(user_table):
+    old_token = generate_token(USER)
+    assert check_auth(old_token).json()["Data"]["Role"] == "HR Manager"
+
+    admin = TestClient(app, headers={"Authorization": f"Bearer {generate_token(ADMIN)}"})
+    response = admin.put(f"/auth/users/{USER['UserID']}", json={"role": "Employee"})
+    assert response.status_code == 200
+
+    assert check_auth(old_token).status_code == 401
+    fresh = check_auth(generate_token({**USER, "Role": "Employee"}))
+    assert fresh.json()["Data"]["Role"] == "Employee"
+    assert sum(query.startswith("SELECT") for query in user_table) == 2
+
+
+def test_update_rejects_unknown_roles(user_table):
+    admin = TestClient(app, headers={"Authorization": f"Bearer {generate_token(ADMIN)}"})
+
+    response = admin.put(f"/auth/users/{USER['UserID']}", json={"role": "Owner"})
+
+    assert response.status_code == 400
+    assert user_table == []
+
+
+def test_embedded_profile_needs_no_database(user_table, monkeypatch):
+    monkeypatch.setattr(auth_route, "TOKEN_EMBED_PROFILE", True)
+
+    response = check_auth(generate_token(USER))
+
+    assert response.json()["Data"] == USER
+    assert user_table == []
+
+
+def test_payroll_manager_role_can_be_assigned(user_table):
+    admin = TestClient(app, headers={"Authorization": f"Bearer {generate_token(ADMIN)}"})
+
+    response = admin.put(f"/auth/users/{USER['UserID']}", json={"role": "Payroll Manager"})
+
+    assert response.status_code == 200
+    assert "Payroll Manager" in admin.get("/auth/roles").json()["Data"]
@@ -0,0 +1,92 @@
+import asyncio
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import routes.dashboard_route as dashboard_route
+from main import app
+from middleware import auth
+from middleware.auth import TokenCache
+from routes.auth_route import generate_token
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """Stub loaders behind every dashboard section; counts their calls"""
+    calls = []
+
+    def stub(name, data):
+        async def handler(*args):
+            calls.append(name)
+            return {"Status": True, "Data": data}
+        return handler
+
+    async def profile(user_id):
+        calls.append("profile")
+        return {"UserID": user_id}
+
+    async def broken_organization(*args):
+        raise RuntimeError("organization query failed")
+
+    reports = {"employees": stub("employees", {"overall": {"totalEmployees": 10}}),
+               "salary": stub("salary", {"totalPayroll": 500}),
+               "organization": stub("organization", {"departments": {}})}
+    monkeypatch.setitem(dashboard_route.SOURCES, "sqlserver", reports)
+    monkeypatch.setitem(dashboard_route.SOURCES, "mysql", {**reports, "organization": broken_organization})
+    monkeypatch.setattr(dashboard_route, "get_user_profile", profile)
+    monkeypatch.setattr(dashboard_route.attendance_route, "get_attendance_summary",
+                        stub("attendance", {"overallStats": {"AveragePresentRate": 90.0}}))
+    monkeypatch.setattr(dashboard_route.alerts_route, "get_work_anniversaries", stub("anniversaries", [1, 2]))
+    monkeypatch.setattr(dashboard_route.alerts_route, "get_leave_violations", stub("violations", []))
+    monkeypatch.setattr(auth, "token_cache", TokenCache())
+    asyncio.run(dashboard_route.dashboard_cache.clear())
+    return calls
+
+
+def bootstrap(role, **params):
+    token = generate_token({"UserID": 3, "Username": "user", "Role": role})
+    client = TestClient(app, headers={"Authorization": f"Bearer {token}"})
+    return client.get("/dashboard/bootstrap", params=params)
+
+
+@pytest.mark.parametrize("role, sections", [
+    ("Admin", {"profile", "employees", "organization", "attendance", "alerts", "salary"}),
+    ("HR Manager", {"profile", "employees", "organization", "attendance", "alerts", "salary"}),
+    ("Payroll Manager", {"profile", "employees", "organization", "attendance", "alerts", "salary"}),
+    ("Employee", {"profile"}),
+])
+def test_bundle_follows_the_role(backend, role, sections):
+    response = bootstrap(role)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body["Data"]) == sections
+    assert set(body["Timings"]) == sections
+    assert body["Unavailable"] == []
+
+
+def test_sections_load_once_and_shared_pieces_are_cached(backend):
+    first = bootstrap("Admin").json()
+    bootstrap("Admin")
+
+    assert first["Data"]["alerts"] == {"workAnniversaries": 2, "leaveViolations": 0}
+    assert first["Data"]["attendance"]["overallStats"]["AveragePresentRate"] == 90.0
+    assert backend.count("attendance") == backend.count("anniversaries") == 1
+    assert backend.count("employees") == 2
+
+
+def test_failed_section_is_reported_not_fatal(backend):
+    body = bootstrap("Admin", source="mysql").json()
+
+    assert body["Data"]["organization"] is None
+    assert body["Unavailable"] == ["organization"]
+    assert body["Data"]["salary"] == {"totalPayroll": 500}
+
+
+def test_unknown_source_is_rejected(backend):
+    assert bootstrap("Admin", source="oracle").status_code == 400
@@ -0,0 +1,174 @@
+import asyncio
+import os
+import re
+import sqlite3
+import sys
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.salary_dataset import to_sqlite
+from routes import alerts_route, attendance_route, payroll_route
+from utils import payroll_engine
+from utils.dates import current_month_window, month_window, parse_month
+from utils.db import RowSet
+
+MIGRATION = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         "migrations", "sqlserver", "0002_date_range_indexes.up.sql")
+
+SCHEMA = """
+    CREATE TABLE Departments (DepartmentID INTEGER PRIMARY KEY, DepartmentName TEXT);
+    CREATE TABLE Positions (PositionID INTEGER PRIMARY KEY, PositionName TEXT);
+    CREATE TABLE Employees (
+        EmployeeID TEXT PRIMARY KEY, FullName TEXT, Salary INTEGER,
+        DepartmentID INTEGER, PositionID INTEGER);
+    CREATE TABLE Attendance (
+        AttendanceID INTEGER PRIMARY KEY, EmployeeID TEXT, Date TEXT, CheckIn TEXT,
+        CheckOut TEXT, Status TEXT, WorkHours REAL, LateMinutes INTEGER, Overtime REAL);
+    CREATE TABLE Dividends (
+        DividendID INTEGER PRIMARY KEY, EmployeeID TEXT, DividendAmount INTEGER,
+        DividendDate TEXT);
+    CREATE TABLE Deductions (
+        DeductionID INTEGER PRIMARY KEY, EmployeeID TEXT, Amount INTEGER,
+        DeductionDate TEXT);
+    CREATE TABLE Allowances (
+        AllowanceID INTEGER PRIMARY KEY, EmployeeID TEXT, Amount INTEGER,
+        AllowanceDate TEXT);
+    CREATE TABLE Bonuses (
+        BonusID INTEGER PRIMARY KEY, EmployeeID TEXT, BonusAmount INTEGER, BonusDate TEXT);
+"""
+
+INDEX_PATTERN = re.compile(
+    r"CREATE INDEX (\w+)\s+ON \[HUMAN\]\.\[dbo\]\.\[(\w+)\] \(([^)]*)\)"
+    r"(?:\s+INCLUDE \(([^)]*)\))?")
+
+# Month windows
+
+
+def test_month_window_is_half_open():
+    assert month_window(2024, 2) == (date(2024, 2, 1), date(2024, 3, 1))
+    assert month_window(2025, 12) == (date(2025, 12, 1), date(2026, 1, 1))
+    assert current_month_window(date(2025, 3, 31)) == (date(2025, 3, 1), date(2025, 4, 1))
+
+
+def test_parse_month_rejects_other_formats():
+    assert parse_month("2024-02") == (date(2024, 2, 1), date(2024, 3, 1))
+    for month in ("2024-2", "2024-13", "March", "2024-02-01"):
+        with pytest.raises(ValueError):
+            parse_month(month)
+
+# Query plans
+#
+# The month-filtered queries are captured from the routes and planned by
+# SQLite against the indexes of the migration (INCLUDE columns become
+# trailing key columns). Automatic indexes are off so the plan shows what
+# the real indexes allow.
+
+
+@pytest.fixture
+def planner():
+    db = sqlite3.connect(":memory:")
+    db.executescript(SCHEMA)
+    db.execute("PRAGMA automatic_index = OFF")
+    with open(MIGRATION) as migration:
+        for name, table, keys, include in INDEX_PATTERN.findall(migration.read()):
+            columns = keys + (", " + include if include else "")
+            db.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+
+    def plan(query, params):
+        params = {name: value.isoformat() if isinstance(value, date) else value
+                  for name, value in params.items()}
+        # SQLite has no grouping sets; the plan of the finest grouping is the same
+        query = re.sub(r"GROUPING SETS \(\(([\w.]+)\), \(\)\)", r"\1", to_sqlite(query))
+        query = re.sub(r"GROUPING\([\w.]+\)", "0", query)
+        return [row[3] for row in db.execute("EXPLAIN QUERY PLAN " + query, params)]
+
+    yield plan
+    db.close()
+
+
+@pytest.fixture
+def captured(monkeypatch):
+    """Queries the routes send to SQL Server, answered with no rows"""
+    calls = []
+
+    async def fake_execute(query, params=None, **kwargs):
+        calls.append((query, params))
+        if "GROUPING SETS" in query:
+            # The attendance summary always has one overall row
+            return [{"Department": None, "IsOverall": 1, "TotalEmployees": 0,
+                     "TotalPresent": 0, "TotalAbsent": 0, "TotalLate": 0}]
+        return []
+
+    def fake_stream(query, params=None, **kwargs):
+        calls.append((query, params))
+
+        async def batches():
+            yield RowSet([], [])
+        return batches()
+
+    async def no_ledger(year, month):
+        raise RuntimeError("ledger not migrated")
+
+    for module in (attendance_route, alerts_route, payroll_route):
+        monkeypatch.setattr(module, "execute_sqlserver_query", fake_execute)
+    monkeypatch.setattr(attendance_route, "stream_sqlserver_query", fake_stream)
+    monkeypatch.setattr(payroll_route.payroll_ledger, "read_month", no_ledger)
+    return calls
+
+
+def _route_queries(captured):
+    asyncio.run(attendance_route.get_daily_attendance(2025, 3, "objects", None, None, False))
+    asyncio.run(attendance_route.get_monthly_attendance(2025, 3))
+    asyncio.run(attendance_route.get_attendance_summary(2025, 3))
+    asyncio.run(alerts_route.get_leave_violations())
+    asyncio.run(payroll_route.get_monthly_payroll(SimpleNamespace(state=SimpleNamespace()), 2025, 3))
+    return list(captured)
+
+
+def test_month_filters_do_not_wrap_date_columns(captured):
+    queries = _route_queries(captured)
+
+    assert len(queries) == 5
+    for query, params in queries:
+        assert not re.search(r"\b(YEAR|MONTH|FORMAT)\(", query)
+        assert params["MonthEnd"] > params["MonthStart"]
+
+
+def test_attendance_month_filters_seek_the_date_index(captured, planner):
+    attendance_queries = [(query, params) for query, params in _route_queries(captured)
+                          if "[Attendance]" in query]
+
+    assert len(attendance_queries) == 4
+    for query, params in attendance_queries:
+        steps = planner(query, params)
+        assert any(step.startswith("SEARCH a USING")
+                   and "IX_Attendance_Date_Employee (Date>? AND Date<?)" in step
+                   for step in steps), steps
+
+
+def test_function_wrapped_dates_scan_the_table(planner):
+    query = """
+        SELECT a.AttendanceID FROM [HUMAN].[dbo].[Attendance] a
+        WHERE strftime('%Y', a.Date) = @Year AND strftime('%m', a.Date) = @Month
+    """
+    steps = planner(query, {"Year": "2025", "Month": "03"})
+
+    assert any(step.startswith("SCAN a") for step in steps), steps
+
+
+def test_payroll_aggregates_read_only_the_covering_indexes(captured, planner):
+    monthly = [(query, params) for query, params in _route_queries(captured)
+               if "[Bonuses]" in query]
+    salary = payroll_engine.salary_query("2025-03")
+
+    assert len(monthly) == 1
+    for query, params in monthly + [salary]:
+        steps = " ".join(planner(query, params))
+        assert "Deductions USING COVERING INDEX IX_Deductions_Employee_Date" in steps, steps
+    steps = " ".join(planner(*monthly[0]))
+    assert "Bonuses USING COVERING INDEX IX_Bonuses_Employee_Date" in steps, steps
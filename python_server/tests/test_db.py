@@ -0,0 +1,193 @@
+import asyncio
+import json
+import os
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import db
+from utils.db import RowSet, bind_named_params, compile_named_query
+from utils.pagination import Keyset
+from utils.responses import rowset_response, stream_rowset_response
+
+# Named parameter compilation
+
+
+def test_repeated_parameters_are_bound_in_placeholder_order():
+    query = "SELECT * FROM t WHERE a = @Month AND b = @EmployeeID OR c = @Month"
+    sql, args = bind_named_params(query, {"EmployeeID": "E001", "Month": "2025-03"})
+
+    assert sql == "SELECT * FROM t WHERE a = ? AND b = ? OR c = ?"
+    assert args == ("2025-03", "E001", "2025-03")
+
+
+def test_prefix_collisions_are_not_rewritten():
+    query = "WHERE d >= @Year AND d < @YearEnd"
+    sql, args = bind_named_params(query, {"Year": 2024, "YearEnd": 2025})
+
+    assert sql == "WHERE d >= ? AND d < ?"
+    assert args == (2024, 2025)
+
+
+def test_literals_comments_and_system_functions_are_left_alone():
+    query = (
+        "SELECT @@VERSION, '@Name' AS literal, [@Name] -- @Name\n"
+        "FROM t /* @Name */ WHERE x = @Name AND y = @Declared"
+    )
+    sql, args = bind_named_params(query, {"Name": "a"})
+
+    assert sql == (
+        "SELECT @@VERSION, '@Name' AS literal, [@Name] -- @Name\n"
+        "FROM t /* @Name */ WHERE x = ? AND y = @Declared"
+    )
+    assert args == ("a",)
+
+
+def test_compiled_queries_are_cached():
+    query = "SELECT * FROM cached WHERE id = @ID"
+    compile_named_query.cache_clear()
+
+    bind_named_params(query, {"ID": 1})
+    bind_named_params(query, {"ID": 2})
+
+    info = compile_named_query.cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
+
+# Result sets
+
+
+def test_rowset_layouts():
+    rows = RowSet(["ID", "Name"], [(1, "a"), (2, "b")])
+
+    assert rows.to_dicts() == [{"ID": 1, "Name": "a"}, {"ID": 2, "Name": "b"}]
+    assert rows.to_columns() == {"ID": [1, 2], "Name": ["a", "b"]}
+    assert RowSet(["ID"], []).to_columns() == {"ID": []}
+
+
+def test_fast_json_objects_layout_matches_fastapi_encoding():
+    rows = RowSet(
+        ["Date", "CheckIn", "WorkHours", "Bonus", "Note"],
+        [(date(2025, 3, 1), datetime(2025, 3, 1, 8, 5), Decimal("8.25"), Decimal("100"), None)],
+    )
+    legacy = JSONResponse(jsonable_encoder({"Status": True, "Data": rows.to_dicts()})).body
+
+    assert rowset_response(rows).body == legacy
+    assert json.loads(rowset_response(rows, "rows").body)["Rows"] == [
+        ["2025-03-01", "2025-03-01T08:05:00", 8.25, 100, None]]
+
+
+def test_streamed_response_matches_buffered_body():
+    columns = ["ID", "Date"]
+    batches = [[(1, date(2025, 3, 1)), (2, date(2025, 3, 2))], [(3, date(2025, 3, 3))]]
+
+    async def rowsets():
+        for rows in batches:
+            yield RowSet(columns, rows)
+
+    async def collect(result_format):
+        response = await stream_rowset_response(rowsets(), result_format)
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    everything = RowSet(columns, batches[0] + batches[1])
+    assert asyncio.run(collect("objects")) == rowset_response(everything).body
+    assert asyncio.run(collect("rows")) == rowset_response(everything, "rows").body
+    assert asyncio.run(collect("ndjson")).decode().splitlines()[-1] == '{"ID":3,"Date":"2025-03-03"}'
+
+# Keyset pagination
+
+
+def test_keyset_predicate_respects_sort_direction():
+    keyset = Keyset(("Date", "DESC"), ("EmployeeID", "ASC"))
+    predicate, params = keyset.after(["2025-03-02", "E010"])
+
+    assert keyset.order_by() == "[Date] DESC, [EmployeeID] ASC"
+    assert predicate == "([Date] < @Key0) OR ([Date] = @Key0 AND [EmployeeID] > @Key1)"
+    assert params == {"Key0": "2025-03-02", "Key1": "E010"}
+
+
+def test_keyset_cursor_round_trip_and_rejects_garbage():
+    keyset = Keyset(("EmployeeID", "ASC"), ("DividendID", "ASC", 0))
+    rows = RowSet(["EmployeeID", "DividendID"], [("E001", None)])
+
+    cursor = keyset.encode(rows, rows.rows[0])
+    assert keyset.decode(cursor) == ["E001", 0]
+
+    for garbage in ("not-a-cursor", keyset.encode(RowSet(["EmployeeID", "DividendID"], [([1], 2)]), ([1], 2))):
+        try:
+            keyset.decode(garbage)
+        except HTTPException as e:
+            assert e.status_code == 400
+        else:
+            raise AssertionError("cursor should be rejected")
+
+# Streaming
+
+
+class StreamCursor:
+    description = [("EmployeeID",)]
+
+    def __init__(self):
+        self.cancelled = False
+
+    def execute(self, query, *args):
+        pass
+
+    def fetchmany(self, size):
+        return [(f"E{i}",) for i in range(size)]
+
+    def cancel(self):
+        self.cancelled = True
+
+    def close(self):
+        pass
+
+
+class StreamConnection:
+    def __init__(self):
+        self.cursors = []
+
+    def cursor(self):
+        self.cursors.append(StreamCursor())
+        return self.cursors[-1]
+
+    def close(self):
+        pass
+
+
+def test_streams_use_their_own_pool_and_stalled_clients_are_cut_off(monkeypatch):
+    connections = []
+
+    def connect():
+        connections.append(StreamConnection())
+        return connections[-1]
+
+    async def scenario():
+        pool = db.ConnectionPool("stream", connect=connect, max_size=1)
+        monkeypatch.setattr(db, "sql_server_stream_pool", pool)
+        stream = db.stream_sqlserver_query("SELECT EmployeeID FROM Employees",
+                                           batch_size=2, max_duration=0.05)
+        first = await anext(stream)
+        # The client stops reading; the stream pool gets its connection back
+        await asyncio.sleep(0.1)
+        stats = pool.stats()
+        try:
+            await anext(stream)
+        except HTTPException as error:
+            status = error.status_code
+        await pool.close()
+        return first, stats, status
+
+    first, stats, status = asyncio.run(scenario())
+    assert first.rows == [("E0",), ("E1",)]
+    assert stats["inUse"] == 0
+    assert connections[0].cursors[0].cancelled
+    assert status == 504
+    assert db.sql_server_pool.stats()["inUse"] == 0
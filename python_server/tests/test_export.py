@@ -0,0 +1,117 @@
+import asyncio
+import csv
+import gzip
+import io
+import os
+import sys
+import zipfile
+from datetime import date
+from decimal import Decimal
+from xml.etree import ElementTree
+
+from fastapi.testclient import TestClient
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import routes.payroll_route as payroll_route
+from main import app
+from middleware import auth
+from middleware.auth import TokenCache
+from routes.auth_route import generate_token
+from utils.db import RowSet
+from utils.export import export_response
+
+COLUMNS = ["EmployeeID", "FullName", "HireDate", "NetSalary"]
+NS = {"x": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def batches_of(rows, size=1000):
+    async def batches():
+        for start in range(0, max(len(rows), 1), size):
+            yield RowSet(COLUMNS, rows[start:start + size])
+    return batches()
+
+
+def download(rows, export_format, **options):
+    """Run an export to completion; returns (response, body chunks)"""
+    async def scenario():
+        response = await export_response(batches_of(rows), export_format, "test", **options)
+        return response, [chunk async for chunk in response.body_iterator]
+    return asyncio.run(scenario())
+
+
+def sheet_rows(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as workbook:
+        assert "xl/workbook.xml" in workbook.namelist()
+        sheet = ElementTree.fromstring(workbook.read("xl/worksheets/sheet1.xml"))
+    return [[cell.findtext(".//x:t", namespaces=NS) or cell.findtext("x:v", namespaces=NS)
+             for cell in row.findall("x:c", NS)]
+            for row in sheet.iter(f"{{{NS['x']}}}row")]
+
+
+def test_csv_export_has_bom_header_and_iso_dates():
+    rows = [("E1", "Nguyễn Văn A", date(2024, 1, 2), Decimal("1500.50")), ("E2", None, None, 10)]
+    response, chunks = download(rows, "csv")
+
+    body = b"".join(chunks)
+    assert body.startswith(b"\xef\xbb\xbf")
+    assert list(csv.reader(io.StringIO(body[3:].decode("utf-8")))) == [
+        COLUMNS, ["E1", "Nguyễn Văn A", "2024-01-02", "1500.50"], ["E2", "", "", "10"]]
+    assert response.headers["content-disposition"] == 'attachment; filename="test.csv"'
+
+
+def test_gzip_csv_export_decompresses():
+    rows = [(f"E{i}", "Name", None, i) for i in range(3000)]
+    response, chunks = download(rows, "csv", gzip=True)
+
+    text = gzip.decompress(b"".join(chunks)).decode("utf-8-sig")
+    assert len(text.splitlines()) == 3001
+    assert response.headers["content-disposition"].endswith('test.csv.gz"')
+
+
+def test_xlsx_export_streams_a_valid_workbook():
+    rows = [(f"E{i}", "A & <B>", date(2024, 1, 1), i * 1.5) for i in range(20000)]
+    response, chunks = download(rows, "xlsx", sheet_name="Payroll 2024/01")
+
+    values = sheet_rows(b"".join(chunks))
+    assert len(chunks) > 10  # written batch by batch, not at the end
+    assert values[0] == COLUMNS
+    assert values[1] == ["E0", "A & <B>", "2024-01-01", "0.0"]
+    assert len(values) == 20001
+    assert response.media_type.endswith("spreadsheetml.sheet")
+
+
+def client_for(role):
+    token = generate_token({"UserID": 1, "Username": "user", "Role": role})
+    return TestClient(app, headers={"Authorization": f"Bearer {token}"})
+
+
+def test_payroll_export_checks_role_and_format(monkeypatch):
+    monkeypatch.setattr(auth, "token_cache", TokenCache())
+
+    assert client_for("Employee").get("/payroll/export/2025/3").status_code == 403
+    assert client_for("Admin").get("/payroll/export/2025/3?format=pdf").status_code == 400
+    assert client_for("Admin").get("/payroll/export/2025/3?format=xlsx&gzip=true").status_code == 400
+
+
+def test_payroll_export_falls_back_to_live_aggregate(monkeypatch):
+    queries = []
+
+    async def no_ledger(year, month, batch_size=None):
+        raise RuntimeError("ledger not migrated")
+
+    def fake_stream(query, params=None, batch_size=None):
+        queries.append(query)
+        return batches_of([("E1", "A", date(2025, 3, 1), 100)])
+
+    monkeypatch.setattr(auth, "token_cache", TokenCache())
+    monkeypatch.setattr(payroll_route.payroll_ledger, "stream_month", no_ledger)
+    monkeypatch.setattr(payroll_route, "stream_sqlserver_query", fake_stream)
+
+    response = client_for("Payroll Manager").get("/payroll/export/2025/3")
+
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="payroll-2025-03.csv"'
+    assert queries == [payroll_route.MONTHLY_PAYROLL_QUERY]
+    assert response.text.splitlines()[1] == "E1,A,2025-03-01,100"
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import routes.attendance_route as attendance_route
+import routes.reports_route as reports_route
+from utils.fanout import fan_out
+
+
+def sleeper(seconds, value=None, error=None):
+    async def call():
+        await asyncio.sleep(seconds)
+        if error:
+            raise error
+        return value
+    return call
+
+
+def test_calls_run_concurrently_within_the_limit():
+    in_flight = []
+    peak = []
+
+    def tracked():
+        async def call():
+            in_flight.append(1)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.05)
+            in_flight.pop()
+        return call
+
+    start = time.perf_counter()
+    outcome = asyncio.run(fan_out({str(i): tracked() for i in range(4)}, limit=2))
+    elapsed = time.perf_counter() - start
+
+    assert max(peak) == 2
+    assert 0.1 <= elapsed < 0.2
+    assert sorted(outcome.timings) == ["0", "1", "2", "3"]
+
+
+def test_failures_and_timeouts_do_not_sink_the_others():
+    outcome = asyncio.run(fan_out({
+        "fast": sleeper(0.01, value=[1]),
+        "broken": sleeper(0.01, error=RuntimeError("boom")),
+        "slow": sleeper(5),
+    }, timeout=0.1))
+
+    assert outcome.get("fast") == [1]
+    assert str(outcome.errors["broken"]) == "boom"
+    assert isinstance(outcome.errors["slow"], asyncio.TimeoutError)
+    outcome.raise_if_all_failed()
+
+
+def test_attendance_summary_splits_the_grouping_sets(monkeypatch):
+    queries = []
+
+    async def fake_execute(query, params=None):
+        queries.append(query)
+        return [
+            {"Department": "IT", "IsOverall": 0, "TotalEmployees": 4,
+             "TotalPresent": 2, "TotalAbsent": 1, "TotalLate": 1},
+            {"Department": None, "IsOverall": 0, "TotalEmployees": 1,
+             "TotalPresent": 1, "TotalAbsent": 0, "TotalLate": 0},
+            {"Department": None, "IsOverall": 1, "TotalEmployees": 5,
+             "TotalPresent": 3, "TotalAbsent": 1, "TotalLate": 1},
+        ]
+
+    monkeypatch.setattr(attendance_route, "execute_sqlserver_query", fake_execute)
+    data = asyncio.run(attendance_route.get_attendance_summary(2025, 3))["Data"]
+
+    assert len(queries) == 1
+    assert [stats["Department"] for stats in data["departmentStats"]] == ["IT"]
+    assert data["departmentStats"][0]["PresentRate"] == 50.0
+    assert "Department" not in data["overallStats"]
+    assert data["overallStats"]["AveragePresentRate"] == 60.0
+
+
+def test_organization_stats_keep_the_sections_that_loaded(monkeypatch):
+    async def fake_execute(query, params=None):
+        if "FROM department" in query:
+            raise RuntimeError("department table locked")
+        await asyncio.sleep(0.01)
+        return [{"TotalManagers": 2, "ManagerToEmployeeRatio": 0.25, "AvgTeamSize": 4,
+                 "Male": 50.0, "Female": 50.0}]
+
+    monkeypatch.setattr(reports_route, "execute_mysql_query", fake_execute)
+    monkeypatch.setattr(reports_route, "FORCE_DEMO_DATA", False)
+    data = asyncio.run(reports_route.get_organization_stats_mysql(None))["Data"]
+
+    assert data["departments"] == reports_route.DEMO_ORGANIZATION_STATS["departments"]
+    assert data["structure"] == {"totalManagers": 2, "managerToEmployeeRatio": 0.25, "avgTeamSize": 4}
+    assert data["gender"] == {"male": 50, "female": 50}
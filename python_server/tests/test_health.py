@@ -0,0 +1,130 @@
+import asyncio
+import os
+import sys
+import time
+from functools import partial
+
+import pytest
+from fastapi import HTTPException
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import routes.reports_route as reports_route
+from utils import db
+from utils.health import HealthMonitor
+
+
+def test_probes_run_concurrently_and_keep_bounded_history():
+    async def slow_probe():
+        await asyncio.sleep(0.05)
+        return {"status": "healthy", "version": "test"}
+
+    monitor = HealthMonitor({"a": slow_probe, "b": slow_probe}, history_size=2)
+
+    async def scenario():
+        start = time.perf_counter()
+        for _ in range(3):
+            await monitor.probe_all()
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(scenario())
+    status = monitor.status("a")
+    assert elapsed < 0.3
+    assert status["status"] == "healthy" and status["version"] == "test"
+    assert len(status["history"]) == 2
+
+
+def test_failing_and_hanging_probes_are_unhealthy():
+    async def failing():
+        raise RuntimeError("login failed")
+
+    async def hanging():
+        await asyncio.sleep(10)
+
+    monitor = HealthMonitor({"failing": failing, "hanging": hanging}, timeout=0.01)
+    asyncio.run(monitor.probe_all())
+
+    assert monitor.status("failing")["error"] == "login failed"
+    assert "timed out" in monitor.status("hanging")["error"]
+    assert not monitor.is_available("failing")
+    assert monitor.status("hanging")["consecutiveFailures"] == 1
+
+
+def test_report_check_reads_the_snapshot(monkeypatch):
+    calls = []
+
+    async def probe():
+        calls.append(1)
+        return {"status": "unhealthy", "error": "down"}
+
+    monitor = HealthMonitor({"sqlServer": probe})
+    monkeypatch.setattr(reports_route, "health_monitor", monitor)
+    monkeypatch.setattr(reports_route, "FORCE_DEMO_DATA", False)
+
+    # Not probed yet: the query gets to find out
+    asyncio.run(reports_route.check_db_connection())
+    asyncio.run(monitor.probe("sqlServer"))
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(reports_route.check_db_connection())
+
+    assert error.value.status_code == 503
+    assert len(calls) == 1
+
+
+class VersionConnection:
+    def cursor(self):
+        return self
+
+    def execute(self, query):
+        self.query = query
+
+    def fetchone(self):
+        return ("Test Server 1.0",)
+
+    def close(self):
+        pass
+
+
+def test_probes_reuse_pooled_connections():
+    opened = []
+
+    def connect():
+        opened.append(1)
+        return VersionConnection()
+
+    async def scenario():
+        pool = db.ConnectionPool("probe", connect=connect, max_size=2)
+        results = [await db._probe_pool(pool, "SELECT @@VERSION") for _ in range(3)]
+        stats = pool.stats()
+        await pool.close()
+        return results, stats
+
+    results, stats = asyncio.run(scenario())
+    assert results[-1] == {"status": "healthy", "version": "Test Server 1.0"}
+    assert len(opened) == 1
+    assert stats["inUse"] == 0
+
+
+def test_busy_pool_is_saturated_not_down(monkeypatch):
+    async def scenario():
+        pool = db.ConnectionPool("probe", connect=VersionConnection, max_size=1, checkout_timeout=10)
+        held = await pool.acquire()
+        monkeypatch.setattr(db, "sql_server_pool", pool)
+        monkeypatch.setattr(db, "FORCE_DEMO_DATA", False)
+        monitor = HealthMonitor({"sqlServer": partial(db.check_sqlserver_health_async, checkout_timeout=0.05)},
+                                timeout=1)
+        start = time.perf_counter()
+        await monitor.probe("sqlServer")
+        elapsed = time.perf_counter() - start
+        pool.release(held)
+        await pool.close()
+        return monitor, elapsed
+
+    monitor, elapsed = asyncio.run(scenario())
+    assert elapsed < 0.5
+    assert monitor.status("sqlServer")["status"] == "saturated"
+    assert monitor.is_available("sqlServer")
+    monkeypatch.setattr(reports_route, "health_monitor", monitor)
+    monkeypatch.setattr(reports_route, "FORCE_DEMO_DATA", False)
+    asyncio.run(reports_route.check_db_connection())
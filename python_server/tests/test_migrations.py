@@ -0,0 +1,117 @@
+import asyncio
+import os
+import re
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations import run_migrations
+from migrations.index_spec import INDEXES, IndexSpec
+from migrations.run_migrations import (MigrationTarget, apply, check, discover,
+                                       missing_indexes, rollback, split_statements)
+
+
+class MemoryTarget(MigrationTarget):
+    """Keeps the history in memory and records the scripts it runs"""
+
+    database = "sqlserver"
+
+    def __init__(self, existing_indexes=None):
+        self.history = {}
+        self.scripts = []
+        self.existing_indexes = existing_indexes or {}
+
+    async def ensure_history(self):
+        pass
+
+    async def applied(self):
+        return dict(self.history)
+
+    async def run_script(self, script):
+        self.scripts.append(script)
+
+    async def record(self, migration):
+        self.history[migration.version] = migration.checksum
+
+    async def forget(self, migration):
+        del self.history[migration.version]
+
+    async def indexes(self):
+        return self.existing_indexes
+
+
+def test_every_database_has_contiguous_migration_pairs():
+    for database in run_migrations.DATABASES:
+        versions = [migration.version for migration in discover(database)]
+        assert versions == list(range(1, len(versions) + 1)), database
+
+
+def test_declared_indexes_are_created_by_migrations():
+    for database, specs in INDEXES.items():
+        up_scripts = "\n".join(migration.up for migration in discover(database))
+        created = set(re.findall(r"(?:INDEX|KEY|CONSTRAINT)\s+(\w+)", up_scripts))
+        for spec in specs:
+            # InnoDB names the index behind a foreign key after its column
+            implied = (spec.columns == (spec.name,)
+                       and f"FOREIGN KEY ({spec.name})" in up_scripts)
+            assert spec.name in created or implied, (database, spec.name)
+
+
+def test_scripts_split_into_driver_statements():
+    mysql = """
+        -- comment
+        CREATE INDEX a ON t (x);
+        DROP INDEX b
+            ON t;
+    """
+    assert split_statements(mysql, "mysql") == ["CREATE INDEX a ON t (x)",
+                                                "DROP INDEX b\n            ON t"]
+
+    sqlserver = "IF 1 = 1\n    SELECT 1;\nGO\n-- second batch\nSELECT 2;\ngo\n"
+    assert split_statements(sqlserver, "sqlserver") == ["IF 1 = 1\n    SELECT 1;", "SELECT 2;"]
+
+
+def test_apply_is_idempotent_and_rollback_undoes_latest():
+    migrations = discover("sqlserver")
+    target = MemoryTarget()
+
+    first = asyncio.run(apply(target, migrations, to=2))
+    again = asyncio.run(apply(target, migrations))
+    assert [m.version for m in first] == [1, 2]
+    assert [m.version for m in again] == [m.version for m in migrations[2:]]
+    assert asyncio.run(apply(target, migrations)) == []
+    assert target.scripts == [m.up for m in migrations]
+
+    undone = asyncio.run(rollback(target, migrations, steps=1))
+    assert [m.version for m in undone] == [migrations[-1].version]
+    assert target.scripts[-1] == migrations[-1].down
+
+    asyncio.run(rollback(target, migrations, to=0))
+    assert target.history == {}
+
+
+def test_missing_indexes_match_columns_not_names():
+    spec = IndexSpec("Deductions", "IX_Deductions_Employee_Date",
+                     ("EmployeeID", "DeductionDate"), ("Amount",))
+
+    assert missing_indexes([spec], {}) == [spec]
+    # Same key columns under another name, with the include as a key column
+    assert missing_indexes([spec], {
+        "deductions": [(("employeeid", "deductiondate", "amount"), ())]}) == []
+    # Right leading column, wrong order or no cover
+    assert missing_indexes([spec], {
+        "deductions": [(("deductiondate", "employeeid"), ("amount",)),
+                       (("employeeid", "deductiondate"), ())]}) == [spec]
+
+
+def test_check_reports_pending_migrations_and_missing_indexes():
+    migrations = discover("sqlserver")
+    target = MemoryTarget()
+    asyncio.run(apply(target, migrations[:-1]))
+
+    problems = asyncio.run(check(target, migrations))
+
+    assert problems[0] == f"{migrations[-1]} is pending"
+    assert len(problems) == 1 + len(INDEXES["sqlserver"])
+    assert all(problem.startswith("missing index ") for problem in problems[1:])
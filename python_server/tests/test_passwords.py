@@ -0,0 +1,58 @@
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.passwords import PasswordHasher, hash_rounds
+
+
+def test_hash_and_verify_roundtrip_at_configured_rounds():
+    async def scenario():
+        hasher = PasswordHasher(rounds=4, workers=1)
+        hashed = await hasher.hash("secret")
+        return hashed, await hasher.verify("secret", hashed), await hasher.verify("wrong", hashed)
+
+    hashed, valid, invalid = asyncio.run(scenario())
+    assert hash_rounds(hashed) == 4
+    assert (valid, invalid) == (True, False)
+
+
+def test_needs_rehash_when_rounds_change():
+    async def scenario():
+        return await PasswordHasher(rounds=4, workers=1).hash("secret")
+
+    hashed = asyncio.run(scenario())
+    assert not PasswordHasher(rounds=4, workers=1).needs_rehash(hashed)
+    assert PasswordHasher(rounds=5, workers=1).needs_rehash(hashed)
+    assert PasswordHasher(rounds=4, workers=1).needs_rehash("plaintext")
+
+
+def test_saturated_pool_sheds_with_429_and_keeps_loop_free():
+    release = threading.Event()
+
+    async def scenario():
+        hasher = PasswordHasher(rounds=4, workers=1, max_pending=2)
+        blocked = [asyncio.ensure_future(hasher._run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(HTTPException) as shed:
+            await hasher._run(release.wait)
+
+        # The loop still runs while both slots are held by blocked threads
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.gather(*blocked)
+        return shed.value, hasher.stats()
+
+    error, stats = asyncio.run(scenario())
+    assert error.status_code == 429
+    assert error.headers["Retry-After"]
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 2
+    assert stats["pending"] == 0
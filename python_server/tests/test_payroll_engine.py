@@ -0,0 +1,48 @@
+import os
+import sys
+from datetime import date
+
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.salary_dataset import LEGACY_SALARY_QUERY, build_database, run_query
+from utils.payroll_engine import salary_query
+
+
+@pytest.fixture(scope="module")
+def payroll_db():
+    db = build_database(500, seed=7)
+    yield db
+    db.close()
+
+
+@pytest.mark.parametrize("month", [None, "2025-01", "2025-03", "2025-12", "2024-12"])
+def test_salary_query_matches_legacy_query(payroll_db, month):
+    legacy = run_query(payroll_db, LEGACY_SALARY_QUERY, {"Month": month})
+    query, params = salary_query(month)
+    current = run_query(payroll_db, query, params)
+
+    assert current == legacy
+    if month != "2024-12":
+        assert any(row[0] is not None for row in current[1])
+
+
+def test_single_employee_matches_legacy_query(payroll_db):
+    employee_id = "E000042"
+    legacy = run_query(payroll_db, LEGACY_SALARY_QUERY + " WHERE e.EmployeeID = @EmployeeID",
+                       {"Month": "2025-06", "EmployeeID": employee_id})
+    query, params = salary_query("2025-06", employee_id)
+
+    assert run_query(payroll_db, query, params) == legacy
+    assert {row[1] for row in legacy[1]} == {employee_id}
+
+
+def test_month_filters_are_sargable_ranges():
+    query, params = salary_query("2025-12")
+
+    assert params == {"MonthStart": date(2025, 12, 1), "MonthEnd": date(2026, 1, 1)}
+    assert "FORMAT(" not in query
+    assert query.count("SUM(Amount)") == 1
+    assert "DeductionDate >= @MonthStart AND DeductionDate < @MonthEnd" in query
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import sys
+from datetime import date
+
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import payroll_ledger
+from utils.cache import EMPLOYEES_TAG
+
+
+def test_months_between_crosses_year_end():
+    assert payroll_ledger.months_between((2024, 11), (2025, 2)) == [
+        (2024, 11), (2024, 12), (2025, 1), (2025, 2)]
+    assert payroll_ledger.months_between((2025, 3), (2025, 2)) == []
+
+
+def test_month_of_accepts_dates_and_iso_strings():
+    assert payroll_ledger.month_of(date(2025, 3, 31)) == (2025, 3)
+    assert payroll_ledger.month_of("2025-12-01T09:30:00") == (2025, 12)
+
+
+def test_employee_refresh_only_touches_that_employee(monkeypatch):
+    calls = []
+
+    async def fake_execute(query, params=None):
+        calls.append((query, params))
+        return {"affected_rows": 1}
+
+    monkeypatch.setattr(payroll_ledger, "execute_sqlserver_query", fake_execute)
+    asyncio.run(payroll_ledger.refresh_employee("E001", [date(2025, 3, 2), date(2025, 3, 20), None]))
+    asyncio.run(payroll_ledger.refresh_month(2025, 12))
+
+    employee_query, employee_params = calls[0]
+    assert len(calls) == 2
+    assert employee_params == {"MonthStart": date(2025, 3, 1), "MonthEnd": date(2025, 4, 1),
+                               "EmployeeID": "E001"}
+    assert "WHERE e.EmployeeID = @EmployeeID" in employee_query
+    assert "NOT MATCHED BY SOURCE" not in employee_query
+
+    month_query, month_params = calls[1]
+    assert month_params == {"MonthStart": date(2025, 12, 1), "MonthEnd": date(2026, 1, 1)}
+    assert "NOT MATCHED BY SOURCE" in month_query
+    assert "[PayrollLedger] WITH (HOLDLOCK) AS target" in month_query
+
+
+THIS_MONTH = date.today().replace(day=1)
+BUILT_MONTHS = [date(2025, 2, 1), date(2025, 3, 1), THIS_MONTH]
+
+
+def fake_ledger(monkeypatch, state):
+    """execute_sqlserver_query stand-in; `state` answers MONTH_STATE_QUERY"""
+    calls = []
+
+    async def fake_execute(query, params=None):
+        calls.append((query, params))
+        if query == payroll_ledger.MONTH_STATE_QUERY:
+            return [state]
+        if query == payroll_ledger.BUILT_MONTHS_QUERY:
+            return [{"PayrollMonth": month} for month in BUILT_MONTHS if month >= params["MonthStart"]]
+        return []
+
+    monkeypatch.setattr(payroll_ledger, "execute_sqlserver_query", fake_execute)
+    return calls
+
+
+def _merges(calls):
+    return [params for query, params in calls if "MERGE" in query]
+
+
+def test_month_is_refreshed_only_when_missing_or_dirty(monkeypatch):
+    clean = {"LedgerRows": 10, "SourceRows": 10, "Bonus": 500, "SourceBonus": 500,
+             "Allowances": 80, "SourceAllowances": 80, "Deductions": 30, "SourceDeductions": 30}
+    calls = fake_ledger(monkeypatch, clean)
+    asyncio.run(payroll_ledger.read_month(2025, 3))
+    assert _merges(calls) == []
+
+    for state in ({"LedgerRows": 0, "SourceRows": 10},
+                  {**clean, "SourceRows": 11},
+                  {**clean, "SourceBonus": 650}):
+        calls = fake_ledger(monkeypatch, state)
+        asyncio.run(payroll_ledger.read_month(2025, 3))
+        assert _merges(calls) == [{"MonthStart": date(2025, 3, 1), "MonthEnd": date(2025, 4, 1)}]
+        assert calls[-1][0] == payroll_ledger.READ_MONTH_QUERY
+
+
+def test_refresh_keeps_base_salary_of_built_rows(monkeypatch):
+    calls = fake_ledger(monkeypatch, {})
+    asyncio.run(payroll_ledger.refresh_month(2025, 3))
+    asyncio.run(payroll_ledger.refresh_month(2025, 3, "E001", update_salary=True))
+
+    kept, updated = (query for query, _ in calls)
+    matched = kept[kept.index("WHEN MATCHED"):kept.index("WHEN NOT MATCHED BY TARGET")]
+    assert "BaseSalary" not in matched
+    assert "source.BaseSalary" in kept[kept.index("WHEN NOT MATCHED BY TARGET"):]
+    assert "BaseSalary = source.BaseSalary" in updated
+
+
+def test_months_outside_the_ledger_are_not_built(monkeypatch):
+    calls = fake_ledger(monkeypatch, {"LedgerRows": 0})
+    for year, month in ((payroll_ledger.FIRST_LEDGER_YEAR - 1, 12), (date.today().year + 1, 1)):
+        with pytest.raises(ValueError):
+            asyncio.run(payroll_ledger.read_month(year, month))
+    assert calls == []
+
+
+def test_employee_changes_refresh_from_current_month_in_background(monkeypatch):
+    calls = fake_ledger(monkeypatch, {})
+
+    async def publish(tags):
+        await payroll_ledger.on_employees_changed(tags)
+        pending = set(payroll_ledger._background)
+        await asyncio.gather(*pending)
+        return pending
+
+    assert asyncio.run(publish({"employee:E001", EMPLOYEES_TAG}))
+    assert [(params["MonthStart"], params["EmployeeID"]) for params in _merges(calls)] == [
+        (THIS_MONTH, "E001")]
+    assert all("BaseSalary = source.BaseSalary" in query for query, _ in calls if "MERGE" in query)
+
+    # Payroll mutations refresh their own month before publishing
+    calls.clear()
+    assert not asyncio.run(publish({"employee:E001", "payroll:2025-03"}))
+    assert calls == []
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import sys
+from decimal import Decimal
+
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import routes.reports_route as reports_route
+from utils.cache import employee_tag, invalidation_bus
+from utils.report_store import SECTION_QUERIES, ReportStore, SectionUnavailable
+
+ROLLUPS = {
+    "departments": [
+        {"DepartmentID": 1, "DepartmentName": "IT"},
+        {"DepartmentID": 2, "DepartmentName": "HR"},
+        {"DepartmentID": 3, "DepartmentName": "Legal"},
+    ],
+    "workforce": [
+        {"DepartmentID": 1, "Headcount": 6, "SalarySum": 600, "SalaryCount": 6,
+         "ActiveHeadcount": 5, "ActiveSalarySum": 500, "ActiveSalaryCount": 5, "ActiveSalaryMax": 150,
+         "ActiveMale": 3, "ActiveFemale": 2},
+        {"DepartmentID": 2, "Headcount": 4, "SalarySum": 200, "SalaryCount": 4,
+         "ActiveHeadcount": 3, "ActiveSalarySum": 150, "ActiveSalaryCount": 3, "ActiveSalaryMax": 60,
+         "ActiveMale": 1, "ActiveFemale": 2},
+    ],
+    "events": [
+        {"EventYear": 2024, "DepartmentID": 1, "NewHires": 2, "Leavers": 1},
+        {"EventYear": 2024, "DepartmentID": 2, "NewHires": 1, "Leavers": 0},
+        {"EventYear": 2023, "DepartmentID": 1, "NewHires": 5, "Leavers": 3},
+    ],
+    "department_sizes": [
+        {"TotalDepartments": 3, "AvgEmployeesPerDepartment": 3.33, "LargestDepartment": "IT",
+         "SmallestDepartment": "HR"},
+    ],
+    "structure": [{"ActiveHeadcount": 8, "TotalManagers": 3}],
+}
+
+
+def fake_database(rollups=ROLLUPS, fail=()):
+    """execute_sqlserver_query stand-in answering each rollup query"""
+    calls = []
+
+    async def execute(query):
+        name = next(name for name, text in SECTION_QUERIES.items() if text == query)
+        calls.append(name)
+        await asyncio.sleep(0.01)
+        if name in fail:
+            raise RuntimeError(f"{name} failed")
+        return rollups[name]
+
+    return execute, calls
+
+
+def test_reports_are_computed_from_rollups():
+    execute, _ = fake_database()
+    snapshot = asyncio.run(ReportStore(execute=execute).get())
+
+    employees = snapshot.employee_stats(2024)
+    assert employees["overall"] == {"totalEmployees": 10, "totalNewHires": 3,
+                                    "turnoverRate": 10.0, "averageSalary": 80.0}
+    assert employees["byDepartment"] == [{"name": "IT", "count": 6}, {"name": "HR", "count": 4},
+                                         {"name": "Legal", "count": 0}]
+    assert snapshot.salary_stats() == {"totalPayroll": 650, "averageSalary": 81.25,
+                                       "highestSalary": 150, "totalBonuses": 65.0}
+    organization = snapshot.organization_stats()
+    assert organization["structure"] == {"totalManagers": 3, "managerToEmployeeRatio": 0.38,
+                                         "avgTeamSize": 2}
+    assert organization["gender"] == {"male": 50, "female": 50}
+
+
+def test_decimal_salary_rollups():
+    # pyodbc returns SUM/MAX over a DECIMAL Salary column as Decimal
+    workforce = [{**row, **{column: Decimal(row[column]) for column in
+                            ("SalarySum", "ActiveSalarySum", "ActiveSalaryMax")}}
+                 for row in ROLLUPS["workforce"]]
+    execute, _ = fake_database({**ROLLUPS, "workforce": workforce})
+    snapshot = asyncio.run(ReportStore(execute=execute).get())
+
+    assert snapshot.salary_stats() == {"totalPayroll": Decimal(650), "averageSalary": Decimal("81.25"),
+                                       "highestSalary": Decimal(150), "totalBonuses": Decimal(65)}
+    assert snapshot.employee_stats(2024)["overall"]["averageSalary"] == Decimal(80)
+
+
+def test_concurrent_reads_share_one_refresh_until_invalidated():
+    execute, calls = fake_database()
+    store = ReportStore(execute=execute)
+    store.subscribe()
+
+    async def scenario():
+        await asyncio.gather(*(store.get() for _ in range(5)))
+        await store.get()
+        await invalidation_bus.publish(employee_tag(7))
+        await store.get()
+
+    asyncio.run(scenario())
+    assert len(calls) == 2 * len(store.queries)
+    assert store.refreshes == 2
+
+
+def test_failed_section_keeps_previous_rollup():
+    execute, _ = fake_database()
+    store = ReportStore(execute=execute)
+    first = asyncio.run(store.get())
+
+    store._execute, _ = fake_database(fail=("structure",))
+    store.invalidate()
+    second = asyncio.run(store.get())
+
+    assert second is not first
+    assert second.sections["structure"] == first.sections["structure"]
+    assert store.section_errors == 1
+
+    # Carried-over rollup keeps its age, and the next read retries it
+    assert second.built_at == first.built_at
+    assert second.section_built_at["structure"] == first.section_built_at["structure"]
+    assert store.stats()["dirty"]
+
+    # Never computed: the endpoint needing it falls back to demo data
+    store = ReportStore(execute=fake_database(fail=("structure",))[0])
+    with pytest.raises(SectionUnavailable):
+        asyncio.run(store.get()).organization_stats()
+
+
+def test_failed_refresh_does_not_advance_as_of():
+    execute, _ = fake_database()
+    store = ReportStore(execute=execute)
+    first = asyncio.run(store.get())
+
+    store._execute, _ = fake_database(fail=tuple(ROLLUPS))
+    store.invalidate()
+    assert asyncio.run(store.get()) is first
+    assert store.snapshot.built_at == first.built_at
+    assert store.refreshes == 1
+    assert store.stats()["dirty"]
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(store.refresh())
+
+
+def test_endpoint_serves_snapshot_with_as_of(monkeypatch):
+    execute, calls = fake_database()
+    store = ReportStore(execute=execute)
+    monkeypatch.setattr(reports_route, "report_store", store)
+    monkeypatch.setattr(reports_route, "FORCE_DEMO_DATA", False)
+
+    response = asyncio.run(reports_route.get_salary_stats(2024, None))
+    again = asyncio.run(reports_route.get_employee_stats(2024, None))
+
+    assert response["Data"]["totalPayroll"] == 650
+    assert response["AsOf"] == again["AsOf"]
+    assert len(calls) == len(store.queries)
@@ -0,0 +1,128 @@
+import asyncio
+import os
+import sys
+import time
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from middleware import auth
+from middleware.auth import TokenCache
+from routes.auth_route import generate_token
+from utils.cache import Cache, MemoryBackend, invalidation_bus, user_tag
+
+
+def token_for(user_id, **claims):
+    return jwt.encode({"id": user_id, "iat": time.time(), "exp": time.time() + 3600, **claims},
+                      auth.JWT_SECRET, algorithm=auth.JWT_ALGORITHM)
+
+
+def test_cache_is_bounded_lru_keyed_by_digest():
+    cache = TokenCache(max_entries=2)
+    a, b, c = token_for(1), token_for(2), token_for(3)
+    cache.verify(a)
+    cache.verify(b)
+    cache.verify(a)
+    cache.verify(c)
+
+    assert all(len(key) == 32 for key in cache._entries)
+    assert cache._key(a) in cache._entries and cache._key(b) not in cache._entries
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 3, 1)
+    assert stats["hitRate"] == 0.25
+
+
+def test_entries_expire_and_are_swept():
+    cache = TokenCache(ttl=0.01, sweep_interval=0.01)
+    cache.verify(token_for(1))
+    time.sleep(0.02)
+    cache.verify(token_for(2))
+
+    assert cache.stats()["size"] == 1
+    assert cache.stats()["expirations"] == 1
+
+
+def test_revoked_token_is_rejected_but_others_still_verify():
+    cache = TokenCache()
+    revoked, other = token_for(1), token_for(1, role="Admin")
+    cache.verify(revoked)
+
+    cache.revoke_token(revoked)
+
+    with pytest.raises(jwt.InvalidTokenError):
+        cache.verify(revoked)
+    assert cache.verify(other)["id"] == 1
+
+
+def test_revoking_a_user_rejects_only_tokens_issued_before():
+    cache = TokenCache()
+    old, bystander = token_for(7), token_for(8)
+    cache.verify(old)
+
+    cache.revoke_user(7)
+    fresh = token_for(7)
+
+    with pytest.raises(jwt.InvalidTokenError):
+        cache.verify(old)
+    assert cache.verify(fresh)["id"] == 7
+    assert cache.verify(bystander)["id"] == 8
+
+
+def test_publishing_user_tag_revokes_through_the_bus(monkeypatch):
+    cache = TokenCache()
+    monkeypatch.setattr(auth, "token_cache", cache)
+    token = token_for(42)
+    cache.verify(token)
+
+    asyncio.run(invalidation_bus.publish(user_tag(42)))
+
+    assert asyncio.run(auth.verify_and_decode_token(token))["valid"] is False
+
+
+def test_logout_revokes_the_presented_token(monkeypatch):
+    monkeypatch.setattr(auth, "token_cache", TokenCache())
+    token = generate_token({"UserID": 1, "Username": "admin", "Role": "Admin"})
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/auth/test-auth", headers=headers).status_code == 200
+    assert client.post("/auth/logout", headers=headers).status_code == 200
+    assert client.get("/auth/test-auth", headers=headers).status_code == 401
+
+
+def test_logout_in_one_worker_revokes_in_the_others():
+    shared = Cache("token_revocations", MemoryBackend())
+    worker_a, worker_b = TokenCache(shared=shared), TokenCache(shared=shared)
+    token, other = token_for(1), token_for(2)
+
+    async def scenario():
+        await worker_b.verify_shared(token)  # cached in worker b
+        worker_a.revoke_token(token)
+        await worker_a.share_token_revocation(token)
+        with pytest.raises(jwt.InvalidTokenError):
+            await worker_b.verify_shared(token)
+        return await worker_b.verify_shared(other)
+
+    assert asyncio.run(scenario())["id"] == 2
+    assert worker_b.stats()["revokedTokens"] == 1
+
+
+def test_user_revocation_reaches_the_other_workers():
+    shared = Cache("token_revocations", MemoryBackend())
+    worker_a, worker_b = TokenCache(shared=shared), TokenCache(shared=shared)
+    old = token_for(7)
+
+    async def scenario():
+        await worker_b.verify_shared(old)
+        worker_a.revoke_user(7)
+        await worker_a.share_user_revocation(7)
+        with pytest.raises(jwt.InvalidTokenError):
+            await worker_b.verify_shared(old)
+        return await worker_b.verify_shared(token_for(7))
+
+    assert asyncio.run(scenario())["id"] == 7
@@ -0,0 +1,413 @@
+import asyncio
+import inspect
+import logging
+import os
+import pickle
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # optional, only needed for CACHE_BACKEND=redis
+    aioredis = None
+
+logger = logging.getLogger("cache")
+
+# Cache settings
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory').lower()
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '1024'))
+
+_MISSING = object()
+
+
+class MemoryBackend:
+    """
+    Per-process LRU cache with a TTL per entry
+
+    Expired entries are dropped when read and before anything live is
+    evicted, so the size bound only pushes out entries that could still hit.
+    Entries may carry tags; `invalidate_tags` drops every entry with a tag.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._tagged: Dict[str, Set[str]] = {}
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        value, expires_at, _ = entry
+        if time.monotonic() >= expires_at:
+            self._remove(key)
+            self.expirations += 1
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float, tags: Iterable[str] = ()):
+        self._remove(key)
+        tags = frozenset(tags)
+        self._entries[key] = (value, time.monotonic() + ttl, tags)
+        for tag in tags:
+            self._tagged.setdefault(tag, set()).add(key)
+        if len(self._entries) > self.max_entries:
+            self._evict()
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+    def _evict(self):
+        now = time.monotonic()
+        expired = [key for key, (_, expires_at, _) in self._entries.items() if now >= expires_at]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._remove(key)
+
+    async def delete_prefix(self, prefix: str):
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            self._remove(key)
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        keys = set()
+        for tag in tags:
+            keys.update(self._tagged.get(tag, ()))
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "size": len(self._entries),
+            "maxEntries": self.max_entries,
+            "tags": len(self._tagged),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class RedisBackend:
+    """
+    Cache shared by every worker through a Redis-compatible server
+
+    Works with Redis or any server speaking its protocol (Valkey, KeyDB, a
+    local redis-server for development). Expiry uses the server's TTLs and
+    the size bound is the server's maxmemory policy (use allkeys-lru).
+    Values are pickled, so the server must be trusted like the database.
+
+    Tags are Redis sets of keys, so an invalidation published by one worker
+    drops the entries for all of them. Tag expiry uses EXPIRE NX/GT, which
+    needs Redis 7 or a server compatible with it.
+    """
+
+    def __init__(self, url: str = CACHE_REDIS_URL):
+        if aioredis is None:
+            raise RuntimeError(
+                "CACHE_BACKEND=redis requires the redis package (pip install redis)")
+        self.url = url
+        self._client = aioredis.from_url(url)
+
+    async def get(self, key: str):
+        raw = await self._client.get(key)
+        return _MISSING if raw is None else pickle.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: float, tags: Iterable[str] = ()):
+        ttl_ms = max(1, int(ttl * 1000))
+        async with self._client.pipeline(transaction=False) as pipe:
+            pipe.set(key, pickle.dumps(value), px=ttl_ms)
+            for tag in tags:
+                # A tag must outlive every key it lists
+                pipe.sadd(tag, key)
+                pipe.pexpire(tag, ttl_ms, nx=True)
+                pipe.pexpire(tag, ttl_ms, gt=True)
+            await pipe.execute()
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self._client.delete(*keys)
+
+    async def delete_prefix(self, prefix: str):
+        async for key in self._client.scan_iter(match=f"{prefix}*", count=500):
+            await self._client.delete(key)
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        for tag in tags:
+            keys = await self._client.smembers(tag)
+            if keys:
+                removed += await self._client.delete(*keys)
+            await self._client.delete(tag)
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis", "url": self.url.split("@")[-1]}
+
+
+class Cache:
+    """
+    Named cache with single-flight loading and hit/miss metrics
+
+    `get_or_load` coalesces concurrent misses for the same key onto one
+    loader call, so a burst of requests for a cold entry runs the query once
+    per process. Backend errors are logged and treated as misses; the cache
+    never fails a request that the database could answer.
+
+    Entries can be tagged with what they were built from (see
+    `invalidation_bus`); a value loaded while an invalidation ran is returned
+    but not stored, since it may predate the change.
+    """
+
+    def __init__(self, name: str, backend, default_ttl: float = 300):
+        self.name = name
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self._loading: Dict[str, asyncio.Future] = {}
+        self._invalidation_epoch = 0
+        self.invalidations = 0
+        self.invalidated_entries = 0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.coalesced = 0
+        self.load_errors = 0
+        self.backend_errors = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    def _tag(self, tag: str) -> str:
+        return f"{self.name}#tag:{tag}"
+
+    async def get(self, key: str, default: Any = None):
+        try:
+            value = await self.backend.get(self._key(key))
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning(f"Cache {self.name} read failed: {str(e)}")
+            value = _MISSING
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None,
+                  tags: Iterable[str] = ()):
+        try:
+            await self.backend.set(self._key(key), value,
+                                   self.default_ttl if ttl is None else ttl,
+                                   [self._tag(tag) for tag in tags])
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning(f"Cache {self.name} write failed: {str(e)}")
+
+    async def delete(self, *keys: str):
+        try:
+            await self.backend.delete(*(self._key(key) for key in keys))
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning(f"Cache {self.name} delete failed: {str(e)}")
+
+    async def clear(self):
+        """Drop every entry of this cache"""
+        try:
+            await self.backend.delete_prefix(self._key(""))
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning(f"Cache {self.name} clear failed: {str(e)}")
+
+    async def invalidate(self, tags: Iterable[str]):
+        """Drop every entry tagged with any of `tags`"""
+        self._invalidation_epoch += 1
+        self.invalidations += 1
+        try:
+            self.invalidated_entries += await self.backend.invalidate_tags(
+                [self._tag(tag) for tag in tags])
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning(f"Cache {self.name} invalidation failed: {str(e)}")
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]],
+                          ttl: Optional[float] = None, tags: Iterable[str] = ()):
+        """Return the cached value for `key`, loading it once on a miss"""
+        value = await self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        pending = self._loading.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The request that was loading went away; load it ourselves
+                return await self.get_or_load(key, loader, ttl, tags)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        epoch = self._invalidation_epoch
+        try:
+            self.loads += 1
+            value = await loader()
+        except Exception as e:
+            self.load_errors += 1
+            future.set_exception(e)
+            # Waiters re-raise it; mark it retrieved in case there are none
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(value)
+            if epoch == self._invalidation_epoch:
+                await self.set(key, value, ttl, tags)
+            return value
+        finally:
+            self._loading.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            **self.backend.stats(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 3) if lookups else None,
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "loadErrors": self.load_errors,
+            "invalidations": self.invalidations,
+            "invalidatedEntries": self.invalidated_entries,
+            "backendErrors": self.backend_errors,
+            "loading": len(self._loading),
+        }
+
+
+# Invalidation tags
+
+# Broad tags: anything built from the table as a whole
+PAYROLL_TAG = "payroll"
+EMPLOYEES_TAG = "employees"
+DEPARTMENTS_TAG = "departments"
+# Read models spanning every payroll month (a change to any month affects them)
+PAYROLL_ALL_MONTHS_TAG = "payroll:all"
+
+
+USER_TAG_PREFIX = "user:"
+
+
+def user_tag(user_id) -> str:
+    """Tag for one login account (its tokens and profile)"""
+    return f"{USER_TAG_PREFIX}{user_id}"
+
+
+def employee_tag(employee_id) -> str:
+    return f"employee:{employee_id}"
+
+
+def department_tag(department_id) -> str:
+    return f"department:{department_id}"
+
+
+def payroll_month_tag(month) -> str:
+    """Tag for one payroll month, from a date or a "YYYY-MM" string"""
+    if hasattr(month, "strftime"):
+        month = month.strftime("%Y-%m")
+    return f"payroll:{month}"
+
+
+class InvalidationBus:
+    """
+    Fan-out of change tags from mutations to cached read models
+
+    Mutations publish what they changed ("employee:E001", "payroll:2025-03",
+    "department:3", or a broad tag such as "payroll"); every subscriber gets
+    the tags and drops whatever it built from them. Caches created with
+    `create_cache` subscribe automatically. Delivery is in-process; with the
+    redis backend the dropped entries are shared, so other workers see it.
+    """
+
+    def __init__(self):
+        self._subscribers: List[Callable[[Set[str]], Any]] = []
+        self.published = 0
+
+    def subscribe(self, callback: Callable[[Set[str]], Any]):
+        """Register `callback(tags)`; it may be a coroutine function"""
+        self._subscribers.append(callback)
+
+    async def publish(self, *tags: str):
+        tags = {tag for tag in tags if tag}
+        if not tags:
+            return
+        self.published += 1
+        logger.info(f"Invalidating cached data for: {', '.join(sorted(tags))}")
+        for callback in self._subscribers:
+            try:
+                result = callback(tags)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Invalidation subscriber failed: {str(e)}")
+
+
+invalidation_bus = InvalidationBus()
+
+
+def cache_key(endpoint: str, scope: str = "all", **params) -> str:
+    """
+    Key for a cached response: endpoint, access scope and parameters
+
+    `scope` says whose data the value holds: "all" for results every
+    authorized role may see, or a narrower scope such as "employee:E001"
+    for results filtered to one user. Keeping it in the key means a
+    restricted view can never be served from, or leak into, a full one.
+    """
+    parts = [endpoint, f"scope={scope}"]
+    parts.extend(f"{name}={params[name]}" for name in sorted(params))
+    return "|".join(parts)
+
+
+# Every cache created by create_cache, for /health
+caches: Dict[str, Cache] = {}
+
+
+def create_cache(name: str, default_ttl: float = 300, max_entries: int = CACHE_MAX_ENTRIES) -> Cache:
+    """Create a named cache on the configured backend (CACHE_BACKEND)"""
+    if CACHE_BACKEND == 'redis':
+        backend = RedisBackend(CACHE_REDIS_URL)
+    else:
+        if CACHE_BACKEND != 'memory':
+            logger.warning(f"Unknown CACHE_BACKEND '{CACHE_BACKEND}', using memory")
+        backend = MemoryBackend(max_entries)
+    cache = Cache(name, backend, default_ttl)
+    caches[name] = cache
+    invalidation_bus.subscribe(cache.invalidate)
+    return cache
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Metrics of every named cache"""
+    return {name: cache.stats() for name, cache in caches.items()}
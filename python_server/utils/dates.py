@@ -0,0 +1,41 @@
+"""
+Month windows for date-filtered queries
+
+Filter on a month with a half-open range,
+
+    a.Date >= @MonthStart AND a.Date < @MonthEnd
+
+rather than YEAR(a.Date) = @Year AND MONTH(a.Date) = @Month or
+FORMAT(a.Date, 'yyyy-MM') = @Month. A function applied to the column hides it
+from the optimizer, so every row of the table is read; a range on the bare
+column can seek an index on it. The upper bound is exclusive, so rows with a
+time of day on the last day of the month are included.
+"""
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+
+def month_window(year: int, month: int) -> Tuple[date, date]:
+    """[start, end) of a month: its first day and the first day of the next"""
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def parse_month(month: str) -> Tuple[date, date]:
+    """[start, end) of a "YYYY-MM" month; raises ValueError for anything else"""
+    year, _, number = month.partition("-")
+    if len(year) != 4 or len(number) != 2 or not (year + number).isdigit():
+        raise ValueError(f"Invalid month '{month}', expected YYYY-MM")
+    return month_window(int(year), int(number))
+
+
+def current_month_window(today: Optional[date] = None) -> Tuple[date, date]:
+    """[start, end) of the month containing `today` (default: today)"""
+    today = today or date.today()
+    return month_window(today.year, today.month)
+
+
+def month_params(start: date, end: date) -> Dict[str, date]:
+    """Query parameters for the @MonthStart/@MonthEnd range predicate"""
+    return {"MonthStart": start, "MonthEnd": end}
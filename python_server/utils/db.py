@@ -1,12 +1,19 @@
 import os
-from mysql.connector import Error as MySQLError, pooling
+import mysql.connector
+from mysql.connector import Error as MySQLError
 import pyodbc
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 from dotenv import load_dotenv
 from fastapi import HTTPException
+import re
 import time
-from functools import wraps
+import random
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps, lru_cache
 
 # Load environment variables
 load_dotenv()
@@ -25,26 +32,27 @@ MYSQL_CONFIG = {
     'user': os.getenv('MYSQL_USER', 'root'),
     'password': os.getenv('MYSQL_PASSWORD'),
     'database': os.getenv('MYSQL_DATABASE'),
-    'pool_name': 'mypool',
-    'pool_size': 10
+    'port': int(os.getenv('MYSQL_PORT', '3306')),
+    # Every statement commits on its own; this also stops a reused pooled
+    # connection from reading through a stale REPEATABLE READ snapshot
+    'autocommit': True,
+}
+
+# MySQL pool and statement settings
+mysql_pool_config = {
+    'pool_size': int(os.getenv('MYSQL_POOL_SIZE', '10')),
+    'pool_min_size': int(os.getenv('MYSQL_POOL_MIN_SIZE', '1')),
+    'pool_checkout_timeout': float(os.getenv('MYSQL_POOL_CHECKOUT_TIMEOUT', '10')),
+    'pool_max_lifetime': float(os.getenv('MYSQL_POOL_MAX_LIFETIME', '1800')),
+    'pool_idle_check_interval': float(os.getenv('MYSQL_POOL_IDLE_CHECK_INTERVAL', '30')),
+    'query_timeout': float(os.getenv('MYSQL_QUERY_TIMEOUT', '30')),
+    'max_retries': int(os.getenv('MYSQL_MAX_RETRIES', '3')),
+    'retry_delay': float(os.getenv('MYSQL_RETRY_DELAY', '0.2')),
 }
 
 # Set this to True to force using demo data
 FORCE_DEMO_DATA = os.getenv('FORCE_DEMO_DATA', 'false').lower() == 'true'
 
-# Initialize MySQL connection pool
-try:
-    if FORCE_DEMO_DATA:
-        logger.warning(
-            "FORCE_DEMO_DATA is set to True. Using demo data for MySQL.")
-        mysql_pool = None
-    else:
-        mysql_pool = pooling.MySQLConnectionPool(**MYSQL_CONFIG)
-        logger.info("MySQL Connection Pool created successfully")
-except Exception as e:
-    logger.error(f"Error creating MySQL connection pool: {str(e)}")
-    mysql_pool = None  # Allow application to continue even if MySQL fails
-
 # SQL Server Configuration
 SQL_SERVER_CONFIG = {
     # Using the available driver on this system
@@ -55,8 +63,7 @@ SQL_SERVER_CONFIG = {
     'pwd':  os.getenv('SQLSERVER_PASSWORD'),
 }
 
-# Initialize SQL Server connection pool
-sqlserver_pool = None
+# Detect the SQL Server driver (connections come from sql_server_pool below)
 try:
     if FORCE_DEMO_DATA:
         logger.warning(
@@ -69,94 +76,358 @@ try:
             logger.info(f"Found SQL Server driver: {drivers[0]}")
             SQL_SERVER_CONFIG['driver'] = drivers[0]
 
-            # Use direct connection instead of pooling since there's an issue with ConnectionPool
             logger.info(
-                "Skipping SQL Server connection pool due to compatibility issues.")
-            logger.info("Will create connections directly when needed.")
+                "SQL Server connections are opened on demand by sql_server_pool")
         else:
             logger.warning("No SQL Server driver found")
 except Exception as e:
     logger.error(f"Error initializing SQL Server: {str(e)}")
 
 
-def retry_on_error(max_retries=3, delay=1):
-    """Decorator to retry database operations on failure"""
+# Retry handling
+
+# SQLSTATEs worth retrying: serialization failure/deadlock and driver timeouts
+RETRYABLE_SQLSTATES = ('40001', 'HYT00', 'HYT01')
+# SQL Server native error for "transaction was deadlocked ... chosen as victim"
+SQLSERVER_DEADLOCK_ERROR = '(1205)'
+# MySQL: lock wait timeout, deadlock
+RETRYABLE_MYSQL_ERRNOS = {1205, 1213}
+# MySQL: too many connections, can't connect, server gone away, lost connection
+MYSQL_CONNECTION_ERRNOS = {1040, 2002, 2003, 2006, 2013}
+
+
+def is_retryable_error(err: Exception, idempotent: bool = True) -> bool:
+    """
+    Decide whether a failed database call is worth retrying
+
+    Deadlocks and lock timeouts are always retryable because the server has
+    rolled the statement back. Connection failures and driver timeouts are
+    only retried for read-only statements, where running twice is harmless.
+    Syntax, permission and constraint errors are never retried.
+    """
+    # execute_* wrap driver errors in HTTPException; look at the original
+    if isinstance(err, HTTPException):
+        err = err.__cause__
+        if err is None:
+            return False
+
+    if isinstance(err, pyodbc.Error):
+        sqlstate = str(err.args[0]) if err.args else ''
+        message = str(err.args[1]) if len(err.args) > 1 else str(err)
+        if sqlstate == '40001' or SQLSERVER_DEADLOCK_ERROR in message:
+            return True
+        if sqlstate in RETRYABLE_SQLSTATES or sqlstate.startswith('08'):
+            return idempotent
+        return False
+
+    if isinstance(err, MySQLError):
+        if err.errno in RETRYABLE_MYSQL_ERRNOS:
+            return True
+        if err.errno in MYSQL_CONNECTION_ERRNOS:
+            return idempotent
+        return False
+
+    return False
+
+
+def _is_read_only(query) -> bool:
+    return isinstance(query, str) and query.strip().upper().startswith(('SELECT', 'SHOW'))
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of traffic so an outage is not amplified
+
+    Every call deposits `ratio` tokens and every retry spends one, so at most
+    about `ratio` extra load is generated on top of normal traffic. A small
+    trickle (`min_per_second`) keeps retries possible at low request rates.
+    """
+
+    def __init__(self, name: str, ratio: float = 0.2, min_per_second: float = 1,
+                 max_tokens: float = 20):
+        self.name = name
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.exhausted = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.max_tokens, self._tokens +
+                           (now - self._last_refill) * self.min_per_second)
+        self._last_refill = now
+
+    def record_request(self):
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.retries += 1
+                return True
+            self.exhausted += 1
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refill()
+            return {
+                "tokens": round(self._tokens, 2),
+                "retries": self.retries,
+                "budgetExhausted": self.exhausted,
+            }
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter for the given (0-based) attempt"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def retry_on_error(max_retries=3, delay=1, max_delay=10, budget: RetryBudget = None):
+    """
+    Decorator for retrying database operations
+
+    Retries only errors that `is_retryable_error` accepts, sleeping with
+    `asyncio.sleep` (exponential backoff with jitter) so the event loop keeps
+    running. When a `budget` is given, retries beyond it fail fast.
+    The first positional argument is taken to be the SQL text.
+    """
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
+            query = args[0] if args else kwargs.get('query')
+            idempotent = _is_read_only(query)
+            if budget is not None:
+                budget.record_request()
+
             for attempt in range(max_retries):
                 try:
                     return await func(*args, **kwargs)
                 except Exception as e:
-                    if attempt == max_retries - 1:
+                    if attempt == max_retries - 1 or not is_retryable_error(e, idempotent):
+                        raise
+                    if budget is not None and not budget.try_spend():
+                        logger.warning(
+                            f"Retry budget for {budget.name} exhausted, not retrying: {str(e)}")
                         raise
-                    logger.warning(f"Attempt {attempt + 1} failed: {str(e)}")
-                    time.sleep(delay)
-            return None
+                    wait_time = backoff_delay(attempt, delay, max_delay)
+                    logger.warning(
+                        f"Attempt {attempt + 1} failed, retrying in {wait_time:.2f}s: {str(e)}")
+                    await asyncio.sleep(wait_time)
         return wrapper
     return decorator
 
 
-@retry_on_error()
-async def execute_mysql_query(query: str, params=None):
-    """Execute a MySQL query with retry logic"""
-    if mysql_pool is None:
-        logger.warning("MySQL connection not available. Returning mock data.")
-        return []  # Return empty list for mock data
+# Retry budgets shared by every query against each backend
+sqlserver_retry_budget = RetryBudget("sqlserver")
+mysql_retry_budget = RetryBudget("mysql")
 
-    try:
-        connection = mysql_pool.get_connection()
-        cursor = connection.cursor(dictionary=True)
 
-        try:
-            cursor.execute(query, params or ())
-            if query.strip().upper().startswith('SELECT'):
-                result = cursor.fetchall()
-            else:
-                result = cursor.rowcount
-            connection.commit()
-            return result
-        finally:
-            cursor.close()
-            connection.close()
-    except Exception as e:
-        logger.error(f"MySQL query error: {str(e)}")
-        raise
+# Circuit breakers
 
 
-@retry_on_error()
-async def execute_sqlserver_query(query: str, params=None):
-    """Execute a SQL Server query with retry logic"""
-    if FORCE_DEMO_DATA:
-        logger.warning(
-            "SQL Server connection not available. Returning mock data.")
-        return []  # Return empty list for mock data
+class CircuitOpenError(HTTPException):
+    """Raised without touching the database while a backend's breaker is open"""
 
-    try:
-        # Create a direct connection instead of using pool
-        connection_string = f"DRIVER={SQL_SERVER_CONFIG['driver']};SERVER={SQL_SERVER_CONFIG['server']};DATABASE={SQL_SERVER_CONFIG['database']};UID={SQL_SERVER_CONFIG['uid']};PWD={SQL_SERVER_CONFIG['pwd']};TrustServerCertificate=yes"
-        connection = pyodbc.connect(connection_string)
-        cursor = connection.cursor()
+    def __init__(self, backend: str):
+        super().__init__(
+            status_code=503,
+            detail={"Status": False,
+                    "Message": f"{backend} is temporarily unavailable. Please try again later."}
+        )
 
-        try:
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
 
-            if query.strip().upper().startswith('SELECT'):
-                columns = [column[0] for column in cursor.description]
-                result = [dict(zip(columns, row)) for row in cursor.fetchall()]
-            else:
-                result = cursor.rowcount
-            connection.commit()
+def is_backend_failure(err: Exception) -> bool:
+    """Whether an error says the backend is down or unresponsive
+
+    Only these count against a circuit breaker; a syntax error or constraint
+    violation says nothing about the server's health.
+    """
+    if isinstance(err, HTTPException):
+        if err.__cause__ is not None:
+            return is_backend_failure(err.__cause__)
+        # 504 from a query timeout; 503 checkout timeouts mean saturation, not an outage
+        return err.status_code == 504
+
+    if isinstance(err, pyodbc.Error):
+        sqlstate = str(err.args[0]) if err.args else ''
+        return (isinstance(err, (pyodbc.OperationalError, pyodbc.InterfaceError))
+                or sqlstate.startswith('08') or sqlstate in ('HYT00', 'HYT01'))
+
+    if isinstance(err, MySQLError):
+        return (err.errno in MYSQL_CONNECTION_ERRNOS
+                or isinstance(err, (mysql.connector.errors.OperationalError,
+                                    mysql.connector.errors.InterfaceError)))
+
+    return False
+
+
+class CircuitBreaker:
+    """
+    Per-backend circuit breaker
+
+    - closed: calls go through; outcomes are tracked over a rolling
+      `window_seconds` window. Once at least `minimum_calls` were made and
+      the failure rate reaches `failure_rate_threshold`, the breaker opens.
+    - open: calls fail immediately with CircuitOpenError for `open_seconds`.
+    - half_open: up to `half_open_max_calls` probe calls are let through. A
+      successful probe closes the breaker, a failed one re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_rate_threshold: float = 0.5,
+                 minimum_calls: int = 10, window_seconds: float = 30,
+                 open_seconds: float = 15, half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._outcomes = deque()  # (timestamp, failed)
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self.times_opened = 0
+        self.rejected_calls = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._advance()
+            return self._state
+
+    def _advance(self):
+        """Move open -> half_open once the cool-down has passed (lock held)"""
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._probes_in_flight = 0
+
+    def _trim(self, now: float):
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.times_opened += 1
+        logger.error(f"Circuit breaker for {self.name} opened")
+
+    def before_call(self) -> bool:
+        """Admit a call or raise CircuitOpenError; returns True for a probe"""
+        with self._lock:
+            self._advance()
+            if self._state == self.CLOSED:
+                return False
+            if self._state == self.HALF_OPEN and self._probes_in_flight < self.half_open_max_calls:
+                self._probes_in_flight += 1
+                return True
+            self.rejected_calls += 1
+        raise CircuitOpenError(self.name)
+
+    def record(self, failed: bool, probe: bool = False):
+        with self._lock:
+            if probe:
+                self._probes_in_flight -= 1
+                if self._state != self.HALF_OPEN:
+                    return
+                if failed:
+                    self._open()
+                else:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                    logger.info(f"Circuit breaker for {self.name} closed")
+                return
+
+            if self._state != self.CLOSED:
+                return
+            now = time.monotonic()
+            self._outcomes.append((now, failed))
+            self._trim(now)
+            if failed and len(self._outcomes) >= self.minimum_calls:
+                failures = sum(1 for _, f in self._outcomes if f)
+                if failures / len(self._outcomes) >= self.failure_rate_threshold:
+                    self._open()
+
+    def abandon_probe(self):
+        """Give back a probe slot whose call was cancelled"""
+        with self._lock:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._advance()
+            self._trim(time.monotonic())
+            failures = sum(1 for _, f in self._outcomes if f)
+            return {
+                "state": self._state,
+                "windowCalls": len(self._outcomes),
+                "windowFailures": failures,
+                "timesOpened": self.times_opened,
+                "rejectedCalls": self.rejected_calls,
+                "retryInSeconds": round(max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)), 1)
+                if self._state == self.OPEN else 0,
+            }
+
+
+def with_circuit_breaker(breaker: CircuitBreaker):
+    """Decorator that routes an async database call through `breaker`"""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            probe = breaker.before_call()
+            try:
+                result = await func(*args, **kwargs)
+            except asyncio.CancelledError:
+                if probe:
+                    breaker.abandon_probe()
+                raise
+            except Exception as e:
+                breaker.record(is_backend_failure(e), probe)
+                raise
+            breaker.record(False, probe)
             return result
-        finally:
-            cursor.close()
-            connection.close()
-    except Exception as e:
-        logger.error(f"SQL Server query error: {str(e)}")
-        raise
+        return wrapper
+    return decorator
+
+
+def _breaker_from_env(name: str, prefix: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        name,
+        failure_rate_threshold=float(os.getenv(f'{prefix}_BREAKER_FAILURE_RATE', '0.5')),
+        minimum_calls=int(os.getenv(f'{prefix}_BREAKER_MIN_CALLS', '10')),
+        window_seconds=float(os.getenv(f'{prefix}_BREAKER_WINDOW', '30')),
+        open_seconds=float(os.getenv(f'{prefix}_BREAKER_OPEN_SECONDS', '15')),
+        half_open_max_calls=int(os.getenv(f'{prefix}_BREAKER_PROBES', '1')),
+    )
+
+
+sqlserver_breaker = _breaker_from_env("SQL Server", "SQLSERVER")
+mysql_breaker = _breaker_from_env("MySQL", "MYSQL")
+
+
+def resilience_stats() -> Dict[str, Any]:
+    """Circuit breaker and retry budget state for /health"""
+    return {
+        "mysql": {"circuitBreaker": mysql_breaker.stats(),
+                  "retryBudget": mysql_retry_budget.stats()},
+        "sqlServer": {"circuitBreaker": sqlserver_breaker.stats(),
+                      "retryBudget": sqlserver_retry_budget.stats()},
+    }
+
 
 # Health check functions - non-async version for direct calls
 
@@ -176,7 +447,7 @@ def check_mysql_health():
                 "error": "MySQL connection pool not initialized"
             }
 
-        connection = mysql_pool.get_connection()
+        connection = mysql.connector.connect(**MYSQL_CONFIG)
         cursor = connection.cursor()
         cursor.execute("SELECT VERSION()")
         version = cursor.fetchone()[0]
@@ -223,6 +494,329 @@ def check_sqlserver_health():
         }
 
 
+# Connection pooling
+
+
+class PooledConnection:
+    """A pooled driver connection plus the bookkeeping the pool needs"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class PoolExhaustedError(HTTPException):
+    """No pooled connection became free within the checkout timeout"""
+
+    def __init__(self):
+        super().__init__(
+            status_code=503,
+            detail={"Status": False, "Message": "No database connections available"}
+        )
+
+
+# Upper bounds (seconds) of the checkout wait time histogram buckets
+POOL_WAIT_BUCKETS = (0.001, 0.01, 0.1, 0.5, 1, 5, 10, 30)
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe database connection pool
+
+    - Connections are created lazily between `min_size` and `max_size`.
+    - When the pool is exhausted, callers queue (FIFO) for up to
+      `checkout_timeout` seconds before getting a 503.
+    - Idle connections are validated by a background task every
+      `idle_check_interval` seconds instead of on every checkout.
+    - Connections older than `max_lifetime` seconds are recycled.
+
+    All bookkeeping happens under a threading lock so connections can be
+    released from worker threads as well as from the event loop. Blocking
+    driver calls (`connect`, `validate`, `close`) run on `executor`.
+    """
+
+    def __init__(self, name: str, connect, validate=None, min_size: int = 1,
+                 max_size: int = 10, checkout_timeout: float = 10,
+                 max_lifetime: float = 1800, idle_check_interval: float = 30,
+                 executor=None):
+        self.name = name
+        self._connect = connect
+        self._validate = validate
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.checkout_timeout = checkout_timeout
+        self.max_lifetime = max_lifetime
+        self.idle_check_interval = idle_check_interval
+        self._executor = executor
+
+        self._lock = threading.Lock()
+        self._idle = deque()
+        self._waiters = deque()
+        self._size = 0       # idle + in use + being opened
+        self._in_use = 0
+        self._maintenance_task = None
+        self._closed = False
+
+        self._stats = {
+            "checkouts": 0,
+            "checkout_timeouts": 0,
+            "connections_created": 0,
+            "connections_closed": 0,
+            "connect_errors": 0,
+            "validation_failures": 0,
+            "wait_time_total": 0.0,
+        }
+        self._wait_histogram = [0] * (len(POOL_WAIT_BUCKETS) + 1)
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _is_expired(self, entry: PooledConnection) -> bool:
+        return time.monotonic() - entry.created_at > self.max_lifetime
+
+    def _record_wait(self, waited: float):
+        self._stats["wait_time_total"] += waited
+        for index, bound in enumerate(POOL_WAIT_BUCKETS):
+            if waited <= bound:
+                self._wait_histogram[index] += 1
+                return
+        self._wait_histogram[-1] += 1
+
+    def _ensure_maintenance(self):
+        if self._maintenance_task is None and not self._closed:
+            self._maintenance_task = asyncio.get_running_loop().create_task(
+                self._maintain())
+
+    async def _open(self) -> PooledConnection:
+        """Open a connection for a slot that has already been reserved"""
+        try:
+            connection = await self._run(self._connect)
+        except BaseException:
+            with self._lock:
+                self._stats["connect_errors"] += 1
+            self._free_slot()
+            raise
+        with self._lock:
+            self._stats["connections_created"] += 1
+        return PooledConnection(connection)
+
+    async def _close_connection(self, entry: PooledConnection):
+        try:
+            await self._run(entry.connection.close)
+        except Exception as e:
+            logger.warning(f"[{self.name} pool] Error closing connection: {e}")
+        with self._lock:
+            self._stats["connections_closed"] += 1
+
+    def _close_in_background(self, entry: PooledConnection):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None:
+            loop.create_task(self._close_connection(entry))
+        else:
+            try:
+                entry.connection.close()
+            except Exception:
+                pass
+            with self._lock:
+                self._stats["connections_closed"] += 1
+
+    def _hand_off(self, item) -> bool:
+        """Give a connection (or, with None, a free slot) to the next waiter
+
+        Must be called with the lock held. Returns False if nobody is waiting.
+        """
+        while self._waiters:
+            future = self._waiters.popleft()
+            if future.done():
+                continue
+            future.get_loop().call_soon_threadsafe(self._deliver, future, item)
+            return True
+        return False
+
+    def _deliver(self, future, item):
+        if future.done():
+            # The waiter timed out or was cancelled after being chosen
+            self._reclaim(item)
+            return
+        future.set_result(item)
+
+    def _reclaim(self, item):
+        """Put back a connection or slot that was handed to a departed waiter"""
+        if item is None:
+            self._free_slot()
+        else:
+            self._put_back(item, retire=self._is_expired(item))
+
+    def _put_back(self, entry: PooledConnection, retire: bool = False):
+        """Hand a connection that nobody holds to a waiter or the idle list"""
+        with self._lock:
+            retire = retire or self._closed
+            if retire:
+                if not self._hand_off(None):
+                    self._size -= 1
+            elif not self._hand_off(entry):
+                self._idle.append(entry)
+        if retire:
+            self._close_in_background(entry)
+
+    def _free_slot(self):
+        with self._lock:
+            if not self._hand_off(None):
+                self._size -= 1
+
+    async def acquire(self, timeout: Optional[float] = None) -> PooledConnection:
+        """Check out a connection, waiting up to `timeout` seconds
+        (default `checkout_timeout`)"""
+        if self._closed:
+            raise HTTPException(
+                status_code=503,
+                detail={"Status": False, "Message": "Database connection pool is closed"}
+            )
+        self._ensure_maintenance()
+
+        timeout = self.checkout_timeout if timeout is None else timeout
+        start = time.monotonic()
+        future = None
+        entry = None
+        with self._lock:
+            if self._idle:
+                entry = self._idle.pop()  # most recently used first
+            elif self._size < self.max_size:
+                self._size += 1
+            else:
+                future = asyncio.get_running_loop().create_future()
+                self._waiters.append(future)
+
+        if future is not None:
+            try:
+                entry = await asyncio.wait_for(asyncio.shield(future), timeout)
+            except asyncio.TimeoutError:
+                if future.cancel():
+                    with self._lock:
+                        self._stats["checkout_timeouts"] += 1
+                        self._record_wait(time.monotonic() - start)
+                    logger.error(f"[{self.name} pool] Checkout timed out after {timeout}s")
+                    raise PoolExhaustedError()
+                # Resolved right at the deadline: keep what we were given
+                entry = future.result()
+            except asyncio.CancelledError:
+                if not future.cancel():
+                    self._reclaim(future.result())
+                raise
+
+        if entry is not None and self._is_expired(entry):
+            self._close_in_background(entry)
+            entry = None
+
+        if entry is None:
+            entry = await self._open()
+
+        with self._lock:
+            self._in_use += 1
+            self._stats["checkouts"] += 1
+            self._record_wait(time.monotonic() - start)
+        return entry
+
+    def release(self, entry: PooledConnection, discard: bool = False):
+        """Return a checked-out connection (safe to call from any thread)
+
+        Pass `discard=True` when the connection is known to be broken.
+        """
+        entry.last_used = time.monotonic()
+        with self._lock:
+            self._in_use -= 1
+        self._put_back(entry, retire=discard or self._is_expired(entry))
+
+    async def _maintain(self):
+        """Validate idle connections, recycle old ones and keep `min_size` open"""
+        while not self._closed:
+            await asyncio.sleep(self.idle_check_interval)
+            try:
+                await self._check_idle_connections()
+                await self._fill_to_min_size()
+            except Exception as e:
+                logger.error(f"[{self.name} pool] Maintenance error: {e}")
+
+    async def _check_idle_connections(self):
+        now = time.monotonic()
+        with self._lock:
+            stale = [entry for entry in self._idle
+                     if now - entry.last_used >= self.idle_check_interval
+                     or self._is_expired(entry)]
+            for entry in stale:
+                self._idle.remove(entry)
+
+        for entry in stale:
+            healthy = not self._is_expired(entry)
+            if healthy and self._validate is not None:
+                try:
+                    await self._run(self._validate, entry.connection)
+                except Exception as e:
+                    healthy = False
+                    with self._lock:
+                        self._stats["validation_failures"] += 1
+                    logger.warning(
+                        f"[{self.name} pool] Evicting broken idle connection: {e}")
+            if healthy:
+                entry.last_used = time.monotonic()
+            self._put_back(entry, retire=not healthy)
+
+    async def _fill_to_min_size(self):
+        while True:
+            with self._lock:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            entry = await self._open()
+            self._put_back(entry)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool usage for /health and diagnostics"""
+        with self._lock:
+            checkouts = self._stats["checkouts"] + self._stats["checkout_timeouts"]
+            histogram = {f"<={bound}s": count for bound, count
+                         in zip(POOL_WAIT_BUCKETS, self._wait_histogram)}
+            histogram[f">{POOL_WAIT_BUCKETS[-1]}s"] = self._wait_histogram[-1]
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "inUse": self._in_use,
+                "waiting": sum(1 for f in self._waiters if not f.done()),
+                "minSize": self.min_size,
+                "maxSize": self.max_size,
+                "checkouts": self._stats["checkouts"],
+                "checkoutTimeouts": self._stats["checkout_timeouts"],
+                "connectionsCreated": self._stats["connections_created"],
+                "connectionsClosed": self._stats["connections_closed"],
+                "connectErrors": self._stats["connect_errors"],
+                "validationFailures": self._stats["validation_failures"],
+                "avgWaitMs": round(self._stats["wait_time_total"] / checkouts * 1000, 3) if checkouts else 0,
+                "waitTimeHistogram": histogram,
+            }
+
+    async def close(self):
+        """Close idle connections and stop background maintenance"""
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            waiters = list(self._waiters)
+            self._waiters.clear()
+        if self._maintenance_task is not None:
+            self._maintenance_task.cancel()
+            self._maintenance_task = None
+        for future in waiters:
+            future.cancel()
+        for entry in idle:
+            await self._close_connection(entry)
+
+
 # SQL Server Connection settings
 sql_server_config = {
     'server': os.getenv('SQLSERVER_HOST', '.'),
@@ -230,39 +824,36 @@ sql_server_config = {
     'username': os.getenv('SQLSERVER_USER'),
     'password': os.getenv('SQLSERVER_PASSWORD'),
     'pool_size': int(os.getenv('SQLSERVER_POOL_SIZE', '10')),
+    'pool_min_size': int(os.getenv('SQLSERVER_POOL_MIN_SIZE', '1')),
+    'pool_checkout_timeout': float(os.getenv('SQLSERVER_POOL_CHECKOUT_TIMEOUT', '10')),
+    'pool_max_lifetime': float(os.getenv('SQLSERVER_POOL_MAX_LIFETIME', '1800')),
+    'pool_idle_check_interval': float(os.getenv('SQLSERVER_POOL_IDLE_CHECK_INTERVAL', '30')),
     'connection_timeout': int(os.getenv('SQLSERVER_TIMEOUT', '30')),
     'max_retries': int(os.getenv('SQLSERVER_MAX_RETRIES', '3')),
-    'retry_delay': int(os.getenv('SQLSERVER_RETRY_DELAY', '1')),
+    'retry_delay': float(os.getenv('SQLSERVER_RETRY_DELAY', '0.2')),
+    'query_timeout': float(os.getenv('SQLSERVER_QUERY_TIMEOUT', '30')),
+    # Streamed results and exports (see stream_sqlserver_query)
+    'stream_pool_size': int(os.getenv('SQLSERVER_STREAM_POOL_SIZE', '3')),
+    'stream_max_duration': float(os.getenv('SQLSERVER_STREAM_MAX_DURATION', '300')),
+    # 0: one thread per connection of both pools
+    'executor_workers': int(os.getenv('SQLSERVER_EXECUTOR_WORKERS', '0')),
 }
 
-# SQL Server connection pool
-sql_server_pool = []
-sql_server_pool_lock = False
+# Dedicated worker threads for blocking pyodbc calls. Sized like the pools so a
+# query never waits for a thread while holding a connection, and bounded so a
+# burst of slow reports cannot exhaust the default executor used elsewhere.
+sqlserver_executor = ThreadPoolExecutor(
+    max_workers=(sql_server_config['executor_workers']
+                 or sql_server_config['pool_size'] + sql_server_config['stream_pool_size']),
+    thread_name_prefix="sqlserver"
+)
 
 
-def retry_on_error(max_retries=3, delay=1):
-    """Decorator for retrying database operations"""
-    def decorator(func):
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
-            last_error = None
-            for attempt in range(max_retries):
-                try:
-                    return await func(*args, **kwargs)
-                except (pyodbc.Error, MySQLError) as e:
-                    last_error = e
-                    if attempt < max_retries - 1:
-                        wait_time = delay * (attempt + 1)
-                        logger.warning(
-                            f"Attempt {attempt + 1} failed, retrying in {wait_time}s: {str(e)}")
-                        time.sleep(wait_time)
-                    else:
-                        logger.error(
-                            f"All {max_retries} attempts failed: {str(e)}")
-                        raise
-            raise last_error
-        return wrapper
-    return decorator
+async def run_in_sqlserver_executor(func, *args):
+    """Run a blocking pyodbc call on the SQL Server worker threads"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(sqlserver_executor, func, *args)
+
 
 # Find available SQL Server driver
 
@@ -299,130 +890,501 @@ def get_sql_server_driver():
 sql_server_config['driver'] = get_sql_server_driver()
 
 
-async def initialize_sql_server_pool():
-    """Initialize the SQL Server connection pool"""
-    global sql_server_pool, sql_server_pool_lock
+def _sql_server_connection_string() -> str:
+    """Build the connection string used by pooled SQL Server connections"""
+    return (
+        f"DRIVER={sql_server_config['driver']};"
+        f"SERVER={sql_server_config['server']};"
+        f"DATABASE={sql_server_config['database']};"
+        f"UID={sql_server_config['username']};"
+        f"PWD={sql_server_config['password']};"
+        "TrustServerCertificate=yes;"
+        "Encrypt=no;"
+        f"Connection Timeout={sql_server_config['connection_timeout']};"
+        "ApplicationIntent=ReadWrite;"
+        "CharacterSet=UTF-8;"
+    )
 
-    if sql_server_pool_lock:
-        return
 
-    sql_server_pool_lock = True
-    try:
-        # Build connection string
-        connection_string = (
-            f"DRIVER={sql_server_config['driver']};"
-            f"SERVER={sql_server_config['server']};"
-            f"DATABASE={sql_server_config['database']};"
-            f"UID={sql_server_config['username']};"
-            f"PWD={sql_server_config['password']};"
-            "TrustServerCertificate=yes;"
-            "Encrypt=no;"
-            f"Connection Timeout={sql_server_config['connection_timeout']};"
-            "ApplicationIntent=ReadWrite;"
-            "CharacterSet=UTF-8;"
-        )
+def _connect_sql_server():
+    """Open a pooled SQL Server connection (blocking, runs on a worker thread)"""
+    conn = pyodbc.connect(_sql_server_connection_string())
+    conn.setencoding(encoding='cp1252')
+    conn.setdecoding(pyodbc.SQL_CHAR, encoding='cp1252')
+    conn.setdecoding(pyodbc.SQL_WCHAR, encoding='cp1252')
+    return conn
 
-        # Create pool connections
-        for _ in range(sql_server_config['pool_size']):
-            conn = pyodbc.connect(connection_string)
-            conn.setencoding(encoding='cp1252')
-            conn.setdecoding(pyodbc.SQL_CHAR, encoding='cp1252')
-            conn.setdecoding(pyodbc.SQL_WCHAR, encoding='cp1252')
-            sql_server_pool.append({"connection": conn, "in_use": False})
 
-        logger.info(
-            f"SQL Server connection pool initialized with {sql_server_config['pool_size']} connections")
-    except Exception as e:
-        logger.error(f"Error initializing SQL Server pool: {str(e)}")
-        sql_server_pool = []
-    finally:
-        sql_server_pool_lock = False
+def _validate_sql_server(connection):
+    """Ping an idle SQL Server connection (blocking)"""
+    connection.execute("SELECT 1").fetchall()
+
+
+# SQL Server connection pool
+sql_server_pool = ConnectionPool(
+    "sqlserver",
+    connect=_connect_sql_server,
+    validate=_validate_sql_server,
+    min_size=sql_server_config['pool_min_size'],
+    max_size=sql_server_config['pool_size'],
+    checkout_timeout=sql_server_config['pool_checkout_timeout'],
+    max_lifetime=sql_server_config['pool_max_lifetime'],
+    idle_check_interval=sql_server_config['pool_idle_check_interval'],
+    executor=sqlserver_executor,
+)
+
+# Streams hold their connection while the client downloads, so they get a
+# small pool of their own: slow clients can tie up these connections but
+# never the ones every other endpoint queries with
+sql_server_stream_pool = ConnectionPool(
+    "sqlserver-stream",
+    connect=_connect_sql_server,
+    validate=_validate_sql_server,
+    min_size=0,
+    max_size=sql_server_config['stream_pool_size'],
+    checkout_timeout=sql_server_config['pool_checkout_timeout'],
+    max_lifetime=sql_server_config['pool_max_lifetime'],
+    idle_check_interval=sql_server_config['pool_idle_check_interval'],
+    executor=sqlserver_executor,
+)
 
 
-async def get_sql_server_connection_from_pool():
+async def get_sql_server_connection_from_pool() -> PooledConnection:
     """Get a connection from the SQL Server pool"""
-    if not sql_server_pool:
-        await initialize_sql_server_pool()
+    return await sql_server_pool.acquire()
 
-    # Find available connection
-    for conn_info in sql_server_pool:
-        if not conn_info["in_use"]:
-            try:
-                # Test connection before using
-                conn_info["connection"].execute("SELECT 1")
-                conn_info["in_use"] = True
-                return conn_info
-            except pyodbc.Error:
-                # Connection is dead, create new one
-                try:
-                    conn_info["connection"] = await get_sqlserver_connection()
-                    conn_info["in_use"] = True
-                    return conn_info
-                except:
-                    continue
-
-    # No available connections, create new one
-    raise HTTPException(
-        status_code=503,
-        detail={"Status": False, "Message": "No database connections available"}
-    )
 
+# Named parameter compilation
+
+# Tokens that may contain an "@" which is not a query parameter are matched
+# first so they are skipped as a whole
+_SQL_TOKEN = re.compile(r"""
+      '(?:[^']|'')*'          # string literal
+    | \[[^\]]*\]              # bracketed identifier
+    | --[^\n]*                # line comment
+    | /\*.*?\*/               # block comment
+    | @@\w+                   # system function such as @@VERSION
+    | @(?P<name>\w+)          # named parameter
+""", re.VERBOSE | re.DOTALL)
+
+QUERY_CACHE_SIZE = int(os.getenv('QUERY_CACHE_SIZE', '512'))
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def compile_named_query(query: str, names: frozenset) -> Tuple[str, Tuple[str, ...]]:
+    """
+    Compile a query with @Name parameters into pyodbc's positional form
+
+    Returns the SQL with every `@Name` in `names` replaced by `?`, plus the
+    parameter names in placeholder order. Each name is matched as a whole
+    identifier (so `@Year` never touches `@YearEnd`) and may appear any
+    number of times. Variables not in `names`, `@@` functions and anything
+    inside literals, bracketed identifiers or comments are left alone.
+    Results are cached by (query, names) so hot endpoints parse once.
+    """
+    binding = []
+
+    def substitute(match):
+        name = match.group('name')
+        if name is None or name not in names:
+            return match.group(0)
+        binding.append(name)
+        return "?"
+
+    return _SQL_TOKEN.sub(substitute, query), tuple(binding)
+
+
+def bind_named_params(query: str, params: dict) -> Tuple[str, tuple]:
+    """Return (positional SQL, argument tuple) for a query with @Name params"""
+    sql, binding = compile_named_query(query, frozenset(params))
+    return sql, tuple(params[name] for name in binding)
+
+
+# Result sets
+
+
+class RowSet:
+    """
+    Query result kept as column names plus row tuples
+
+    Building a dict per row costs an allocation and a hash insert per cell,
+    which dominates large reads such as the monthly attendance dump. A RowSet
+    keeps the driver's tuples as they are; callers that need the old
+    list-of-dicts shape can still ask for `to_dicts()`.
+    """
+
+    __slots__ = ("columns", "rows")
+
+    def __init__(self, columns: list, rows: list):
+        self.columns = columns
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def index(self, column: str) -> int:
+        """Position of a column in each row tuple"""
+        return self.columns.index(column)
+
+    def to_dicts(self) -> list:
+        """Rows as [{column: value}] (the original result shape)"""
+        columns = self.columns
+        return [dict(zip(columns, row)) for row in self.rows]
+
+    def to_columns(self) -> Dict[str, list]:
+        """Values grouped per column: {column: [value, ...]}"""
+        if not self.rows:
+            return {column: [] for column in self.columns}
+        return {column: list(values)
+                for column, values in zip(self.columns, zip(*self.rows))}
+
+
+def _run_sqlserver_query(connection, cursor, query: str, args: tuple,
+                         as_rows: bool = False):
+    """Execute a query and fetch its result (blocking, runs on a worker thread)"""
+    if args:
+        cursor.execute(query, args)
+    else:
+        cursor.execute(query)
+
+    if query.strip().upper().startswith(('SELECT')):
+        columns = [column[0] for column in cursor.description]
+        rows = cursor.fetchall()
+
+        if as_rows:
+            # pyodbc.Row is tuple-like but not a tuple; json needs real tuples
+            return RowSet(columns, [tuple(row) for row in rows])
 
-@retry_on_error(max_retries=3, delay=1)
-async def execute_sqlserver_query(query: str, params: dict = None):
-    """Execute a SQL Server query and return results"""
-    conn_info = None
+        # Convert rows to dictionaries
+        result = []
+        for row in rows:
+            result.append(dict(zip(columns, row)))
+
+        return result
+    else:
+        connection.commit()
+        return {"affected_rows": cursor.rowcount}
+
+
+def _cancel_cursor(cursor):
+    """Ask the driver to abort the statement running on a cursor"""
     try:
-        conn_info = await get_sql_server_connection_from_pool()
-        connection = conn_info["connection"]
-        cursor = connection.cursor()
+        cursor.cancel()
+    except pyodbc.Error as err:
+        logger.warning(f"Could not cancel SQL Server query: {err}")
 
-        if params:
-            # Handle named parameters in SQL Server query
-            for key, value in params.items():
-                # Replace named parameters with ? placeholders
-                query = query.replace(f"@{key}", "?")
 
-            # Execute with parameters as a tuple in the same order they appear in the query
-            cursor.execute(query, tuple(params.values()))
-        else:
-            cursor.execute(query)
+def _is_connection_error(err: Exception) -> bool:
+    """Whether a driver error means the connection itself is unusable"""
+    if isinstance(err, (pyodbc.OperationalError, pyodbc.InterfaceError)):
+        return True
+    # SQLSTATE class 08 is "connection exception"
+    return bool(err.args) and str(err.args[0]).startswith('08')
 
-        if query.strip().upper().startswith(('SELECT')):
-            columns = [column[0] for column in cursor.description]
-            rows = cursor.fetchall()
 
-            # Convert rows to dictionaries
-            result = []
-            for row in rows:
-                result.append(dict(zip(columns, row)))
+def _release_sqlserver_connection(pooled, cursor, error: Exception = None,
+                                  pool: ConnectionPool = None):
+    """Return a connection to its pool once its worker thread is done with it"""
+    try:
+        cursor.close()
+    except pyodbc.Error:
+        pass
+    discard = isinstance(error, pyodbc.Error) and _is_connection_error(error)
+    (pool or sql_server_pool).release(pooled, discard=discard)
+
+
+@retry_on_error(max_retries=sql_server_config['max_retries'],
+                delay=sql_server_config['retry_delay'],
+                budget=sqlserver_retry_budget)
+@with_circuit_breaker(sqlserver_breaker)
+async def execute_sqlserver_query(query: str, params: dict = None, timeout: float = None,
+                                  as_rows: bool = False):
+    """Execute a SQL Server query and return results
+
+    The blocking driver calls run on the dedicated SQL Server executor so the
+    event loop keeps serving other requests. If the query outlives `timeout`
+    seconds (SQLSERVER_QUERY_TIMEOUT by default) or the awaiting request is
+    cancelled, the statement is cancelled on the server.
+
+    SELECTs return a list of dicts, or a RowSet when `as_rows` is set.
+    """
+    if timeout is None:
+        timeout = sql_server_config['query_timeout']
+
+    pooled = None
+    cursor = None
+    future = None
+    try:
+        pooled = await get_sql_server_connection_from_pool()
+        connection = pooled.connection
+        cursor = connection.cursor()
 
-            return result
-        else:
-            connection.commit()
-            return {"affected_rows": cursor.rowcount}
+        args = ()
+        if params:
+            # Rewrite @Name parameters to ? placeholders in the order they appear
+            query, args = bind_named_params(query, params)
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            sqlserver_executor, _run_sqlserver_query, connection, cursor, query, args,
+            as_rows)
+
+        # Shield the worker future so a timeout does not detach it from the
+        # connection it is still using; the connection is released only once
+        # the worker thread has actually finished.
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+    except asyncio.TimeoutError:
+        logger.error(f"SQL Server query timed out after {timeout}s")
+        _cancel_cursor(cursor)
+        raise HTTPException(
+            status_code=504,
+            detail={"Status": False, "Message": "Database query timed out"}
+        )
+    except asyncio.CancelledError:
+        if cursor is not None:
+            _cancel_cursor(cursor)
+        raise
     except pyodbc.Error as err:
         logger.error(f"Error executing SQL Server query: {err}")
         raise HTTPException(
             status_code=500,
             detail={"Status": False, "Error": str(
                 err), "Message": "Database query failed"}
-        )
+        ) from err
+    finally:
+        if pooled:
+            if future is None:
+                sql_server_pool.release(pooled, discard=cursor is None)
+            else:
+                def _release_when_done(f):
+                    # Consume the worker's outcome so it is not reported as unhandled
+                    error = None if f.cancelled() else f.exception()
+                    _release_sqlserver_connection(pooled, cursor, error)
+                if future.done():
+                    _release_when_done(future)
+                else:
+                    future.add_done_callback(_release_when_done)
+
+# Rows fetched per round trip when streaming a result set
+STREAM_BATCH_SIZE = int(os.getenv('QUERY_STREAM_BATCH_SIZE', '1000'))
+
+
+def _start_sqlserver_stream(cursor, query: str, args: tuple) -> list:
+    """Execute a streamed SELECT and return its column names (blocking)"""
+    if args:
+        cursor.execute(query, args)
+    else:
+        cursor.execute(query)
+    return [column[0] for column in cursor.description]
+
+
+def _fetch_sqlserver_batch(cursor, batch_size: int) -> list:
+    """Fetch the next batch of a streamed SELECT (blocking)"""
+    return [tuple(row) for row in cursor.fetchmany(batch_size)]
+
+
+async def stream_sqlserver_query(query: str, params: dict = None,
+                                 batch_size: int = None, timeout: float = None,
+                                 max_duration: float = None):
+    """Execute a SQL Server SELECT and yield its rows as RowSet batches
+
+    Rows are fetched `batch_size` at a time (QUERY_STREAM_BATCH_SIZE by
+    default), so memory stays flat however large the result is. The first
+    batch is always yielded, even when empty, so callers learn the columns.
+    `timeout` bounds the statement and each batch fetch separately.
+
+    The connection comes from the stream pool (SQLSERVER_STREAM_POOL_SIZE)
+    and is held until the generator finishes; closing the generator early
+    cancels the statement. A stream still open after `max_duration` seconds
+    (SQLSERVER_STREAM_MAX_DURATION), typically because the client reads
+    slowly or not at all, is cancelled and its connection returned at once,
+    even while the generator waits for the client; the client gets a
+    truncated response. Streams are not retried, since rows may already
+    have been sent, but they count towards the circuit breaker like any
+    other query.
+    """
+    if timeout is None:
+        timeout = sql_server_config['query_timeout']
+    if batch_size is None:
+        batch_size = STREAM_BATCH_SIZE
+    if max_duration is None:
+        max_duration = sql_server_config['stream_max_duration']
+
+    probe = sqlserver_breaker.before_call()
+    pooled = None
+    cursor = None
+    pending = None
+    watchdog = None
+    finished = False
+    expired = False
+    released = False
+    failure = None
+
+    def _release(error: Exception = None):
+        nonlocal released
+        if not released:
+            released = True
+            _release_sqlserver_connection(pooled, cursor, error, pool=sql_server_stream_pool)
+
+    def _expire():
+        nonlocal expired
+        expired = True
+        logger.error(f"SQL Server stream still open after {max_duration}s, aborting it")
+        _cancel_cursor(cursor)
+        if pending is None or pending.done():
+            # Waiting on the client, not the database: free the connection now
+            _release()
+
+    try:
+        pooled = await sql_server_stream_pool.acquire()
+        cursor = pooled.connection.cursor()
+
+        args = ()
+        if params:
+            query, args = bind_named_params(query, params)
+
+        loop = asyncio.get_running_loop()
+        watchdog = loop.call_later(max_duration, _expire)
+        pending = loop.run_in_executor(
+            sqlserver_executor, _start_sqlserver_stream, cursor, query, args)
+        columns = await asyncio.wait_for(asyncio.shield(pending), timeout)
+
+        first = True
+        while True:
+            if expired:
+                raise asyncio.TimeoutError()
+            pending = loop.run_in_executor(
+                sqlserver_executor, _fetch_sqlserver_batch, cursor, batch_size)
+            rows = await asyncio.wait_for(asyncio.shield(pending), timeout)
+            if rows or first:
+                yield RowSet(columns, rows)
+            first = False
+            if len(rows) < batch_size:
+                break
+        finished = True
+    except (asyncio.TimeoutError, pyodbc.Error) as err:
+        if expired:
+            failure = HTTPException(
+                status_code=504,
+                detail={"Status": False, "Message": f"Stream exceeded {max_duration}s"}
+            )
+        elif isinstance(err, asyncio.TimeoutError):
+            logger.error(f"SQL Server stream timed out after {timeout}s")
+            _cancel_cursor(cursor)
+            failure = HTTPException(
+                status_code=504,
+                detail={"Status": False, "Message": "Database query timed out"}
+            )
+        else:
+            logger.error(f"Error streaming SQL Server query: {err}")
+            failure = HTTPException(
+                status_code=500,
+                detail={"Status": False, "Error": str(
+                    err), "Message": "Database query failed"}
+            )
+        raise failure from err
+    except Exception as err:
+        failure = err
+        raise
     finally:
-        if conn_info:
-            conn_info["in_use"] = False
+        if watchdog is not None:
+            watchdog.cancel()
+        if expired:
+            # A slow client says nothing about the server's health
+            if probe:
+                sqlserver_breaker.abandon_probe()
+        elif failure is not None:
+            sqlserver_breaker.record(is_backend_failure(failure), probe)
+        elif finished:
+            sqlserver_breaker.record(False, probe)
+        else:
+            # Consumer stopped early (client went away or task cancelled)
+            if cursor is not None:
+                _cancel_cursor(cursor)
+            if probe:
+                sqlserver_breaker.abandon_probe()
+
+        if pooled and not released:
+            if cursor is None:
+                released = True
+                sql_server_stream_pool.release(pooled, discard=True)
+            elif pending is None:
+                _release()
+            else:
+                def _release_when_done(f):
+                    _release(None if f.cancelled() else f.exception())
+                if pending.done():
+                    _release_when_done(pending)
+                else:
+                    pending.add_done_callback(_release_when_done)
+
+
+async def close_pools():
+    """Close pooled database connections (application shutdown)"""
+    await sql_server_pool.close()
+    await sql_server_stream_pool.close()
+    if mysql_pool is not None:
+        await mysql_pool.close()
+
+
+# Worker threads for blocking mysql.connector calls, sized like the pool
+mysql_executor = ThreadPoolExecutor(
+    max_workers=mysql_pool_config['pool_size'],
+    thread_name_prefix="mysql"
+)
+
+
+def _connect_mysql():
+    """Open a pooled MySQL connection (blocking, runs on a worker thread)"""
+    connection = mysql.connector.connect(**MYSQL_CONFIG)
+    # Server-side guard for long SELECTs; MariaDB and older MySQL lack it
+    timeout_ms = int(mysql_pool_config['query_timeout'] * 1000)
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"SET SESSION max_execution_time = {timeout_ms}")
+    except MySQLError as err:
+        logger.debug(f"max_execution_time not supported: {err}")
+    finally:
+        cursor.close()
+    return connection
+
+
+def _validate_mysql(connection):
+    """Ping an idle MySQL connection (blocking)"""
+    connection.ping(reconnect=False)
+
+
+# Initialize MySQL connection pool (connections are opened on demand)
+if FORCE_DEMO_DATA:
+    logger.warning(
+        "FORCE_DEMO_DATA is set to True. Using demo data for MySQL.")
+    mysql_pool = None
+else:
+    mysql_pool = ConnectionPool(
+        "mysql",
+        connect=_connect_mysql,
+        validate=_validate_mysql,
+        min_size=mysql_pool_config['pool_min_size'],
+        max_size=mysql_pool_config['pool_size'],
+        checkout_timeout=mysql_pool_config['pool_checkout_timeout'],
+        max_lifetime=mysql_pool_config['pool_max_lifetime'],
+        idle_check_interval=mysql_pool_config['pool_idle_check_interval'],
+        executor=mysql_executor,
+    )
 
 # Get MySQL connection from pool
 
 
-async def get_mysql_connection():
-    """Get a connection from the MySQL pool"""
+async def get_mysql_connection() -> PooledConnection:
+    """Get a connection from the MySQL pool, waiting if it is exhausted"""
     if not mysql_pool:
         raise Exception("MySQL connection pool not available")
 
     try:
-        connection = mysql_pool.get_connection()
-        return connection
+        return await mysql_pool.acquire()
     except MySQLError as err:
         logger.error(f"Error getting MySQL connection: {err}")
         raise
@@ -430,29 +1392,87 @@ async def get_mysql_connection():
 # Execute MySQL query
 
 
-async def execute_mysql_query(query: str, params: tuple = None):
-    """Execute a MySQL query and return results"""
-    connection = None
+def _run_mysql_query(connection, query: str, params: tuple, as_rows: bool = False):
+    """Execute a MySQL statement and fetch its result (blocking)"""
+    cursor = connection.cursor(dictionary=not as_rows)
     try:
-        connection = await get_mysql_connection()
-        cursor = connection.cursor(dictionary=True)
         if params:
             cursor.execute(query, params)
         else:
             cursor.execute(query)
 
         if query.strip().upper().startswith(('SELECT', 'SHOW')):
-            result = cursor.fetchall()
-            return result
+            if as_rows:
+                return RowSet(list(cursor.column_names), cursor.fetchall())
+            return cursor.fetchall()
         else:
             connection.commit()
             return {"affected_rows": cursor.rowcount}
+    finally:
+        cursor.close()
+
+
+def _is_mysql_connection_error(err: Exception) -> bool:
+    """Whether a MySQL error means the connection itself is unusable"""
+    return isinstance(err, (mysql.connector.errors.OperationalError,
+                            mysql.connector.errors.InterfaceError))
+
+
+@retry_on_error(max_retries=mysql_pool_config['max_retries'],
+                delay=mysql_pool_config['retry_delay'],
+                budget=mysql_retry_budget)
+@with_circuit_breaker(mysql_breaker)
+async def execute_mysql_query(query: str, params: tuple = None, timeout: float = None,
+                              as_rows: bool = False):
+    """Execute a MySQL query and return results
+
+    Runs on the MySQL executor so logins and reports do not block the event
+    loop. Waits for a pooled connection when all are busy. A statement that
+    outlives `timeout` seconds (MYSQL_QUERY_TIMEOUT by default) fails with
+    504 and its connection is discarded once the driver returns.
+
+    SELECTs return a list of dicts, or a RowSet when `as_rows` is set.
+    """
+    if timeout is None:
+        timeout = mysql_pool_config['query_timeout']
+
+    pooled = None
+    future = None
+    timed_out = False
+    try:
+        pooled = await get_mysql_connection()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            mysql_executor, _run_mysql_query, pooled.connection, query, params,
+            as_rows)
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+    except asyncio.TimeoutError:
+        timed_out = True
+        logger.error(f"MySQL query timed out after {timeout}s")
+        raise HTTPException(
+            status_code=504,
+            detail={"Status": False, "Message": "Database query timed out"}
+        )
+    except asyncio.CancelledError:
+        timed_out = True
+        raise
     except MySQLError as err:
         logger.error(f"Error executing MySQL query: {err}")
         raise
     finally:
-        if connection:
-            connection.close()
+        if pooled:
+            if future is None:
+                mysql_pool.release(pooled)
+            else:
+                def _release_when_done(f):
+                    error = None if f.cancelled() else f.exception()
+                    # An abandoned statement may leave unread results behind
+                    discard = timed_out or _is_mysql_connection_error(error)
+                    mysql_pool.release(pooled, discard=discard)
+                if future.done():
+                    _release_when_done(future)
+                else:
+                    future.add_done_callback(_release_when_done)
 
 # Get SQL Server connection
 
@@ -473,7 +1493,7 @@ async def get_sqlserver_connection():
             "ApplicationIntent=ReadWrite;"
         )
         logger.info("Attempting SQL Server connection")
-        connection = pyodbc.connect(connection_string)
+        connection = await run_in_sqlserver_executor(pyodbc.connect, connection_string)
         connection.setencoding(encoding='utf-8')
         connection.setdecoding(pyodbc.SQL_CHAR, encoding='utf-8')
         connection.setdecoding(pyodbc.SQL_WCHAR, encoding='utf-8')
@@ -487,28 +1507,84 @@ async def get_sqlserver_connection():
                 status_code=500,
                 detail={"Status": False, "Error": "Database authentication failed",
                         "Message": "Invalid username or password"}
-            )
+            ) from err
         elif "Cannot open database" in error_msg:
             raise HTTPException(
                 status_code=500,
                 detail={"Status": False, "Error": "Database not found",
                         "Message": f"Database '{SQL_SERVER_CONFIG['database']}' does not exist"}
-            )
+            ) from err
         else:
             raise HTTPException(
                 status_code=500,
                 detail={"Status": False, "Error": "Connection failed",
                         "Message": "Could not connect to database server"}
-            )
+            ) from err
 
 # Async health check functions
 
 
-async def check_mysql_health_async() -> Dict[str, Any]:
-    """Check MySQL connection health asynchronously"""
-    return check_mysql_health()
+def _select_version(connection, query: str) -> str:
+    """Run a one-value version query (blocking)"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query)
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+
+async def _probe_pool(pool: ConnectionPool, query: str,
+                      checkout_timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Run `query` on a pooled connection instead of opening a new one
+
+    A pool whose connections all stay busy for `checkout_timeout` seconds
+    is reported as "saturated": the server is answering, just not fast
+    enough for the current load.
+    """
+    try:
+        entry = await pool.acquire(checkout_timeout)
+    except PoolExhaustedError:
+        return {"status": "saturated",
+                "error": f"All {pool.max_size} pooled connections are busy"}
+    # Default executor, not the query workers, so a probe never queues
+    # behind long-running reports
+    future = asyncio.get_running_loop().run_in_executor(
+        None, _select_version, entry.connection, query)
+
+    def _release(f):
+        # Released only once the driver call has ended, even if the caller
+        # gave up waiting; a connection that failed the probe is discarded
+        pool.release(entry, discard=f.cancelled() or f.exception() is not None)
+    future.add_done_callback(_release)
 
+    version = await asyncio.shield(future)
+    return {"status": "healthy", "version": version}
 
-async def check_sqlserver_health_async() -> Dict[str, Any]:
-    """Check SQL Server connection health asynchronously"""
-    return check_sqlserver_health()
+
+def _unhealthy(err: Exception) -> Dict[str, Any]:
+    return {"status": "unhealthy", "error": str(getattr(err, "detail", None) or err)}
+
+
+async def check_mysql_health_async(checkout_timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Check MySQL connection health on a pooled connection"""
+    if FORCE_DEMO_DATA:
+        return {"status": "demo", "version": "Demo Mode"}
+    if mysql_pool is None:
+        return {"status": "unhealthy", "error": "MySQL connection pool not initialized"}
+    try:
+        return await _probe_pool(mysql_pool, "SELECT VERSION()", checkout_timeout)
+    except Exception as e:
+        logger.error(f"MySQL health check failed: {str(e)}")
+        return _unhealthy(e)
+
+
+async def check_sqlserver_health_async(checkout_timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Check SQL Server connection health on a pooled connection"""
+    if FORCE_DEMO_DATA:
+        return {"status": "demo", "version": "Demo Mode"}
+    try:
+        return await _probe_pool(sql_server_pool, "SELECT @@VERSION", checkout_timeout)
+    except Exception as e:
+        logger.error(f"SQL Server health check failed: {str(e)}")
+        return _unhealthy(e)
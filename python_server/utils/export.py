@@ -0,0 +1,290 @@
+"""
+Streaming CSV/XLSX export
+
+Exports are written while the rows stream out of the database
+(utils.db.stream_sqlserver_query), so memory stays flat however many rows
+a month or an employee list has, and the client starts receiving the file
+after the first batch. Encoding a batch runs on a small dedicated thread
+pool (EXPORT_WORKERS) to keep the event loop free; each batch is encoded,
+sent and dropped before the next one is fetched.
+
+- csv:  UTF-8 with a byte order mark so Excel shows Vietnamese names
+        correctly. Pass gzip=True to compress it on the fly (.csv.gz).
+- xlsx: a single-sheet workbook written as a streamed zip. Text is stored
+        inline rather than in a shared string table, and dates are written
+        as ISO text, so no part of the file needs all the rows at once.
+"""
+import asyncio
+import csv
+import io
+import logging
+import math
+import os
+import re
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, AsyncIterator, List, Optional
+from xml.sax.saxutils import escape, quoteattr
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger("export")
+
+EXPORT_FORMATS = ("csv", "xlsx")
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '5000'))   # rows per database round trip
+EXPORT_WORKERS = int(os.getenv('EXPORT_WORKERS', '2'))            # threads encoding export batches
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "gzip": "application/gzip",
+}
+
+export_executor = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix="export")
+
+
+def check_export_format(export_format: str, gzip: bool = False) -> str:
+    """Validate ?format= and ?gzip= of an export endpoint"""
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail={"Status": False,
+                    "Message": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}
+        )
+    if gzip and export_format == "xlsx":
+        raise HTTPException(
+            status_code=400,
+            detail={"Status": False, "Message": "xlsx files are already compressed; gzip applies to csv only"}
+        )
+    return export_format
+
+
+def _text(value: Any) -> str:
+    """Cell text for the driver types (dates as ISO, bytes decoded)"""
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    return str(value)
+
+
+class CsvEncoder:
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _take(self) -> bytes:
+        data = self._buffer.getvalue().encode("utf-8")
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def begin(self, columns: List[str]) -> bytes:
+        self._writer.writerow(columns)
+        return b"\xef\xbb\xbf" + self._take()
+
+    def encode(self, rows) -> bytes:
+        self._writer.writerows([_text(value) for value in row] for row in rows)
+        return self._take()
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class _Drain:
+    """Write-only, unseekable file that hands out what was written so far"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+# Characters XML 1.0 does not allow, even escaped
+_ILLEGAL_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name={name} sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+_XLSX_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_XLSX_SHEET_END = '</sheetData></worksheet>'
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+class XlsxEncoder:
+    def __init__(self, sheet_name: str = "Sheet1"):
+        # Excel limits sheet names to 31 characters and forbids []:*?/\
+        self.sheet_name = re.sub(r"[\[\]:*?/\\]", "-", sheet_name)[:31] or "Sheet1"
+        self._drain = _Drain()
+        self._zip = None
+        self._sheet = None
+        self._letters: List[str] = []
+        self._row = 0
+
+    def _cell(self, letter: str, value: Any) -> str:
+        ref = f"{letter}{self._row}"
+        if isinstance(value, bool):
+            return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+        if isinstance(value, int) or (isinstance(value, (float, Decimal)) and math.isfinite(value)):
+            return f'<c r="{ref}"><v>{value}</v></c>'
+        text = _ILLEGAL_XML.sub("", _text(value))
+        if not text:
+            return ""
+        return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+    def _write_row(self, values) -> str:
+        self._row += 1
+        cells = "".join(self._cell(letter, value) for letter, value in zip(self._letters, values))
+        return f'<row r="{self._row}">{cells}</row>'
+
+    def begin(self, columns: List[str]) -> bytes:
+        self._letters = [_column_letter(index) for index in range(len(columns))]
+        self._zip = zipfile.ZipFile(self._drain, "w", zipfile.ZIP_DEFLATED)
+        self._zip.writestr("[Content_Types].xml", _XLSX_CONTENT_TYPES)
+        self._zip.writestr("_rels/.rels", _XLSX_ROOT_RELS)
+        self._zip.writestr("xl/workbook.xml", _XLSX_WORKBOOK.format(name=quoteattr(self.sheet_name)))
+        self._zip.writestr("xl/_rels/workbook.xml.rels", _XLSX_WORKBOOK_RELS)
+        self._sheet = self._zip.open("xl/worksheets/sheet1.xml", "w")
+        self._sheet.write((_XLSX_SHEET_START + self._write_row(columns)).encode("utf-8"))
+        return self._drain.take()
+
+    def encode(self, rows) -> bytes:
+        self._sheet.write("".join(self._write_row(row) for row in rows).encode("utf-8"))
+        return self._drain.take()
+
+    def finish(self) -> bytes:
+        self._sheet.write(_XLSX_SHEET_END.encode("utf-8"))
+        self._sheet.close()
+        self._zip.close()
+        return self._drain.take()
+
+
+class _Gzip:
+    """Compresses an encoder's output on the fly"""
+
+    def __init__(self, encoder):
+        self.encoder = encoder
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def begin(self, columns) -> bytes:
+        return self._compressor.compress(self.encoder.begin(columns))
+
+    def encode(self, rows) -> bytes:
+        return self._compressor.compress(self.encoder.encode(rows))
+
+    def finish(self) -> bytes:
+        return self._compressor.compress(self.encoder.finish()) + self._compressor.flush()
+
+
+def make_encoder(export_format: str, sheet_name: str = "Sheet1", gzip: bool = False):
+    encoder = XlsxEncoder(sheet_name) if export_format == "xlsx" else CsvEncoder()
+    return _Gzip(encoder) if gzip else encoder
+
+
+async def _encode_export(first, batches: AsyncIterator, encoder):
+    """Encode RowSet batches off the event loop as they arrive"""
+    loop = asyncio.get_running_loop()
+    rows = 0
+    try:
+        yield await loop.run_in_executor(export_executor, encoder.begin, first.columns)
+        batch = first
+        while batch is not None:
+            if batch.rows:
+                chunk = await loop.run_in_executor(export_executor, encoder.encode, batch.rows)
+                rows += len(batch.rows)
+                if chunk:
+                    yield chunk
+            batch = await anext(batches, None)
+        yield await loop.run_in_executor(export_executor, encoder.finish)
+        logger.info(f"Exported {rows} rows")
+    except Exception as e:
+        # Headers are already sent; abort so the client sees an incomplete file
+        logger.error(f"Export failed after {rows} rows: {str(e)}")
+        raise
+    finally:
+        await batches.aclose()
+
+
+async def export_response(batches: AsyncIterator, export_format: str, filename: str,
+                          sheet_name: Optional[str] = None, gzip: bool = False) -> StreamingResponse:
+    """
+    Stream RowSet batches to the client as a CSV or XLSX download
+
+    `filename` is given without extension. The first batch is awaited
+    before responding, so connection errors and timeouts still surface as
+    normal HTTP errors.
+    """
+    try:
+        first = await anext(batches, None)
+    except BaseException:
+        await batches.aclose()
+        raise
+    if first is None:
+        await batches.aclose()
+        raise HTTPException(status_code=500, detail={"Status": False, "Message": "Export query returned no result"})
+
+    encoder = make_encoder(export_format, sheet_name or filename, gzip)
+    filename = f"{filename}.{export_format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        _encode_export(first, batches, encoder),
+        media_type=MEDIA_TYPES["gzip" if gzip else export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
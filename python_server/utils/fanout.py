@@ -0,0 +1,81 @@
+"""
+Concurrent fan-out for endpoints that need several independent queries
+
+`fan_out` starts every call at once, at most FANOUT_CONCURRENCY at a time
+so one request cannot take a whole connection pool, and gives them one
+shared deadline of FANOUT_TIMEOUT seconds. Calls still running at the
+deadline are cancelled (which cancels their statements, see utils/db.py).
+A failing call does not affect the others: its exception is kept in
+`errors` and the endpoint decides what to do with the sections it has.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger("fanout")
+
+FANOUT_TIMEOUT = float(os.getenv('FANOUT_TIMEOUT', '15'))        # seconds for all calls together
+FANOUT_CONCURRENCY = int(os.getenv('FANOUT_CONCURRENCY', '4'))   # calls in flight per fan-out
+
+
+class FanOutResult:
+    """Results, errors and per-call timings (seconds) of one fan-out"""
+
+    def __init__(self):
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, BaseException] = {}
+        self.timings: Dict[str, float] = {}
+
+    def ok(self, name: str) -> bool:
+        return name in self.results
+
+    def get(self, name: str, default=None):
+        return self.results.get(name, default)
+
+    def raise_if_all_failed(self):
+        """Re-raise the first error when no call succeeded"""
+        if self.errors and not self.results:
+            raise next(iter(self.errors.values()))
+
+
+async def fan_out(calls: Dict[str, Callable[[], Awaitable[Any]]],
+                  timeout: Optional[float] = None, limit: Optional[int] = None) -> FanOutResult:
+    """Run `calls` (name -> zero-argument coroutine function) concurrently"""
+    timeout = FANOUT_TIMEOUT if timeout is None else timeout
+    semaphore = asyncio.Semaphore(limit or FANOUT_CONCURRENCY)
+    outcome = FanOutResult()
+
+    async def run(name: str):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                outcome.results[name] = await calls[name]()
+            except Exception as e:
+                outcome.errors[name] = e
+            finally:
+                outcome.timings[name] = time.perf_counter() - start
+
+    tasks = {name: asyncio.ensure_future(run(name)) for name in calls}
+    if not tasks:
+        return outcome
+    try:
+        _, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+    except asyncio.CancelledError:
+        for task in tasks.values():
+            task.cancel()
+        raise
+
+    if pending:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for name, task in tasks.items():
+            if task in pending:
+                outcome.errors[name] = asyncio.TimeoutError(
+                    f"{name} did not finish within {timeout}s")
+
+    for name, error in outcome.errors.items():
+        logger.warning(f"Fan-out call '{name}' failed: {str(error) or type(error).__name__}")
+    return outcome
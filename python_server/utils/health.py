@@ -0,0 +1,156 @@
+"""
+Background database health monitor
+
+/health and the reports' pre-query check used to open a brand-new
+connection (TCP, TLS and login) and run a version query on every call.
+Instead, one task probes each backend every HEALTH_CHECK_INTERVAL seconds
+on a pooled connection and keeps the latest result plus a short latency
+history; readers get that snapshot without touching the database.
+
+The monitor is started and stopped with the application (see main.py).
+Until the first probe completes a backend is "unknown", which callers
+treat as usable: the query itself will report a real outage. The probe
+waits at most HEALTH_CHECKOUT_TIMEOUT for a pooled connection; when every
+connection stays busy (long reports or exports) the backend is
+"saturated", which is also treated as usable rather than down.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.db import check_mysql_health_async, check_sqlserver_health_async
+
+logger = logging.getLogger("health")
+
+HEALTH_CHECK_INTERVAL = float(os.getenv('HEALTH_CHECK_INTERVAL', '15'))  # seconds
+HEALTH_PROBE_TIMEOUT = float(os.getenv('HEALTH_PROBE_TIMEOUT', '5'))     # seconds
+HEALTH_HISTORY_SIZE = int(os.getenv('HEALTH_HISTORY_SIZE', '20'))       # probes kept per backend
+# Longest a probe waits for a pooled connection; must leave the query time
+# within HEALTH_PROBE_TIMEOUT
+HEALTH_CHECKOUT_TIMEOUT = float(os.getenv('HEALTH_CHECKOUT_TIMEOUT', str(HEALTH_PROBE_TIMEOUT / 2)))  # seconds
+
+UNKNOWN = "unknown"
+HEALTHY = "healthy"
+UNHEALTHY = "unhealthy"
+SATURATED = "saturated"
+DEMO = "demo"
+
+
+class BackendHealth:
+    """Latest probe result and recent history of one backend"""
+
+    def __init__(self, history_size: int = HEALTH_HISTORY_SIZE):
+        self.status = UNKNOWN
+        self.version: Optional[str] = None
+        self.error: Optional[str] = None
+        self.latency: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.consecutive_failures = 0
+        self.history = deque(maxlen=history_size)
+
+    def record(self, result: Dict[str, Any], latency: float):
+        self.status = result.get("status", UNHEALTHY)
+        self.version = result.get("version", self.version)
+        self.error = result.get("error")
+        self.latency = latency
+        self.checked_at = time.time()
+        if self.status in (HEALTHY, SATURATED, DEMO):
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+        self.history.append((self.checked_at, self.status, latency))
+
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot = {"status": self.status}
+        if self.version is not None:
+            snapshot["version"] = self.version
+        if self.error is not None:
+            snapshot["error"] = self.error
+        if self.checked_at is not None:
+            snapshot.update({
+                "latencyMs": round(self.latency * 1000, 1),
+                "checkedAt": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.checked_at)),
+                "ageSeconds": round(time.time() - self.checked_at, 1),
+                "consecutiveFailures": self.consecutive_failures,
+                "history": [{"status": status, "latencyMs": round(latency * 1000, 1)}
+                            for _, status, latency in self.history],
+            })
+        return snapshot
+
+
+class HealthMonitor:
+    """Probes backends on an interval and serves the results from memory"""
+
+    def __init__(self, probes: Dict[str, Callable[[], Awaitable[Dict[str, Any]]]],
+                 interval: float = HEALTH_CHECK_INTERVAL, timeout: float = HEALTH_PROBE_TIMEOUT,
+                 history_size: int = HEALTH_HISTORY_SIZE):
+        self.probes = probes
+        self.interval = interval
+        self.timeout = timeout
+        self.backends = {name: BackendHealth(history_size) for name in probes}
+        self._task: Optional[asyncio.Task] = None
+
+    async def probe(self, name: str):
+        """Probe one backend now and record the result"""
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(self.probes[name](), self.timeout)
+        except asyncio.TimeoutError:
+            result = {"status": UNHEALTHY, "error": f"Health probe timed out after {self.timeout}s"}
+        except Exception as e:
+            result = {"status": UNHEALTHY, "error": str(e)}
+        backend = self.backends[name]
+        previous = backend.status
+        backend.record(result, time.perf_counter() - start)
+        if backend.status != previous and previous != UNKNOWN:
+            logger.warning(f"{name} is now {backend.status}")
+
+    async def probe_all(self):
+        """Probe every backend concurrently"""
+        await asyncio.gather(*(self.probe(name) for name in self.probes))
+
+    async def _run(self):
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                logger.error(f"Health monitor error: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def status(self, name: str) -> Dict[str, Any]:
+        """Latest snapshot of one backend"""
+        return self.backends[name].snapshot()
+
+    def is_available(self, name: str) -> bool:
+        """False only when the last probe found the backend down"""
+        return self.backends[name].status != UNHEALTHY
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: backend.snapshot() for name, backend in self.backends.items()}
+
+
+health_monitor = HealthMonitor({
+    "mysql": partial(check_mysql_health_async, checkout_timeout=HEALTH_CHECKOUT_TIMEOUT),
+    "sqlServer": partial(check_sqlserver_health_async, checkout_timeout=HEALTH_CHECKOUT_TIMEOUT),
+})
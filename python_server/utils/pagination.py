@@ -0,0 +1,170 @@
+import base64
+import binascii
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+
+from utils.cache import create_cache
+from utils.db import execute_sqlserver_query
+from utils.responses import RESULT_FORMATS, json_default, rowset_response
+
+logger = logging.getLogger("pagination")
+
+DEFAULT_PAGE_SIZE = int(os.getenv('PAGE_SIZE_DEFAULT', '100'))
+MAX_PAGE_SIZE = int(os.getenv('PAGE_SIZE_MAX', '1000'))
+
+# Total counts are the expensive part of a paged list, so they are cached
+PAGE_TOTAL_CACHE_TTL = float(os.getenv('PAGE_TOTAL_CACHE_TTL', '60'))
+PAGE_TOTAL_CACHE_SIZE = int(os.getenv('PAGE_TOTAL_CACHE_SIZE', '256'))
+
+
+def _invalid_cursor():
+    return HTTPException(
+        status_code=400,
+        detail={"Status": False, "Message": "Invalid pagination cursor"}
+    )
+
+
+class Keyset:
+    """
+    Sort key of a keyset-paginated query
+
+    Each column is (result column, "ASC" | "DESC"), optionally with a value
+    that stands in for NULL so rows from outer joins still order strictly.
+    The last column must make the key unique.
+    """
+
+    def __init__(self, *columns: Tuple):
+        self.columns = []
+        for column in columns:
+            null_value = column[2] if len(column) > 2 else None
+            self.columns.append((column[0], column[1].upper(), null_value))
+
+    def _expression(self, position: int) -> str:
+        name, _, null_value = self.columns[position]
+        if null_value is None:
+            return f"[{name}]"
+        return f"ISNULL([{name}], @KeyNull{position})"
+
+    def _null_params(self) -> Dict[str, Any]:
+        return {f"KeyNull{i}": null_value
+                for i, (_, _, null_value) in enumerate(self.columns) if null_value is not None}
+
+    def order_by(self) -> str:
+        return ", ".join(f"{self._expression(i)} {direction}"
+                         for i, (_, direction, _) in enumerate(self.columns))
+
+    def after(self, values: Sequence) -> Tuple[str, Dict[str, Any]]:
+        """WHERE predicate selecting rows that sort after `values`
+
+        Expands to (a > @Key0) OR (a = @Key0 AND b > @Key1) ..., which SQL
+        Server can answer with an index seek on the key columns.
+        """
+        params = {f"Key{i}": value for i, value in enumerate(values)}
+        terms = []
+        for i, (_, direction, _) in enumerate(self.columns):
+            equal = [f"{self._expression(j)} = @Key{j}" for j in range(i)]
+            operator = "<" if direction == "DESC" else ">"
+            terms.append("(" + " AND ".join(equal + [f"{self._expression(i)} {operator} @Key{i}"]) + ")")
+        return " OR ".join(terms), params
+
+    def encode(self, rowset, row: tuple) -> str:
+        """Opaque cursor pointing just past `row`"""
+        values = []
+        for name, _, null_value in self.columns:
+            value = row[rowset.index(name)]
+            values.append(null_value if value is None else value)
+        raw = json.dumps(values, separators=(",", ":"), default=json_default)
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def decode(self, cursor: str) -> list:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        except (ValueError, UnicodeError, binascii.Error):
+            raise _invalid_cursor()
+        if (not isinstance(values, list) or len(values) != len(self.columns)
+                or not all(isinstance(v, (str, int, float)) for v in values)):
+            raise _invalid_cursor()
+        return values
+
+
+def wants_page(keyset: Keyset, page_size: Optional[int], cursor: Optional[str],
+               result_format: str = "objects") -> bool:
+    """Whether a list request asked for a page, validating its cursor up front
+
+    Paging is opt-in: without `page_size` or `cursor` a list endpoint keeps
+    returning the whole result.
+    """
+    if page_size is None and not cursor:
+        return False
+    if result_format not in RESULT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail={"Status": False,
+                    "Message": f"Paged results support format: {', '.join(RESULT_FORMATS)}"}
+        )
+    if cursor:
+        keyset.decode(cursor)
+    return True
+
+
+total_cache = create_cache("page-totals", PAGE_TOTAL_CACHE_TTL, PAGE_TOTAL_CACHE_SIZE)
+
+
+async def count_total(query: str, params: dict, tags=()) -> int:
+    """Row count of `query`, cached for PAGE_TOTAL_CACHE_TTL seconds or
+    until one of `tags` is invalidated"""
+    key = hashlib.sha256(repr((query, sorted(params.items()))).encode("utf-8")).hexdigest()
+
+    async def count():
+        result = await execute_sqlserver_query(
+            f"SELECT COUNT(*) AS Total FROM ({query}) AS counted", params)
+        return result[0]["Total"]
+
+    return await total_cache.get_or_load(key, count, tags=tags)
+
+
+async def fetch_page(query: str, params: dict, keyset: Keyset, page_size: Optional[int],
+                     cursor: Optional[str] = None, include_total: bool = False,
+                     result_format: str = "objects", total_tags=()):
+    """
+    Run one keyset page of a SQL Server SELECT and build its response
+
+    `query` is the unordered SELECT; it is wrapped in a derived table so the
+    keyset predicate and ORDER BY only refer to its result columns. One row
+    more than the page is fetched to tell whether another page follows.
+    `total_tags` are the invalidation tags of the cached total.
+    """
+    page_size = min(page_size or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    base_params = params or {}
+    params = dict(base_params)
+    params.update(keyset._null_params())
+
+    page_query = f"SELECT * FROM ({query}) AS paged"
+    if cursor:
+        predicate, key_params = keyset.after(keyset.decode(cursor))
+        page_query += f" WHERE {predicate}"
+        params.update(key_params)
+    page_query += (f" ORDER BY {keyset.order_by()}"
+                   " OFFSET 0 ROWS FETCH NEXT @PageLimit ROWS ONLY")
+    params["PageLimit"] = page_size + 1
+
+    rows = await execute_sqlserver_query(page_query, params, as_rows=True)
+    has_more = len(rows.rows) > page_size
+    if has_more:
+        del rows.rows[page_size:]
+
+    pagination = {
+        "PageSize": page_size,
+        "HasMore": has_more,
+        "NextCursor": keyset.encode(rows, rows.rows[-1]) if has_more else None,
+    }
+    if include_total:
+        pagination["Total"] = await count_total(query, base_params, total_tags)
+
+    return rowset_response(rows, result_format, Pagination=pagination)
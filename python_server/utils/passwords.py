@@ -0,0 +1,125 @@
+"""
+Password hashing off the event loop
+
+A bcrypt hash or check costs 100-250ms of CPU at the default work factor.
+Run inline in a coroutine it stalls every other request for that long, so a
+burst of logins at shift start froze the whole API. bcrypt releases the GIL,
+so the work runs on a small dedicated thread pool instead.
+
+The pool is bounded: when PASSWORD_HASH_MAX_PENDING hashes are already
+queued or running, further logins are shed with 429 and a Retry-After
+header rather than queueing without limit.
+
+BCRYPT_ROUNDS sets the work factor of new hashes. A successful login with a
+hash of a different factor is rehashed (see `needs_rehash`), so changing the
+setting migrates users as they log in.
+"""
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+import bcrypt
+from fastapi import HTTPException
+
+logger = logging.getLogger("passwords")
+
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+# Hashes queued or running before logins are shed with 429
+PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '32'))
+PASSWORD_HASH_RETRY_AFTER = int(os.getenv('PASSWORD_HASH_RETRY_AFTER', '2'))
+
+
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+def hash_rounds(hashed: str) -> int:
+    """Work factor of a bcrypt hash ("$2b$12$..." -> 12)"""
+    try:
+        return int(hashed.split('$')[2])
+    except (IndexError, ValueError):
+        raise ValueError("Not a bcrypt hash")
+
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded thread pool, shedding load when it is full"""
+
+    def __init__(self, rounds: int = BCRYPT_ROUNDS, workers: int = PASSWORD_HASH_WORKERS,
+                 max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+
+    async def _run(self, func, *args):
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            logger.warning(f"Password hashing saturated ({self._pending} pending), shedding request")
+            raise HTTPException(
+                status_code=429,
+                detail={"Status": False,
+                        "Message": "Too many sign-ins in progress, please retry shortly"},
+                headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER)}
+            )
+
+        self._pending += 1
+        future = asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+        def _done(f):
+            # A cancelled caller does not stop the hash; its slot frees when it ends
+            self._pending -= 1
+            self._completed += 1
+            if not f.cancelled():
+                f.exception()
+        future.add_done_callback(_done)
+        return await asyncio.shield(future)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password, self.rounds)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(_check, password, hashed)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """Whether a hash was made with a different work factor than the current one"""
+        try:
+            return hash_rounds(hashed) != self.rounds
+        except ValueError:
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rounds": self.rounds,
+            "workers": self.workers,
+            "maxPending": self.max_pending,
+            "pending": self._pending,
+            "completed": self._completed,
+            "rejected": self._rejected,
+        }
+
+
+password_hasher = PasswordHasher()
+
+
+async def hash_password(password: str) -> str:
+    """bcrypt hash of `password` at the current work factor"""
+    return await password_hasher.hash(password)
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    """Whether `password` matches a bcrypt hash"""
+    return await password_hasher.verify(password, hashed)
+
+
+def needs_rehash(hashed: str) -> bool:
+    return password_hasher.needs_rehash(hashed)
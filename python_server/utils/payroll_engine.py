@@ -0,0 +1,65 @@
+"""
+Set-based salary computation
+
+The salary list used to compute each employee's deductions with a
+correlated subquery, evaluated twice per row (once for the column, once
+inside NetSalary), and matched months with FORMAT(date, 'yyyy-MM'), which
+no index can serve. Here deductions are aggregated once per employee in a
+single grouped pass, dividends and deductions are limited to the month
+with half-open date ranges, and the aggregate is joined back. The result
+has the same rows and columns as before: one row per dividend in the
+month, or one row with a NULL DividendID for employees without one.
+
+benchmarks/bench_salary_query.py compares both forms.
+"""
+from typing import Any, Dict, Optional, Tuple
+
+from utils.dates import month_params, parse_month
+
+SALARY_QUERY = """
+    SELECT
+        d.DividendID,
+        e.EmployeeID,
+        e.FullName,
+        e.Salary AS BaseSalary,
+        COALESCE(d.DividendAmount, 0) AS Bonus,
+        COALESCE(dd.Deductions, 0) AS Deductions,
+        e.Salary + COALESCE(d.DividendAmount, 0) - COALESCE(dd.Deductions, 0) AS NetSalary,
+        d.DividendDate AS PayDate,
+        dept.DepartmentName,
+        pos.PositionName
+    FROM [HUMAN].[dbo].[Employees] e
+    LEFT JOIN [HUMAN].[dbo].[Dividends] d
+        ON d.EmployeeID = e.EmployeeID{dividend_window}
+    LEFT JOIN (
+        SELECT EmployeeID, SUM(Amount) AS Deductions
+        FROM [HUMAN].[dbo].[Deductions]{deduction_window}
+        GROUP BY EmployeeID
+    ) dd ON dd.EmployeeID = e.EmployeeID
+    JOIN [HUMAN].[dbo].[Departments] dept ON e.DepartmentID = dept.DepartmentID
+    JOIN [HUMAN].[dbo].[Positions] pos ON e.PositionID = pos.PositionID
+"""
+
+
+def salary_query(month: Optional[str] = None,
+                 employee_id=None) -> Tuple[str, Dict[str, Any]]:
+    """Salary list query and parameters, optionally for one month and/or employee
+
+    Without a month every dividend and deduction counts, as before.
+    """
+    params: Dict[str, Any] = {}
+    if month:
+        params.update(month_params(*parse_month(month)))
+        dividend_window = ("\n        AND d.DividendDate >= @MonthStart"
+                           " AND d.DividendDate < @MonthEnd")
+        deduction_window = ("\n        WHERE DeductionDate >= @MonthStart"
+                            " AND DeductionDate < @MonthEnd")
+    else:
+        dividend_window = deduction_window = ""
+
+    query = SALARY_QUERY.format(dividend_window=dividend_window,
+                                deduction_window=deduction_window)
+    if employee_id is not None:
+        query += "    WHERE e.EmployeeID = @EmployeeID\n"
+        params["EmployeeID"] = employee_id
+    return query, params
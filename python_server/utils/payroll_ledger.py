@@ -0,0 +1,330 @@
+"""
+Materialized monthly payroll ledger
+
+[HUMAN].[dbo].[PayrollLedger] keeps one row per employee per month with the
+base salary and the month's bonus, allowance and deduction totals
+(migrations/sqlserver/0001_payroll_ledger.up.sql). Payroll mutations refresh
+only the rows they touch, so month-end reports read O(employees) rows instead
+of aggregating the Bonuses/Allowances/Deductions history on every request.
+
+Employee changes (new hires, salary edits through /employees/update) publish
+EMPLOYEES_TAG with the employee's tag; `on_employees_changed` then refreshes
+that employee's rows, current salary included, in the built months from the
+current month on, in a background task. Bonuses are written
+outside this API, so reading a month compares its ledger against the source
+tables (row count and bonus/allowance/deduction totals) and refreshes it
+only when they differ.
+
+BaseSalary is the salary in force for that month: it is written when an
+employee's row is first inserted and afterwards only by salary changes from
+their effective month on, never by a refresh of an already built month.
+
+Rebuild a range of months (inclusive) after bulk imports or schema changes:
+
+    python -m utils.payroll_ledger 2025-01 2025-12
+"""
+import argparse
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Iterable, List, Optional, Set, Tuple
+
+from utils.cache import EMPLOYEES_TAG
+from utils.dates import month_params, month_window
+from utils.db import execute_sqlserver_query, stream_sqlserver_query
+
+logger = logging.getLogger("payroll_ledger")
+
+# Months before this year, or after the current month, are never written
+FIRST_LEDGER_YEAR = int(os.getenv('PAYROLL_LEDGER_FIRST_YEAR', '2000'))
+
+# Recompute the ledger rows of one month from the source tables. Rows are
+# re-aggregated rather than adjusted by deltas so a refresh always converges,
+# whatever happened before it. HOLDLOCK keeps the key range locked from the
+# match to the insert, so two first reads building the same month at once
+# queue up instead of both inserting (a primary key violation).
+# {salary_update} is empty unless current salaries should overwrite BaseSalary.
+REFRESH_MONTH_QUERY = """
+    MERGE [HUMAN].[dbo].[PayrollLedger] WITH (HOLDLOCK) AS target
+    USING (
+        SELECT
+            e.EmployeeID,
+            e.Salary AS BaseSalary,
+            COALESCE(b.BonusAmount, 0) AS Bonus,
+            COALESCE(al.AllowanceAmount, 0) AS Allowances,
+            COALESCE(dd.DeductionAmount, 0) AS Deductions
+        FROM [HUMAN].[dbo].[Employees] e
+        LEFT JOIN (
+            SELECT EmployeeID, SUM(BonusAmount) AS BonusAmount
+            FROM [HUMAN].[dbo].[Bonuses]
+            WHERE BonusDate >= @MonthStart AND BonusDate < @MonthEnd
+            GROUP BY EmployeeID
+        ) b ON e.EmployeeID = b.EmployeeID
+        LEFT JOIN (
+            SELECT EmployeeID, SUM(Amount) AS AllowanceAmount
+            FROM [HUMAN].[dbo].[Allowances]
+            WHERE AllowanceDate >= @MonthStart AND AllowanceDate < @MonthEnd
+            GROUP BY EmployeeID
+        ) al ON e.EmployeeID = al.EmployeeID
+        LEFT JOIN (
+            SELECT EmployeeID, SUM(Amount) AS DeductionAmount
+            FROM [HUMAN].[dbo].[Deductions]
+            WHERE DeductionDate >= @MonthStart AND DeductionDate < @MonthEnd
+            GROUP BY EmployeeID
+        ) dd ON e.EmployeeID = dd.EmployeeID
+        {employee_filter}
+    ) AS source
+    ON target.PayrollMonth = @MonthStart AND target.EmployeeID = source.EmployeeID
+    WHEN MATCHED THEN UPDATE SET
+        {salary_update}
+        Bonus = source.Bonus,
+        Allowances = source.Allowances,
+        Deductions = source.Deductions,
+        UpdatedAt = SYSUTCDATETIME()
+    WHEN NOT MATCHED BY TARGET THEN
+        INSERT (PayrollMonth, EmployeeID, BaseSalary, Bonus, Allowances, Deductions)
+        VALUES (@MonthStart, source.EmployeeID, source.BaseSalary, source.Bonus,
+                source.Allowances, source.Deductions)
+    {delete_clause};
+"""
+
+# Month-end report, same columns and order as the live aggregate
+READ_MONTH_QUERY = """
+    SELECT
+        l.EmployeeID,
+        e.FullName,
+        d.DepartmentName,
+        l.BaseSalary,
+        l.Bonus,
+        l.Allowances,
+        l.Deductions,
+        l.NetSalary
+    FROM [HUMAN].[dbo].[PayrollLedger] l
+    JOIN [HUMAN].[dbo].[Employees] e ON l.EmployeeID = e.EmployeeID
+    JOIN [HUMAN].[dbo].[Departments] d ON e.DepartmentID = d.DepartmentID
+    WHERE l.PayrollMonth = @MonthStart
+    ORDER BY d.DepartmentName, e.FullName
+"""
+
+# A month's ledger totals next to the same totals from the source tables;
+# the month is dirty when any pair differs
+MONTH_STATE_QUERY = """
+    SELECT
+        l.LedgerRows, l.Bonus, l.Allowances, l.Deductions,
+        (SELECT COUNT(*) FROM [HUMAN].[dbo].[Employees]) AS SourceRows,
+        (SELECT COALESCE(SUM(b.BonusAmount), 0)
+         FROM [HUMAN].[dbo].[Bonuses] b
+         JOIN [HUMAN].[dbo].[Employees] e ON b.EmployeeID = e.EmployeeID
+         WHERE b.BonusDate >= @MonthStart AND b.BonusDate < @MonthEnd) AS SourceBonus,
+        (SELECT COALESCE(SUM(a.Amount), 0)
+         FROM [HUMAN].[dbo].[Allowances] a
+         JOIN [HUMAN].[dbo].[Employees] e ON a.EmployeeID = e.EmployeeID
+         WHERE a.AllowanceDate >= @MonthStart AND a.AllowanceDate < @MonthEnd) AS SourceAllowances,
+        (SELECT COALESCE(SUM(d.Amount), 0)
+         FROM [HUMAN].[dbo].[Deductions] d
+         JOIN [HUMAN].[dbo].[Employees] e ON d.EmployeeID = e.EmployeeID
+         WHERE d.DeductionDate >= @MonthStart AND d.DeductionDate < @MonthEnd) AS SourceDeductions
+    FROM (
+        SELECT
+            COUNT(*) AS LedgerRows,
+            COALESCE(SUM(Bonus), 0) AS Bonus,
+            COALESCE(SUM(Allowances), 0) AS Allowances,
+            COALESCE(SUM(Deductions), 0) AS Deductions
+        FROM [HUMAN].[dbo].[PayrollLedger]
+        WHERE PayrollMonth = @MonthStart
+    ) l
+"""
+
+# (ledger column, source column) pairs compared by `is_dirty`
+MONTH_STATE_COLUMNS = (("LedgerRows", "SourceRows"), ("Bonus", "SourceBonus"),
+                       ("Allowances", "SourceAllowances"), ("Deductions", "SourceDeductions"))
+
+BUILT_MONTHS_QUERY = """
+    SELECT DISTINCT PayrollMonth
+    FROM [HUMAN].[dbo].[PayrollLedger]
+    WHERE PayrollMonth >= @MonthStart
+"""
+
+# Employee refreshes started by on_employees_changed, kept until they finish
+_background: Set[asyncio.Task] = set()
+
+
+def month_of(value) -> Tuple[int, int]:
+    """(year, month) of a date, datetime or ISO date string"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value[:10])
+    return value.year, value.month
+
+
+async def refresh_month(year: int, month: int, employee_id: Optional[str] = None,
+                        update_salary: bool = False):
+    """Recompute one month of the ledger, or one employee's row in it.
+
+    Existing rows keep their BaseSalary unless `update_salary` is set, so
+    refreshing a closed month does not rewrite its salary history.
+    """
+    params = month_params(*month_window(year, month))
+    if employee_id is None:
+        employee_filter = ""
+        # Employees removed since the last refresh drop out of the month
+        delete_clause = ("WHEN NOT MATCHED BY SOURCE AND target.PayrollMonth = @MonthStart"
+                         " THEN DELETE")
+    else:
+        employee_filter = "WHERE e.EmployeeID = @EmployeeID"
+        delete_clause = ""
+        params["EmployeeID"] = employee_id
+
+    query = REFRESH_MONTH_QUERY.format(
+        employee_filter=employee_filter,
+        delete_clause=delete_clause,
+        salary_update="BaseSalary = source.BaseSalary," if update_salary else "")
+    return await execute_sqlserver_query(query, params)
+
+
+async def refresh_employee(employee_id: str, dates: Iterable):
+    """Refresh an employee's ledger rows for the months of `dates`"""
+    for year, month in sorted({month_of(value) for value in dates if value}):
+        await refresh_month(year, month, employee_id)
+
+
+async def apply_salary_change(employee_id: str, salary: float, effective_date):
+    """Carry a new base salary into the ledger from its effective month on"""
+    year, month = month_of(effective_date)
+    start, _ = month_window(year, month)
+    await execute_sqlserver_query("""
+        UPDATE [HUMAN].[dbo].[PayrollLedger]
+        SET BaseSalary = @Salary, UpdatedAt = SYSUTCDATETIME()
+        WHERE EmployeeID = @EmployeeID AND PayrollMonth >= @MonthStart
+    """, {"EmployeeID": employee_id, "Salary": salary, "MonthStart": start})
+
+
+def check_ledger_month(year: int, month: int):
+    """Raise ValueError for a month the ledger does not keep"""
+    today = datetime.now()
+    if (year, month) < (FIRST_LEDGER_YEAR, 1) or (year, month) > (today.year, today.month):
+        raise ValueError(f"{year}-{month:02d} is outside the payroll ledger "
+                         f"({FIRST_LEDGER_YEAR}-01 to the current month)")
+
+
+def is_dirty(state: dict) -> bool:
+    """Whether a MONTH_STATE_QUERY row shows the ledger out of step with
+    the source tables"""
+    return any((state.get(ledger) or 0) != (state.get(source) or 0)
+               for ledger, source in MONTH_STATE_COLUMNS)
+
+
+async def ensure_month(year: int, month: int):
+    """Build a month that has no rows yet, or refresh it when its totals no
+    longer match the source tables"""
+    check_ledger_month(year, month)
+    state = await execute_sqlserver_query(MONTH_STATE_QUERY, month_params(*month_window(year, month)))
+    state = state[0] if state else {}
+    if not state.get("LedgerRows"):
+        logger.info(f"Building payroll ledger for {year}-{month:02d}")
+    elif is_dirty(state):
+        logger.info(f"Refreshing out-of-date payroll ledger for {year}-{month:02d}")
+    else:
+        return
+    await refresh_month(year, month)
+
+
+async def read_month(year: int, month: int, build_missing: bool = True) -> List[dict]:
+    """Ledger rows of a month, building or refreshing the month first if needed"""
+    if build_missing:
+        await ensure_month(year, month)
+    start, _ = month_window(year, month)
+    return await execute_sqlserver_query(READ_MONTH_QUERY, {"MonthStart": start})
+
+
+async def stream_month(year: int, month: int, batch_size: Optional[int] = None):
+    """Ledger rows of a month as RowSet batches (see stream_sqlserver_query),
+    building or refreshing the month first if needed"""
+    await ensure_month(year, month)
+    start, _ = month_window(year, month)
+    return stream_sqlserver_query(READ_MONTH_QUERY, {"MonthStart": start}, batch_size=batch_size)
+
+
+async def built_months(since: Tuple[int, int] = (FIRST_LEDGER_YEAR, 1)) -> List[Tuple[int, int]]:
+    """(year, month) of every month from `since` on that the ledger has rows for"""
+    start, _ = month_window(*since)
+    rows = await execute_sqlserver_query(BUILT_MONTHS_QUERY, {"MonthStart": start})
+    return sorted(month_of(row["PayrollMonth"]) for row in rows)
+
+
+async def refresh_employee_since(employee_id: str, since: Tuple[int, int]):
+    """Refresh an employee's rows, BaseSalary included, in every built month
+    from `since` on (new hire, salary edit)"""
+    for year, month in await built_months(since):
+        await refresh_month(year, month, employee_id, update_salary=True)
+
+
+async def _refresh_employees(employee_ids: List[str], since: Tuple[int, int]):
+    for employee_id in employee_ids:
+        try:
+            await refresh_employee_since(employee_id, since)
+        except Exception as e:
+            logger.error(f"Payroll ledger update failed, rebuild the month: {str(e)}")
+
+
+async def on_employees_changed(tags: Set[str]):
+    """invalidation_bus subscriber: bring the ledger up to date with
+    changed employee records.
+
+    The change takes effect this month, so earlier months keep their rows.
+    The refresh runs in the background rather than inside the publishing
+    request.
+    """
+    if EMPLOYEES_TAG not in tags:
+        # Payroll mutations refresh their own rows before publishing
+        return
+    employee_ids = [tag[len("employee:"):] for tag in sorted(tags) if tag.startswith("employee:")]
+    if not employee_ids:
+        return
+    task = asyncio.get_running_loop().create_task(
+        _refresh_employees(employee_ids, month_of(datetime.now())))
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+def months_between(first: Tuple[int, int], last: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """Every (year, month) from `first` to `last` inclusive"""
+    months = []
+    year, month = first
+    while (year, month) <= last:
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+async def rebuild(first: Tuple[int, int], last: Tuple[int, int],
+                  update_salary: bool = False) -> int:
+    """Recompute every month in [first, last]; returns the number of months.
+
+    BaseSalary of existing rows is kept unless `update_salary` is set.
+    """
+    months = months_between(first, last)
+    for year, month in months:
+        logger.info(f"Rebuilding payroll ledger for {year}-{month:02d}")
+        await refresh_month(year, month, update_salary=update_salary)
+    return len(months)
+
+
+def _parse_month(value: str) -> Tuple[int, int]:
+    try:
+        parsed = datetime.strptime(value, "%Y-%m")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM, got '{value}'")
+    return parsed.year, parsed.month
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Rebuild the materialized payroll ledger")
+    parser.add_argument("first", type=_parse_month, help="first month (YYYY-MM)")
+    parser.add_argument("last", type=_parse_month, nargs="?", help="last month (YYYY-MM), default first")
+    parser.add_argument("--salaries", action="store_true",
+                        help="also overwrite BaseSalary with current salaries")
+    args = parser.parse_args()
+    count = asyncio.run(rebuild(args.first, args.last or args.first, args.salaries))
+    logger.info(f"Rebuilt {count} month(s)")
@@ -0,0 +1,343 @@
+"""
+Precomputed report aggregates
+
+The Reports page calls /reports/employee-stats, /salary-stats and
+/organization-stats together, and each used to run full-table aggregates
+over [HUMAN].[dbo].[Employees] and Departments on every page load. The
+store keeps compact rollups of those tables in memory instead:
+
+- workforce:  per department headcount, salary sum/count, and the active
+              employees' salary sum/count/max and gender split
+- events:     per year and department, new hires and leavers
+- departments, department_sizes, structure: department names, the
+              Departments.EmployeeCount summary and the manager counts
+
+The endpoints are computed from the rollups. A refresh runs the section
+queries concurrently (utils/fanout.py) every REPORT_REFRESH_INTERVAL seconds, and on the
+next read after a mutation publishes an employee, department or payroll
+tag on `invalidation_bus`. Sections refresh independently: a failing query
+keeps that section's previous rollup (or leaves it missing, and the
+endpoints that need it fall back as before) without affecting the others.
+Responses carry `AsOf`, the time the rollups were computed.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime
+from decimal import Decimal
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.cache import DEPARTMENTS_TAG, EMPLOYEES_TAG, PAYROLL_TAG, invalidation_bus
+from utils.db import execute_sqlserver_query
+from utils.fanout import fan_out
+
+logger = logging.getLogger("report_store")
+
+REPORT_REFRESH_INTERVAL = float(os.getenv('REPORT_REFRESH_INTERVAL', str(5 * 60)))  # seconds
+
+DEPARTMENTS_QUERY = """
+    SELECT DepartmentID, DepartmentName
+    FROM [HUMAN].[dbo].[Departments]
+"""
+
+WORKFORCE_QUERY = """
+    SELECT
+        DepartmentID,
+        COUNT(*) AS Headcount,
+        SUM(Salary) AS SalarySum,
+        COUNT(Salary) AS SalaryCount,
+        SUM(CASE WHEN Status = 'Active' THEN 1 ELSE 0 END) AS ActiveHeadcount,
+        SUM(CASE WHEN Status = 'Active' THEN Salary END) AS ActiveSalarySum,
+        COUNT(CASE WHEN Status = 'Active' THEN Salary END) AS ActiveSalaryCount,
+        MAX(CASE WHEN Status = 'Active' THEN Salary END) AS ActiveSalaryMax,
+        SUM(CASE WHEN Status = 'Active' AND Gender = 'Male' THEN 1 ELSE 0 END) AS ActiveMale,
+        SUM(CASE WHEN Status = 'Active' AND Gender = 'Female' THEN 1 ELSE 0 END) AS ActiveFemale
+    FROM [HUMAN].[dbo].[Employees]
+    GROUP BY DepartmentID
+"""
+
+EVENTS_QUERY = """
+    SELECT YEAR(EventDate) AS EventYear, DepartmentID,
+           SUM(Hired) AS NewHires, SUM(Departed) AS Leavers
+    FROM (
+        SELECT HireDate AS EventDate, DepartmentID, 1 AS Hired, 0 AS Departed
+        FROM [HUMAN].[dbo].[Employees]
+        WHERE HireDate IS NOT NULL
+        UNION ALL
+        SELECT EndDate, DepartmentID, 0, 1
+        FROM [HUMAN].[dbo].[Employees]
+        WHERE Status = 'Inactive' AND EndDate IS NOT NULL
+    ) events
+    GROUP BY YEAR(EventDate), DepartmentID
+"""
+
+DEPARTMENT_SIZES_QUERY = """
+    SELECT
+        COUNT(DepartmentID) as TotalDepartments,
+        AVG(EmployeeCount) as AvgEmployeesPerDepartment,
+        (SELECT TOP 1 DepartmentName FROM [HUMAN].[dbo].[Departments] ORDER BY EmployeeCount DESC) as LargestDepartment,
+        (SELECT TOP 1 DepartmentName FROM [HUMAN].[dbo].[Departments] WHERE EmployeeCount > 0 ORDER BY EmployeeCount ASC) as SmallestDepartment
+    FROM [HUMAN].[dbo].[Departments]
+"""
+
+STRUCTURE_QUERY = """
+    SELECT
+        COUNT(*) AS ActiveHeadcount,
+        SUM(CASE WHEN JobTitle LIKE '%Manager%' THEN 1 ELSE 0 END) as TotalManagers
+    FROM [HUMAN].[dbo].[Employees]
+    WHERE Status = 'Active'
+"""
+
+SECTION_QUERIES = {
+    "departments": DEPARTMENTS_QUERY,
+    "workforce": WORKFORCE_QUERY,
+    "events": EVENTS_QUERY,
+    "department_sizes": DEPARTMENT_SIZES_QUERY,
+    "structure": STRUCTURE_QUERY,
+}
+
+
+class SectionUnavailable(Exception):
+    """A rollup an endpoint needs has never been computed successfully"""
+
+
+def _number(value):
+    return value or 0
+
+
+def _percent_of(value, percent: int):
+    """`percent`% of a SUM that may come back as Decimal (DECIMAL/MONEY columns) or a number"""
+    if isinstance(value, Decimal):
+        return value * percent / 100
+    return value * percent / 100.0
+
+
+class ReportSnapshot:
+    """Rollups as of one refresh, and the report payloads computed from them"""
+
+    def __init__(self, sections: Dict[str, list], built_at: Dict[str, datetime]):
+        self.sections = sections
+        # When each section was computed; a section kept from an earlier
+        # snapshot after a failed query keeps its original time
+        self.section_built_at = built_at
+        self.built_at = min(built_at.values())
+
+    @property
+    def as_of(self) -> str:
+        return self.built_at.isoformat(timespec="seconds")
+
+    def _section(self, name: str) -> list:
+        rows = self.sections.get(name)
+        if rows is None:
+            raise SectionUnavailable(name)
+        return rows
+
+    def employee_stats(self, year: int) -> Dict[str, Any]:
+        workforce = self._section("workforce")
+        events = self._section("events")
+        departments = self._section("departments")
+
+        total_employees = sum(row["Headcount"] for row in workforce)
+        salary_sum = sum(_number(row["SalarySum"]) for row in workforce)
+        salary_count = sum(row["SalaryCount"] for row in workforce)
+        year_events = [row for row in events if row["EventYear"] == year]
+        new_hires = sum(row["NewHires"] for row in year_events)
+        leavers = sum(row["Leavers"] for row in year_events)
+
+        # Departments sharing a name are reported together, as GROUP BY name did
+        headcounts = {row["DepartmentID"]: row["Headcount"] for row in workforce}
+        by_name: Dict[str, int] = {}
+        for department in departments:
+            name = department["DepartmentName"]
+            by_name[name] = by_name.get(name, 0) + headcounts.get(department["DepartmentID"], 0)
+        by_department = sorted(({"name": name, "count": count} for name, count in by_name.items()),
+                               key=lambda row: row["count"], reverse=True)
+
+        return {
+            "byDepartment": by_department,
+            "overall": {
+                "totalEmployees": total_employees,
+                "totalNewHires": new_hires,
+                "turnoverRate": round(leavers / total_employees * 100, 1) if total_employees else 0,
+                "averageSalary": salary_sum / salary_count if salary_count else None
+            }
+        }
+
+    def salary_stats(self) -> Dict[str, Any]:
+        workforce = self._section("workforce")
+        total = sum(_number(row["ActiveSalarySum"]) for row in workforce)
+        count = sum(row["ActiveSalaryCount"] for row in workforce)
+        highest = max((row["ActiveSalaryMax"] for row in workforce
+                       if row["ActiveSalaryMax"] is not None), default=0)
+        return {
+            "totalPayroll": total,
+            "averageSalary": total / count if count else 0,
+            "highestSalary": highest,
+            "totalBonuses": _percent_of(total, 10) if total else 0  # Just a placeholder calculation
+        }
+
+    def organization_stats(self) -> Dict[str, Any]:
+        sizes = self._section("department_sizes")
+        structure = self._section("structure")
+        workforce = self._section("workforce")
+
+        sizes = sizes[0] if sizes else {}
+        structure = structure[0] if structure else {}
+        active = _number(structure.get("ActiveHeadcount"))
+        managers = _number(structure.get("TotalManagers"))
+        active_workforce = sum(row["ActiveHeadcount"] for row in workforce)
+        male = sum(row["ActiveMale"] for row in workforce)
+        female = sum(row["ActiveFemale"] for row in workforce)
+
+        return {
+            "departments": {
+                "totalDepartments": sizes.get("TotalDepartments", 0),
+                "avgEmployeesPerDepartment": round(_number(sizes.get("AvgEmployeesPerDepartment")), 1),
+                "largestDepartment": sizes.get("LargestDepartment", ""),
+                "smallestDepartment": sizes.get("SmallestDepartment", "")
+            },
+            "structure": {
+                "totalManagers": managers,
+                "managerToEmployeeRatio": round(managers / active, 2) if active else 0,
+                # Whole employees per manager, as the integer division in SQL gave
+                "avgTeamSize": round(active // managers, 1) if managers else 0
+            },
+            "gender": {
+                "male": round(male * 100.0 / active_workforce, 0) if active_workforce else 0,
+                "female": round(female * 100.0 / active_workforce, 0) if active_workforce else 0
+            }
+        }
+
+
+class ReportStore:
+    """
+    Keeps the latest ReportSnapshot and refreshes it
+
+    `get` returns the current snapshot, refreshing first when there is none
+    yet or a mutation has invalidated it; concurrent readers share one
+    refresh. `start` runs the periodic refresh in the background.
+    """
+
+    def __init__(self, queries: Dict[str, str] = SECTION_QUERIES,
+                 interval: float = REPORT_REFRESH_INTERVAL,
+                 precheck: Optional[Callable[[], Awaitable[None]]] = None,
+                 execute=None):
+        self.queries = queries
+        self.interval = interval
+        self.precheck = precheck
+        self._execute = execute
+        self.snapshot: Optional[ReportSnapshot] = None
+        self._dirty = True
+        self._epoch = 0
+        self._refreshing: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.section_errors = 0
+
+    def invalidate(self, tags=()):
+        """Mark the snapshot out of date; the next read refreshes it"""
+        self._dirty = True
+        self._epoch += 1
+
+    def _on_change(self, tags):
+        if any(tag in (EMPLOYEES_TAG, DEPARTMENTS_TAG, PAYROLL_TAG)
+               or tag.startswith(("employee:", "department:")) for tag in tags):
+            self.invalidate()
+
+    async def _run_query(self, query: str):
+        execute = self._execute or execute_sqlserver_query
+        return await execute(query)
+
+    async def _refresh(self) -> ReportSnapshot:
+        if self.precheck is not None:
+            await self.precheck()
+        epoch = self._epoch
+        outcome = await fan_out({name: partial(self._run_query, query)
+                                 for name, query in self.queries.items()})
+
+        for name, error in outcome.errors.items():
+            self.section_errors += 1
+            logger.error(f"Report rollup '{name}' failed: {str(error)}")
+        # Nothing refreshed: get() keeps serving the previous snapshot
+        outcome.raise_if_all_failed()
+
+        now = datetime.now()
+        sections = {name: list(rows or []) for name, rows in outcome.results.items()}
+        built_at = {name: now for name in sections}
+        if self.snapshot is not None:
+            for name in outcome.errors:
+                if name in self.snapshot.sections:
+                    sections[name] = self.snapshot.sections[name]
+                    built_at[name] = self.snapshot.section_built_at[name]
+
+        self.snapshot = ReportSnapshot(sections, built_at)
+        self.refreshes += 1
+        # Retry failed sections on the next read, and a mutation during the
+        # refresh may not be reflected; keep it dirty in either case
+        self._dirty = bool(outcome.errors) or epoch != self._epoch
+        return self.snapshot
+
+    async def refresh(self) -> ReportSnapshot:
+        """Recompute the rollups (concurrent callers share one refresh)"""
+        if self._refreshing is not None:
+            return await asyncio.shield(self._refreshing)
+        future = asyncio.get_running_loop().create_future()
+        self._refreshing = future
+        try:
+            snapshot = await self._refresh()
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        else:
+            future.set_result(snapshot)
+            return snapshot
+        finally:
+            self._refreshing = None
+
+    async def get(self) -> ReportSnapshot:
+        """Current snapshot; stale rollups are served if a refresh fails"""
+        if self.snapshot is not None and not self._dirty:
+            return self.snapshot
+        try:
+            return await self.refresh()
+        except Exception as e:
+            if self.snapshot is None:
+                raise
+            logger.warning(f"Serving report rollups from {self.snapshot.as_of}: {str(e)}")
+            return self.snapshot
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Scheduled report refresh failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "asOf": self.snapshot.as_of if self.snapshot else None,
+            "dirty": self._dirty,
+            "sections": sorted(self.snapshot.sections) if self.snapshot else [],
+            "refreshes": self.refreshes,
+            "sectionErrors": self.section_errors,
+        }
+
+    def subscribe(self):
+        """Refresh on the next read after employee, department or payroll changes"""
+        invalidation_bus.subscribe(self._on_change)
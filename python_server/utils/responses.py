@@ -0,0 +1,154 @@
+import json
+import logging
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict
+
+from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+
+logger = logging.getLogger("responses")
+
+# Result layouts for list endpoints:
+#   objects - [{"col": value, ...}, ...]  (the original layout, default)
+#   rows    - {"Columns": [...], "Rows": [[...], ...]}
+#   columns - {"Columns": [...], "Data": {"col": [...], ...}}
+RESULT_FORMATS = ("objects", "rows", "columns")
+
+# Layouts a streamed endpoint can produce; ndjson writes one object per line
+STREAM_FORMATS = RESULT_FORMATS + ("ndjson",)
+
+
+def json_default(value: Any):
+    """Encode the driver types FastAPI's jsonable_encoder would handle"""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        # Same rule as FastAPI: whole numbers become int, others float
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response rendered straight from driver values
+
+    Returning a dict from a route makes FastAPI walk every value through
+    jsonable_encoder in Python before serializing. This response hands the
+    content to the C json encoder directly, converting dates and Decimals
+    through `json_default`, which matters for result sets with many rows.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+            default=json_default,
+        ).encode("utf-8")
+
+
+def check_result_format(result_format: str, allowed: tuple = RESULT_FORMATS) -> str:
+    """Validate a ?format= value"""
+    if result_format not in allowed:
+        raise HTTPException(
+            status_code=400,
+            detail={"Status": False,
+                    "Message": f"format must be one of: {', '.join(allowed)}"}
+        )
+    return result_format
+
+
+def rowset_payload(rowset, result_format: str = "objects", **extra) -> Dict[str, Any]:
+    """Build the response body for a RowSet in the requested layout"""
+    if result_format == "rows":
+        payload = {"Status": True, "Columns": rowset.columns, "Rows": rowset.rows}
+    elif result_format == "columns":
+        payload = {"Status": True, "Columns": rowset.columns, "Data": rowset.to_columns()}
+    else:
+        payload = {"Status": True, "Data": rowset.to_dicts()}
+    payload.update(extra)
+    return payload
+
+
+def rowset_response(rowset, result_format: str = "objects", **extra) -> FastJSONResponse:
+    """Serialize a RowSet in the requested layout without jsonable_encoder"""
+    return FastJSONResponse(rowset_payload(rowset, result_format, **extra))
+
+
+def _dumps(content: Any) -> str:
+    return json.dumps(content, ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":"), default=json_default)
+
+
+async def _encode_stream(first, batches: AsyncIterator, result_format: str):
+    """Encode RowSet batches as they arrive from the database"""
+    try:
+        if result_format == "ndjson":
+            batch = first
+            while batch is not None:
+                if batch.rows:
+                    yield "".join(_dumps(row) + "\n" for row in batch.to_dicts()).encode("utf-8")
+                batch = await _next_batch(batches)
+            return
+
+        # Same bytes as the buffered response, written one batch at a time.
+        # Each batch is encoded as a list and its brackets dropped.
+        if result_format == "rows":
+            yield (f'{{"Status":true,"Columns":{_dumps(first.columns)},"Rows":[').encode("utf-8")
+        else:
+            yield b'{"Status":true,"Data":['
+        separator = ""
+        batch = first
+        while batch is not None:
+            if batch.rows:
+                items = batch.rows if result_format == "rows" else batch.to_dicts()
+                yield (separator + _dumps(items)[1:-1]).encode("utf-8")
+                separator = ","
+            batch = await _next_batch(batches)
+        yield b"]}"
+    except Exception as e:
+        # Headers are already sent; abort so the client sees an incomplete body
+        logger.error(f"Result stream failed: {str(e)}")
+        raise
+    finally:
+        await batches.aclose()
+
+
+async def _next_batch(batches: AsyncIterator):
+    try:
+        return await batches.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+async def stream_rowset_response(batches: AsyncIterator, result_format: str = "objects") -> Response:
+    """
+    Stream RowSet batches (see utils.db.stream_sqlserver_query) to the client
+
+    The first batch is awaited before responding, so connection errors and
+    timeouts still surface as normal HTTP errors. The columns layout needs the
+    whole result and is buffered instead.
+    """
+    try:
+        first = await _next_batch(batches)
+        if result_format == "columns":
+            rows = list(first.rows) if first is not None else []
+            batch = await _next_batch(batches)
+            while batch is not None:
+                rows.extend(batch.rows)
+                batch = await _next_batch(batches)
+            return rowset_response(type(first)(first.columns, rows), "columns")
+    except BaseException:
+        await batches.aclose()
+        raise
+
+    media_type = "application/x-ndjson" if result_format == "ndjson" else "application/json"
+    return StreamingResponse(_encode_stream(first, batches, result_format), media_type=media_type)